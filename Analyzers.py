@@ -0,0 +1,67 @@
+import importlib
+
+# Every backend is a streaming analyzer built as cls(heavy_hitter_threshold,
+# **options) that answers these calls:
+#   process_batch(items)        ingest a batch of items
+#   get_frequency_counts()      {item: count}
+#   get_frequency_estimate(x)   (count, error) for one item
+#   get_heavy_hitters()         [(item, count, error)], largest first
+#   get_top_k(k)                [(item, count, error)] for the k largest
+#   get_quantiles(qs)           {q: value} for q in [0, 1]; each value is an
+#                               ingested item (no interpolation), None if empty
+#   get_distinct_count()        number of distinct items (may be an estimate)
+PROTOCOL = ("process_batch", "get_frequency_counts", "get_frequency_estimate", "get_heavy_hitters", "get_top_k",
+            "get_quantiles", "get_distinct_count")
+
+# name -> ("module:class", default options). Nothing is imported until a
+# backend is first used, so importing this module pulls in no analyzer code
+# (and never NumPy or matplotlib).
+BACKENDS = {
+    "greedy": ("EachAlgo:GreedyAnalyzer", {}),
+    "divide_and_conquer": ("EachAlgo:DivideAndConquerAnalyzer", {}),
+    "decrease_and_conquer": ("EachAlgo:DecreaseAndConquerAnalyzer", {}),
+    "sketch": ("EachAlgo:DivideAndConquerAnalyzer", {"capacity": 1024, "sketch_width": 2048}),
+    "vectorized": ("VectorAnalyzer:VectorizedStreamingAnalyzer", {}),
+    "sliding_window": ("SlidingWindow:SlidingWindowAnalyzer", {"window_items": 1 << 20}),
+    "concurrent": ("Concurrent:ConcurrentAnalyzer", {}),
+    "decayed": ("Decay:DecayedAnalyzer", {"half_life": 60.0}),
+}
+
+_loaded = {}
+
+
+def register(name, target, **defaults):
+    # Adds or replaces a backend; target is "module:class" or the class itself
+    BACKENDS[name] = (target, defaults)
+    _loaded.pop(name, None)
+
+
+def available():
+    return sorted(BACKENDS)
+
+
+def load(name):
+    # The backend class, importing its module on first use
+    cls = _loaded.get(name)
+    if cls is None:
+        try:
+            target, _ = BACKENDS[name]
+        except KeyError:
+            raise ValueError(f"unknown backend {name!r}; available: {', '.join(available())}") from None
+        if isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            cls = getattr(importlib.import_module(module_name), attribute)
+        else:
+            cls = target
+        _loaded[name] = cls
+    return cls
+
+
+def create(name, heavy_hitter_threshold, **options):
+    _, defaults = BACKENDS.get(name, (None, {}))
+    return load(name)(heavy_hitter_threshold, **{**defaults, **options})
+
+
+def missing_methods(analyzer):
+    # Protocol methods the analyzer (or class) lacks; empty when it conforms
+    return [method for method in PROTOCOL if not callable(getattr(analyzer, method, None))]
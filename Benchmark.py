@@ -0,0 +1,373 @@
+import argparse
+import bisect
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from EachAlgoWithMPL import global_input_sizes
+
+DEFAULT_SIZES = global_input_sizes
+EXTENDED_SIZES = [250000, 1000000]
+
+
+# Seeded data generators
+
+def uniform_data(n, seed, low=1, high=20):
+    rng = random.Random(seed)
+    return [rng.randint(low, high) for _ in range(n)]
+
+
+def zipf_data(n, seed, exponent=1.2, domain=10000):
+    rng = random.Random(seed)
+    cumulative = []
+    running = 0.0
+    for rank in range(1, domain + 1):
+        running += 1.0 / rank ** exponent
+        cumulative.append(running)
+    return [bisect.bisect_left(cumulative, rng.random() * running) + 1 for _ in range(n)]
+
+
+def high_cardinality_data(n, seed):
+    rng = random.Random(seed)
+    return [rng.getrandbits(40) for _ in range(n)]
+
+
+DISTRIBUTIONS = {
+    "uniform": uniform_data,
+    "zipf": zipf_data,
+    "high_cardinality": high_cardinality_data,
+}
+
+
+# Analyzer cases: each runner takes a private copy of the data and a threshold
+
+def _run_greedy(data, threshold):
+    from Greedy import GreedyAnalyzer
+    GreedyAnalyzer(data, threshold)
+
+
+def _run_divide_and_conquer(data, threshold):
+    from DivConq import DivideAndConquerAnalyzer
+    DivideAndConquerAnalyzer(data, threshold).process()
+
+
+def _run_decrease_and_conquer(data, threshold):
+    from DecConq import DecreaseAndConquerAnalyzer
+    DecreaseAndConquerAnalyzer(data, threshold).process_data()
+
+
+def _run_sampled_decrease_and_conquer(data, threshold):
+    from DecConq import DecreaseAndConquerAnalyzer
+    DecreaseAndConquerAnalyzer(data, threshold).process_data_sampled(rate=0.01, seed=0)
+
+
+def _run_stream_greedy(data, threshold):
+    from EachAlgo import GreedyAnalyzer
+    analyzer = GreedyAnalyzer(threshold)
+    for item in data:
+        analyzer.process_item(item)
+    analyzer.get_quantiles()
+
+
+def _run_stream_divide_and_conquer(data, threshold):
+    from EachAlgo import DivideAndConquerAnalyzer
+    analyzer = DivideAndConquerAnalyzer(threshold)
+    batch_size = max(1, len(data) // 10)
+    for i in range(0, len(data), batch_size):
+        analyzer.process_batch(data[i:i + batch_size])
+    analyzer.get_quantiles()
+
+
+def _run_stream_decrease_and_conquer(data, threshold):
+    from EachAlgo import DecreaseAndConquerAnalyzer
+    analyzer = DecreaseAndConquerAnalyzer(threshold)
+    sample_size = max(1, len(data) // 10)
+    for i in range(0, len(data), sample_size):
+        analyzer.process_sample(data[i:i + sample_size])
+    analyzer.get_quantiles()
+
+
+def _run_mpl_greedy(data, threshold):
+    from EachAlgoWithMPL import GreedyAnalyzer
+    GreedyAnalyzer(data, threshold)
+
+
+def _run_mpl_divide_and_conquer(data, threshold):
+    from EachAlgoWithMPL import DivideAndConquerAnalyzer
+    analyzer = DivideAndConquerAnalyzer(data, threshold)
+    batch_size = max(1, len(data) // 10)
+    for i in range(0, len(data), batch_size):
+        analyzer.process_batch(data[i:i + batch_size])
+    analyzer.finish_batches()
+
+
+def _run_mpl_decrease_and_conquer(data, threshold):
+    from EachAlgoWithMPL import DecreaseAndConquerAnalyzer
+    DecreaseAndConquerAnalyzer(data, threshold).process_data()
+
+
+def _run_vectorized(data, threshold):
+    from VectorAnalyzer import VectorizedAnalyzer
+    VectorizedAnalyzer(data, threshold).process_data()
+
+
+def _numpy_input(data):
+    import numpy as np
+    return np.array(data, dtype=np.int64)
+
+
+# name -> (runner, input preparation done outside the timed region)
+CASES = {
+    "greedy": (_run_greedy, list),
+    "divide_and_conquer": (_run_divide_and_conquer, list),
+    "decrease_and_conquer": (_run_decrease_and_conquer, list),
+    "sampled_decrease_and_conquer": (_run_sampled_decrease_and_conquer, list),
+    "stream_greedy": (_run_stream_greedy, list),
+    "stream_divide_and_conquer": (_run_stream_divide_and_conquer, list),
+    "stream_decrease_and_conquer": (_run_stream_decrease_and_conquer, list),
+    "mpl_greedy": (_run_mpl_greedy, list),
+    "mpl_divide_and_conquer": (_run_mpl_divide_and_conquer, list),
+    "mpl_decrease_and_conquer": (_run_mpl_decrease_and_conquer, list),
+    "vectorized": (_run_vectorized, _numpy_input),
+}
+
+# Cases that answer from a sample, doing less work than the exact analyzers;
+# they are ranked separately from them
+APPROXIMATE_CASES = {"sampled_decrease_and_conquer"}
+
+
+def measure(runner, prepare, data, threshold, warmup, repeat, trace_memory=True):
+    for _ in range(warmup):
+        runner(prepare(data), threshold)
+
+    times_ns = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            run_input = prepare(data)
+            start = time.perf_counter_ns()
+            runner(run_input, threshold)
+            times_ns.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Peak memory comes from a separate traced run so tracing does not skew timings
+    peak_bytes = None
+    if trace_memory:
+        run_input = prepare(data)
+        tracemalloc.start()
+        try:
+            runner(run_input, threshold)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return times_ns, peak_bytes
+
+
+def run_suite(analyzers, distributions, sizes, seed=0, warmup=1, repeat=5, threshold_fraction=0.05,
+              trace_memory=True, log=None):
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            data = DISTRIBUTIONS[distribution](n, seed)
+            threshold = max(1, int(threshold_fraction * n))
+            for name in analyzers:
+                runner, prepare = CASES[name]
+                times_ns, peak_bytes = measure(runner, prepare, data, threshold, warmup, repeat, trace_memory)
+                result = {
+                    "analyzer": name,
+                    "approximate": name in APPROXIMATE_CASES,
+                    "distribution": distribution,
+                    "n": n,
+                    "threshold": threshold,
+                    "times_ns": times_ns,
+                    "median_ns": int(statistics.median(times_ns)),
+                    "min_ns": min(times_ns),
+                    "items_per_sec": n / (statistics.median(times_ns) / 1e9) if n else 0.0,
+                    "peak_bytes": peak_bytes,
+                }
+                results.append(result)
+                if log:
+                    log(f"{distribution:>16} {n:>9} {name:>28} {result['median_ns'] / 1e6:12.3f} ms"
+                        f" {peak_bytes if peak_bytes is not None else '-':>12} B")
+    return {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "warmup": warmup,
+            "repeat": repeat,
+            "threshold_fraction": threshold_fraction,
+        },
+        "results": results,
+    }
+
+
+# Modules whose cold import time is measured with --imports
+IMPORT_MODULES = ["Analyzers", "EachAlgo", "Greedy", "DivConq", "DecConq", "EachAlgoWithMPL", "VectorAnalyzer",
+                  "SlidingWindow"]
+
+
+def measure_import(module, repeat=5):
+    # Cold import in a fresh interpreter per run, timed by -X importtime, plus
+    # whether NumPy or matplotlib got pulled in along the way
+    times_us = []
+    loaded = set()
+    for _ in range(repeat):
+        # Run next to this file, so the repo's modules import from any cwd
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.rsplit("|", 2)
+            name = name.strip()
+            if name in ("numpy", "matplotlib"):
+                loaded.add(name)
+            if name == module:
+                times_us.append(int(cumulative))
+    return {
+        "module": module,
+        "times_us": times_us,
+        "median_us": int(statistics.median(times_us)),
+        "imports_numpy": "numpy" in loaded,
+        "imports_matplotlib": "matplotlib" in loaded,
+    }
+
+
+def compare(report, baseline, tolerance):
+    # Flags every case whose median got slower than baseline by more than tolerance
+    def key(result):
+        return result["analyzer"], result["distribution"], result["n"]
+
+    baseline_results = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        previous = baseline_results.get(key(result))
+        if previous is None or not previous["median_ns"]:
+            continue
+        ratio = result["median_ns"] / previous["median_ns"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "analyzer": result["analyzer"],
+                "distribution": result["distribution"],
+                "n": result["n"],
+                "baseline_ns": previous["median_ns"],
+                "current_ns": result["median_ns"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def export_plot(report, path):
+    # Headless: the Agg backend renders straight to a file
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    distributions = sorted({result["distribution"] for result in report["results"]})
+    figure, axes = plt.subplots(1, len(distributions), figsize=(6 * len(distributions), 5), squeeze=False)
+    for axis, distribution in zip(axes[0], distributions):
+        series = {}
+        for result in report["results"]:
+            if result["distribution"] == distribution:
+                series.setdefault(result["analyzer"], []).append((result["n"], result["median_ns"] / 1e9))
+        for name, points in sorted(series.items()):
+            points.sort()
+            axis.plot([n for n, _ in points], [seconds for _, seconds in points], marker='o', label=name)
+        axis.set_xlabel('Input Size (N)')
+        axis.set_ylabel('Median Time (seconds)')
+        axis.set_title(f'Algorithm Performance vs. Input Size ({distribution})')
+        axis.grid(True)
+        axis.legend(fontsize='small')
+    figure.tight_layout()
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def print_quickest(report):
+    # Exact and approximate cases do different amounts of work, so each kind
+    # gets its own ranking
+    fastest = {}
+    for result in report["results"]:
+        approximate = result.get("approximate", result["analyzer"] in APPROXIMATE_CASES)
+        key = (approximate, result["distribution"], result["n"])
+        if key not in fastest or result["median_ns"] < fastest[key]["median_ns"]:
+            fastest[key] = result
+    for (approximate, distribution, n), result in sorted(fastest.items()):
+        label = "Quickest Approximate Algorithm" if approximate else "Quickest Algorithm"
+        print(f"{label} ({distribution}, N={n}): {result['analyzer']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible benchmark of every analyzer in the repo")
+    parser.add_argument("--analyzers", default=",".join(CASES),
+                        help="comma-separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--distributions", default=",".join(DISTRIBUTIONS))
+    parser.add_argument("--sizes", default=None, help="comma-separated input sizes")
+    parser.add_argument("--extended", action="store_true", help="append larger sizes to the default sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold-fraction", type=float, default=0.05)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging")
+    parser.add_argument("--plot", help="write a plot image to this file")
+    parser.add_argument("--imports", action="store_true", help="also measure cold import time of each module")
+    args = parser.parse_args(argv)
+
+    analyzers = [name for name in args.analyzers.split(",") if name]
+    unknown = [name for name in analyzers if name not in CASES]
+    if unknown:
+        parser.error("unknown analyzers: " + ", ".join(unknown))
+    distributions = [name for name in args.distributions.split(",") if name]
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    else:
+        sizes = DEFAULT_SIZES + (EXTENDED_SIZES if args.extended else [])
+
+    report = run_suite(analyzers, distributions, sizes, args.seed, args.warmup, args.repeat,
+                       args.threshold_fraction, not args.no_memory, log=print)
+    print_quickest(report)
+
+    if args.imports:
+        report["imports"] = [measure_import(module, args.repeat) for module in IMPORT_MODULES]
+        for result in report["imports"]:
+            extras = [name for name in ("numpy", "matplotlib") if result[f"imports_{name}"]]
+            print(f"import {result['module']:>16} {result['median_us'] / 1000:8.2f} ms"
+                  + (f"  (loads {', '.join(extras)})" if extras else ""))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.plot:
+        export_plot(report, args.plot)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['analyzer']} {regression['distribution']} N={regression['n']}: "
+                  f"{regression['baseline_ns'] / 1e6:.3f} ms -> {regression['current_ns'] / 1e6:.3f} ms "
+                  f"({regression['ratio']:.2f}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
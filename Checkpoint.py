@@ -0,0 +1,317 @@
+import importlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+# Snapshot file: little-endian header (magic, version, class name length,
+# generation), the analyzer's "module:class" name padded to 8 bytes, then the
+# analyzer's to_bytes() summary (see Summary.py for its byte order).
+SNAPSHOT_MAGIC = b"ACKP"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHHQ")
+
+# Delta log path.log.<generation>: one record per batch, item count and the
+# CRC32 of the payload (little-endian), then the items as native int64. A
+# torn or corrupt record ends the replay of that log.
+_RECORD_HEADER = struct.Struct("<II")
+
+DEFAULT_BATCH_ITEMS = 4096
+
+
+def _class_name(analyzer):
+    cls = type(analyzer)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _load_class(name):
+    module_name, _, attribute = name.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _log_path(path, generation):
+    return f"{path}.log.{generation}"
+
+
+def log_generations(path):
+    # Generations of the delta logs next to the snapshot at path, ascending
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.basename(path) + ".log."
+    generations = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            generations.append(int(name[len(prefix):]))
+    return sorted(generations)
+
+
+def _as_int64_bytes(items):
+    if isinstance(items, array) and items.typecode == "q":
+        return memoryview(items).cast("B")
+    if hasattr(items, "dtype"):
+        return items.astype("int64", copy=False).tobytes()
+    return memoryview(array("q", items)).cast("B")
+
+
+def _map(path):
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def read_snapshot(path):
+    # (generation, analyzer) from the snapshot at path, or None if there is none.
+    # The file is memory-mapped and handed to from_bytes() as is, so only the
+    # pages the restored analyzer actually reads are ever loaded.
+    try:
+        view = _map(path)
+    except FileNotFoundError:
+        return None
+    if view.nbytes < _SNAPSHOT_HEADER.size:
+        raise ValueError(f"{path} is not an analyzer snapshot")
+    magic, version, name_length, generation = _SNAPSHOT_HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not an analyzer snapshot (or unsupported version)")
+    start = _SNAPSHOT_HEADER.size
+    name = bytes(view[start:start + name_length]).decode()
+    offset = start + (name_length + 7) // 8 * 8
+    return generation, _load_class(name).from_bytes(view[offset:])
+
+
+def replay_log(analyzer, log_path):
+    # Feeds every intact record of one delta log to analyzer.process_batch();
+    # returns the number of items replayed
+    view = _map(log_path)
+    position = 0
+    replayed = 0
+    while position + _RECORD_HEADER.size <= view.nbytes:
+        count, checksum = _RECORD_HEADER.unpack_from(view, position)
+        start = position + _RECORD_HEADER.size
+        end = start + 8 * count
+        if end > view.nbytes or zlib.crc32(view[start:end]) != checksum:
+            break
+        items = array("q")
+        items.frombytes(view[start:end])
+        analyzer.process_batch(items)
+        replayed += count
+        position = end
+    return replayed
+
+
+def restore(path, factory=None):
+    # Rebuilds the analyzer checkpointed at path: maps the newest snapshot and
+    # replays the delta logs written since, oldest first. With no snapshot
+    # yet, factory() builds the empty analyzer the logs are replayed into.
+    # Returns (analyzer, generation of the newest snapshot or log).
+    snapshot = read_snapshot(path)
+    if snapshot is not None:
+        generation, analyzer = snapshot
+    elif factory is not None:
+        generation, analyzer = 0, factory()
+    else:
+        raise FileNotFoundError(f"no snapshot at {path} and no factory to start from")
+    for log_generation in log_generations(path):
+        if log_generation >= generation:
+            replay_log(analyzer, _log_path(path, log_generation))
+            generation = log_generation
+    return analyzer, generation
+
+
+class Checkpointer:
+    # Wraps an analyzer so its state survives restarts. Each batch is appended
+    # to the current delta log before the analyzer sees it; checkpoint() starts
+    # a new log and writes a snapshot of the state at that instant, after which
+    # the older logs are deleted. Restoring maps the snapshot and replays only
+    # the logs written since (see restore()).
+    #
+    # Snapshots are written without holding up ingest for long: on POSIX a
+    # forked child serializes and writes a copy-on-write image of the process,
+    # so the pause is just the fork. Where fork is missing or unsafe (other
+    # threads running) the state is serialized in place, which pauses for
+    # to_bytes(), and a thread does the writing.
+    #
+    # Everything else (get_heavy_hitters() and so on) is passed through to the
+    # analyzer. Items given one at a time go to the analyzer and the log in
+    # batches of batch_items; flush() hands over a partial batch.
+    def __init__(self, analyzer, path, every_items=None, every_seconds=None, log=True, sync=False, mode=None,
+                 batch_items=DEFAULT_BATCH_ITEMS, generation=0):
+        if not callable(getattr(analyzer, "to_bytes", None)):
+            raise TypeError(f"{type(analyzer).__name__} has no to_bytes(), so it cannot be checkpointed")
+        if mode not in (None, "fork", "thread"):
+            raise ValueError("mode must be None, fork or thread")
+        self.analyzer = analyzer
+        self.path = path
+        self.every_items = every_items
+        self.every_seconds = every_seconds
+        self.log = log
+        self.sync = sync
+        self.mode = mode
+        self.batch_items = batch_items
+        self.generation = generation
+        self.pending = []
+        self.items_since_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+        self.last_pause = 0.0
+        self._log_file = None
+        self._writer = None  # thread or child pid of the snapshot in progress
+        self._error = None
+        if log:
+            self._log_file = open(_log_path(path, generation), "ab")
+
+    @classmethod
+    def resume(cls, path, factory=None, **options):
+        # Restores the checkpointed analyzer (see restore()) and continues in a
+        # fresh log, leaving the replayed logs until the next snapshot covers them
+        analyzer, generation = restore(path, factory)
+        return cls(analyzer, path, generation=generation + 1, **options)
+
+    def __getattr__(self, name):
+        if name == "analyzer":
+            raise AttributeError(name)
+        return getattr(self.analyzer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def process_batch(self, items):
+        if self.pending:
+            self.flush()
+        self._ingest(items)
+
+    process_sample = process_batch
+
+    def process_item(self, item):
+        self.pending.append(item)
+        if len(self.pending) >= self.batch_items:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self._ingest(pending)
+
+    def _ingest(self, items):
+        if self._log_file is not None:
+            payload = _as_int64_bytes(items)
+            self._log_file.write(_RECORD_HEADER.pack(len(items), zlib.crc32(payload)))
+            self._log_file.write(payload)
+            self._log_file.flush()
+            if self.sync:
+                os.fsync(self._log_file.fileno())
+        self.analyzer.process_batch(items)
+        self.items_since_checkpoint += len(items)
+        if (self.every_items is not None and self.items_since_checkpoint >= self.every_items) or \
+                (self.every_seconds is not None and time.monotonic() - self.last_checkpoint >= self.every_seconds):
+            self.checkpoint(wait=False)
+
+    def checkpoint(self, wait=True):
+        # Snapshots the current state. If the previous snapshot is still being
+        # written, waits for it, or with wait=False skips this one and returns False.
+        if self.busy():
+            if not wait:
+                return False
+            self.wait()
+        started = time.perf_counter()
+        self.flush()
+        self.generation += 1
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = open(_log_path(self.path, self.generation), "ab")
+        self.items_since_checkpoint = 0
+        self.last_checkpoint = time.monotonic()
+
+        mode = self.mode
+        if mode is None:
+            mode = "fork" if hasattr(os, "fork") and threading.active_count() == 1 else "thread"
+        if mode == "fork":
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    self._write_snapshot(self.analyzer.to_bytes(), self.generation)
+                    status = 0
+                finally:
+                    os._exit(status)
+            self._writer = pid
+        else:
+            summary = self.analyzer.to_bytes()
+            self._writer = threading.Thread(target=self._write_in_thread, args=(summary, self.generation),
+                                            name="checkpoint-writer")
+            self._writer.start()
+        self.last_pause = time.perf_counter() - started
+        if wait:
+            self.wait()
+        return True
+
+    def _write_in_thread(self, summary, generation):
+        try:
+            self._write_snapshot(summary, generation)
+        except BaseException as error:
+            self._error = error
+
+    def _write_snapshot(self, summary, generation):
+        name = _class_name(self.analyzer).encode()
+        padding = b"\0" * ((-len(name)) % 8)
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(name), generation))
+            handle.write(name + padding)
+            handle.write(summary)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        # The snapshot now covers everything logged before this generation
+        for old in log_generations(self.path):
+            if old < generation:
+                os.unlink(_log_path(self.path, old))
+
+    def busy(self):
+        # True while a snapshot is still being written
+        writer = self._writer
+        if writer is None:
+            return False
+        if isinstance(writer, threading.Thread):
+            return writer.is_alive()
+        pid, status = os.waitpid(writer, os.WNOHANG)
+        if pid == 0:
+            return True
+        self._finish_child(status)
+        return False
+
+    def wait(self):
+        # Blocks until the snapshot in progress is on disk; raises if writing it failed
+        writer = self._writer
+        if isinstance(writer, threading.Thread):
+            writer.join()
+            self._writer = None
+            error, self._error = self._error, None
+            if error is not None:
+                raise RuntimeError("writing the snapshot failed") from error
+        elif writer is not None:
+            _, status = os.waitpid(writer, 0)
+            self._finish_child(status)
+
+    def _finish_child(self, status):
+        self._writer = None
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError("the snapshot writer process failed")
+
+    def close(self):
+        self.flush()
+        self.wait()
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
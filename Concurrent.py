@@ -0,0 +1,173 @@
+import threading
+import weakref
+
+from EachAlgo import DivideAndConquerAnalyzer
+
+DEFAULT_BUFFER_ITEMS = 4096
+
+
+class _Shard:
+    __slots__ = ("analyzer", "lock", "buffer", "version", "thread")
+
+    def __init__(self, analyzer, thread=None):
+        self.analyzer = analyzer
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.version = 0
+        # The owning thread, weakly, so shards of finished threads can be found
+        self.thread = weakref.ref(thread) if thread is not None else None
+
+    def owner_alive(self):
+        thread = self.thread() if self.thread is not None else None
+        return thread is not None and thread.is_alive()
+
+
+class ConcurrentAnalyzer:
+    # Multi-producer front end for the streaming analyzers. Every producing
+    # thread gets its own shard (an analyzer plus a lock) and a thread-local
+    # buffer; process_item() only appends to that buffer, and each full buffer
+    # goes into the shard as one process_batch() call. A shard's lock is only
+    # ever wanted by its own thread and by snapshot(), so producers never
+    # contend with each other: on the GIL build the lock is taken once per
+    # buffer_items items, and on free-threaded builds shards run in parallel.
+    #
+    # Queries are answered from snapshot(), which holds every shard lock at
+    # once and merges the shards into a fresh analyzer: a consistent cut of
+    # everything flushed so far. The merged analyzer is reused (with its query
+    # cache) until some shard changes. Items still in a thread's buffer are
+    # not included while their thread runs: a producer calls flush() when it
+    # pauses, or before handing off to a query it wants to see its items.
+    # When a producer thread has finished, the next snapshot() flushes its
+    # buffer itself and folds its shard into a single retired shard, so
+    # nothing is lost and thread churn does not grow the shard list.
+    def __init__(self, heavy_hitter_threshold, analyzer_class=DivideAndConquerAnalyzer,
+                 buffer_items=DEFAULT_BUFFER_ITEMS, **options):
+        self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.analyzer_class = analyzer_class
+        self.buffer_items = buffer_items
+        self.options = options
+        self.shards = []
+        self._registry_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._local = threading.local()
+        self._retired = None  # shard holding everything from finished threads
+        self._snapshot = None
+        self._snapshot_versions = None
+
+    def _new_analyzer(self):
+        return self.analyzer_class(self.heavy_hitter_threshold, **self.options)
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(self._new_analyzer(), threading.current_thread())
+            with self._registry_lock:
+                self.shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def process_item(self, item):
+        shard = self._shard()
+        buffer = shard.buffer
+        buffer.append(item)
+        if len(buffer) >= self.buffer_items:
+            self._flush(shard)
+
+    def process_batch(self, data_batch):
+        shard = self._shard()
+        with shard.lock:
+            if shard.buffer:
+                # Keep this thread's items in arrival order
+                buffered, shard.buffer = shard.buffer, []
+                shard.analyzer.process_batch(buffered)
+            shard.analyzer.process_batch(data_batch)
+            shard.version += 1
+
+    process_sample = process_batch
+
+    def flush(self):
+        # Hands the calling thread's buffered items to its shard; only the
+        # owning thread may touch its buffer, so each producer flushes its own
+        shard = getattr(self._local, "shard", None)
+        if shard is not None and shard.buffer:
+            self._flush(shard)
+
+    @staticmethod
+    def _flush(shard):
+        with shard.lock:
+            buffered, shard.buffer = shard.buffer, []
+            shard.analyzer.process_batch(buffered)
+            shard.version += 1
+
+    def _retire_finished(self, shards, locked):
+        # Folds the shards of threads that have exited (buffers included)
+        # into the retired shard. Called from snapshot() with every shard in
+        # shards locked (a new retired shard is locked and added to locked);
+        # returns the shards that are left.
+        finished = [shard for shard in shards if shard is not self._retired and not shard.owner_alive()]
+        if not finished:
+            return shards
+        retired = self._retired
+        if retired is None:
+            retired = self._retired = _Shard(self._new_analyzer())
+            retired.lock.acquire()
+            locked.append(retired)
+            shards = shards + [retired]
+            with self._registry_lock:
+                self.shards.append(retired)
+        for shard in finished:
+            if shard.buffer:
+                buffered, shard.buffer = shard.buffer, []
+                shard.analyzer.process_batch(buffered)
+            retired.analyzer.merge(shard.analyzer)
+            retired.version += 1
+        with self._registry_lock:
+            self.shards = [shard for shard in self.shards if shard not in finished]
+        return [shard for shard in shards if shard not in finished]
+
+    def snapshot(self):
+        # One analyzer holding everything flushed so far, merged while all
+        # shards are locked; callers must treat it as read-only. Snapshots
+        # run one at a time: they are the only callers that hold more than
+        # one shard lock, so locks can never be taken in conflicting orders.
+        with self._snapshot_lock:
+            with self._registry_lock:
+                shards = list(self.shards)
+            locked = []
+            try:
+                for shard in shards:
+                    shard.lock.acquire()
+                    locked.append(shard)
+                shards = self._retire_finished(shards, locked)
+                versions = [(id(shard), shard.version) for shard in shards]
+                if versions != self._snapshot_versions:
+                    merged = self._new_analyzer()
+                    for shard in shards:
+                        merged.merge(shard.analyzer)
+                    self._snapshot = merged
+                    self._snapshot_versions = versions
+                return self._snapshot
+            finally:
+                for shard in locked:
+                    shard.lock.release()
+
+    def get_frequency_counts(self):
+        return self.snapshot().get_frequency_counts()
+
+    def get_frequency_estimate(self, item):
+        return self.snapshot().get_frequency_estimate(item)
+
+    def get_heavy_hitters(self):
+        return self.snapshot().get_heavy_hitters()
+
+    def get_top_k(self, k):
+        return self.snapshot().get_top_k(k)
+
+    def get_quantile_estimate(self, q=0.5):
+        return self.snapshot().get_quantile_estimate(q)
+
+    def get_quantiles(self, qs=(0.5, 0.99, 0.999)):
+        return self.snapshot().get_quantiles(qs)
+
+    def get_distinct_count(self):
+        return self.snapshot().get_distinct_count()
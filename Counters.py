@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import operator
+from array import array
+from collections import Counter
+
+# Dense mode is kept while the key span stays within DENSITY times the number
+# of distinct keys (or MIN_DENSE_SPAN, whichever is larger)
+DENSITY = 8
+MIN_DENSE_SPAN = 1 << 16
+
+
+def _int_key(key):
+    # Integral scalars (NumPy integers and the like) become the equal int, so
+    # they stay in dense mode and share a slot with it; other keys pass through
+    try:
+        return operator.index(key)
+    except TypeError:
+        return key
+
+
+class AdaptiveCounter:
+    # Counter store for integer keys. While keys fall in a compact range the
+    # counts live in one array('q') indexed by key - low (8 bytes per slot);
+    # once the range gets too sparse, or a non-integer key shows up, it switches
+    # to a dict for good.
+    def __init__(self, density=DENSITY, min_dense_span=MIN_DENSE_SPAN):
+        self.density = density
+        self.min_dense_span = min_dense_span
+        self.dense = array("q")
+        self.low = 0
+        self.distinct = 0
+        self.table = None  # dict once in hash mode
+        # Hash mode after from_sorted(): restored keys (ascending) and counts
+        # left as they are, read by bisection and moved into the table on a
+        # key's first update; a moved or absent key has count 0 here
+        self.base_keys = None
+        self.base_counts = None
+        self.base_left = 0
+
+    @classmethod
+    def from_items(cls, keys, counts, density=DENSITY, min_dense_span=MIN_DENSE_SPAN):
+        # Bulk load from parallel key and (non-zero) count lists, e.g. a restored
+        # snapshot: the layout is chosen once instead of growing key by key
+        counter = cls(density, min_dense_span)
+        if not keys:
+            return counter
+        if set(map(type, keys)) != {int}:
+            keys = [_int_key(key) for key in keys]
+        if set(map(type, keys)) == {int}:
+            low = min(keys)
+            span = max(keys) - low + 1
+            if span <= max(min_dense_span, density * (len(keys) + 1)):
+                dense = array("q", [0]) * span
+                for key, count in zip(keys, counts):
+                    dense[key - low] = count
+                counter.dense = dense
+                counter.low = low
+                counter.distinct = len(keys)
+                return counter
+        counter.table = dict(zip(keys, counts))
+        return counter
+
+    @classmethod
+    def from_sorted(cls, keys, counts, density=DENSITY, min_dense_span=MIN_DENSE_SPAN):
+        # Restore from int64 keys in ascending order and their counts (typically
+        # memoryviews into a mapped snapshot). A compact range becomes the dense
+        # array; otherwise nothing is rebuilt up front: the keys stay where they
+        # are, only the counts are copied, and lookups bisect them
+        n = len(keys)
+        if not n or keys[n - 1] - keys[0] < max(min_dense_span, density * (n + 1)):
+            return cls.from_items(keys.tolist(), counts.tolist(), density, min_dense_span)
+        counter = cls(density, min_dense_span)
+        counter.table = {}
+        counter.base_keys = keys
+        counter.base_counts = array("q")
+        counter.base_counts.frombytes(memoryview(counts).cast("B"))
+        counter.base_left = n
+        return counter
+
+    @property
+    def is_dense(self):
+        return self.table is None
+
+    def add(self, key, count=1):
+        # Returns the key's new count
+        if type(key) is not int:
+            key = _int_key(key)
+        if self.table is None:
+            offset = key - self.low if type(key) is int else -1
+            if 0 <= offset < len(self.dense) or self._grow(key):
+                offset = key - self.low
+                dense = self.dense
+                previous = dense[offset]
+                if not previous:
+                    self.distinct += 1
+                dense[offset] = previous + count
+                return previous + count
+        table = self.table
+        previous = table.get(key)
+        if previous is None:
+            previous = self._take_base(key) if self.base_left else 0
+        updated = previous + count
+        table[key] = updated
+        return updated
+
+    def _base_index(self, key):
+        if type(key) is not int:
+            return -1
+        keys = self.base_keys
+        index = bisect.bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key and self.base_counts[index]:
+            return index
+        return -1
+
+    def _take_base(self, key):
+        index = self._base_index(key)
+        if index < 0:
+            return 0
+        count = self.base_counts[index]
+        self.base_counts[index] = 0
+        self.base_left -= 1
+        return count
+
+    def add_batch(self, keys):
+        # Counter() tallies the batch in C; the store then sees each distinct key once
+        for key, count in Counter(keys).items():
+            self.add(key, count)
+
+    def _grow(self, key):
+        if type(key) is not int:
+            self._to_hash()
+            return False
+        if not self.dense:
+            self.low = key
+            self.dense = array("q", [0]) * min(self.min_dense_span, 64)
+            return True
+
+        low = self.low
+        high = low + len(self.dense)
+        limit = max(self.min_dense_span, self.density * (self.distinct + 1))
+        if max(high, key + 1) - min(low, key) > limit:
+            self._to_hash()
+            return False
+
+        # Grow geometrically towards the new key, without exceeding the limit
+        if key >= high:
+            new_high = max(key + 1, min(high + len(self.dense), low + limit))
+            self.dense.extend(array("q", [0]) * (new_high - high))
+        else:
+            new_low = min(key, max(low - len(self.dense), high - limit))
+            self.dense[0:0] = array("q", [0]) * (low - new_low)
+            self.low = new_low
+        return True
+
+    def _to_hash(self):
+        self.table = dict(self.items())
+        self.dense = array("q")
+
+    def get(self, key, default=0):
+        if type(key) is not int:
+            key = _int_key(key)
+        if self.table is not None:
+            count = self.table.get(key)
+            if count is None and self.base_left:
+                index = self._base_index(key)
+                count = self.base_counts[index] if index >= 0 else None
+            return default if count is None else count
+        if type(key) is int and 0 <= key - self.low < len(self.dense):
+            return self.dense[key - self.low] or default
+        return default
+
+    def __getitem__(self, key):
+        return self.get(key, 0)
+
+    def __contains__(self, key):
+        return self.get(key, 0) != 0
+
+    def __len__(self):
+        return len(self.table) + self.base_left if self.table is not None else self.distinct
+
+    def _base_items(self):
+        return [(key, count) for key, count in zip(self.base_keys, self.base_counts) if count]
+
+    def items(self):
+        if self.table is not None:
+            if self.base_left:
+                return list(self.table.items()) + self._base_items()
+            return self.table.items()
+        low = self.low
+        return [(low + offset, count) for offset, count in enumerate(self.dense) if count]
+
+    def keys(self):
+        if self.table is not None and not self.base_left:
+            return list(self.table)
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        if self.table is not None and not self.base_left:
+            return list(self.table.values())
+        if self.table is not None:
+            return [count for _, count in self.items()]
+        return [count for count in self.dense if count]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def update(self, counts):
+        for key, count in counts.items():
+            self.add(key, count)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def sorted_sections(self):
+        # [keys, counts] as int64 arrays in ascending key order, the layout
+        # from_sorted() restores without rebuilding anything
+        if self.table is None:
+            return [array("q", self.keys()), array("q", self.values())]
+        table = self.table
+        keys = sorted(table)
+        counts = [table[key] for key in keys]
+        if self.base_left:
+            # Keys in the table have left the base, so the two never overlap
+            merged = list(heapq.merge(zip(keys, counts), self._base_items()))
+            keys = [key for key, _ in merged]
+            counts = [count for _, count in merged]
+        return [array("q", keys), array("q", counts)]
+
+    def memory_bytes(self):
+        if self.table is not None:
+            base = 0
+            if self.base_keys is not None:
+                base = memoryview(self.base_keys).nbytes + memoryview(self.base_counts).nbytes
+            return self.table.__sizeof__() + base
+        return self.dense.buffer_info()[1] * self.dense.itemsize
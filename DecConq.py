@@ -1,26 +1,42 @@
 import time
-import numpy as np
+
+from ParallelConq import parallel_map_reduce
+from Profiling import phase
+from Sampling import draw_sample
+from Selection import label_percentiles, percentiles, quantiles_from_sorted
 
 class DecreaseAndConquerAnalyzer:
-    def __init__(self, data, threshold):
+    def __init__(self, data, threshold, percentiles=(25, 50, 75), method="linear", profiler=None):
         self.data = data
         self.threshold = threshold
+        self.percentiles = percentiles
+        self.method = method
         self.frequency_counts = None
         self.quantile_estimates = None
         self.heavy_hitters = None
+        self.profiler = profiler
+        # Set by process_data_sampled: the sample and (low, high) confidence bounds
+        self.sample_estimate = None
+        self.frequency_intervals = None
+        self.quantile_intervals = None
 
     def process_data(self):
         # Start timing
         start_time = time.time()
 
+        n = len(self.data)
+
         # Step 1: Frequency Counts
-        self.frequency_counts = self.calculate_frequency_counts(self.data)
+        with phase(self.profiler, "count", n):
+            self.frequency_counts = self.calculate_frequency_counts(self.data)
 
         # Step 2: Quantile Estimation
-        self.quantile_estimates = self.calculate_quantile_estimates(self.data)
+        with phase(self.profiler, "select", n):
+            self.quantile_estimates = self.calculate_quantile_estimates(self.data)
 
         # Step 3: Heavy Hitters
-        self.heavy_hitters = self.find_heavy_hitters(self.data)
+        with phase(self.profiler, "heavy_hitters", len(self.frequency_counts)):
+            self.heavy_hitters = self.find_heavy_hitters(self.data)
 
         # End timing
         end_time = time.time()
@@ -28,6 +44,56 @@ class DecreaseAndConquerAnalyzer:
 
         return execution_time
 
+    def process_data_parallel(self, workers=None, shards=None):
+        start_time = time.time()
+
+        n = len(self.data)
+
+        # Map: per-shard counts and sorted runs; Reduce: tree merge of both
+        with phase(self.profiler, "merge", n):
+            sorted_data, self.frequency_counts, _ = parallel_map_reduce(self.data, workers, shards)
+
+        # The merged output is already sorted, so every rank is a direct index
+        with phase(self.profiler, "select", n):
+            values = quantiles_from_sorted(sorted_data, [p / 100 for p in self.percentiles], self.method)
+            self.quantile_estimates = label_percentiles(self.percentiles, values)
+        with phase(self.profiler, "heavy_hitters", len(self.frequency_counts)):
+            self.heavy_hitters = [item for item, count in self.frequency_counts.items() if count >= self.threshold]
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+
+        return execution_time
+
+    def process_data_sampled(self, rate=None, sample_size=None, target_error=None, mode="bernoulli",
+                             confidence=0.95, seed=None):
+        # Approximate mode: analyzes a Bernoulli or reservoir sample and scales
+        # it up. Counts and heavy hitters become estimates with confidence
+        # bounds in frequency_intervals; quantile bounds are in quantile_intervals.
+        start_time = time.time()
+
+        with phase(self.profiler, "sample", len(self.data)):
+            estimate = draw_sample(self.data, rate, sample_size, target_error, mode, confidence, seed)
+        self.sample_estimate = estimate
+
+        with phase(self.profiler, "count", estimate.size):
+            counts = estimate.frequency_counts()
+            self.frequency_counts = {item: round(count) for item, (count, _, _) in counts.items()}
+            self.frequency_intervals = {item: (low, high) for item, (_, low, high) in counts.items()}
+
+        with phase(self.profiler, "select", estimate.size):
+            results = estimate.quantiles([p / 100 for p in self.percentiles], self.method)
+            self.quantile_estimates = label_percentiles(self.percentiles, [value for value, _, _ in results])
+            self.quantile_intervals = label_percentiles(self.percentiles, [(low, high) for _, low, high in results])
+
+        with phase(self.profiler, "heavy_hitters", len(counts)):
+            self.heavy_hitters = [item for item, _, _, _ in estimate.heavy_hitters(self.threshold)]
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+
+        return execution_time
+
     def calculate_frequency_counts(self, data):
         if len(data) == 0:
             return {}
@@ -47,15 +113,20 @@ class DecreaseAndConquerAnalyzer:
         return merged_counts
 
     def calculate_quantile_estimates(self, data):
-        sorted_data = sorted(data)
-        num_values = len(sorted_data)
-        q1 = np.percentile(sorted_data, 25)
-        q2 = np.percentile(sorted_data, 50)
-        q3 = np.percentile(sorted_data, 75)
-        return {"Q1": q1, "Q2": q2, "Q3": q3}
+        if len(data) == 0:
+            return {}
+        return self.quantiles(self.percentiles, data=data)
+
+    def quantiles(self, ps, method=None, data=None):
+        # Exact percentiles from one multi-rank selection pass instead of a full sort
+        data = self.data if data is None else data
+        return label_percentiles(ps, percentiles(data, ps, method or self.method))
 
     def find_heavy_hitters(self, data):
-        counts = self.calculate_frequency_counts(data)
+        # Reuse the counts from step 1 instead of recounting the whole dataset
+        counts = self.frequency_counts
+        if counts is None:
+            counts = self.calculate_frequency_counts(data)
         return [item for item, count in counts.items() if count >= self.threshold]
 
     def print_results(self, execution_time):
@@ -67,12 +138,20 @@ class DecreaseAndConquerAnalyzer:
         for quantile, estimate in self.quantile_estimates.items():
             print(f"{quantile}: {estimate}")
 
+        if self.quantile_intervals:
+            print(f"\nConfidence Intervals ({self.sample_estimate.confidence:.0%}, "
+                  f"sampled {self.sample_estimate.size} of {self.sample_estimate.population}):")
+            for quantile, (low, high) in self.quantile_intervals.items():
+                print(f"{quantile}: [{low}, {high}]")
+
         print("\nHeavy Hitters:")
         print(self.heavy_hitters)
 
         print(f"\nExecution Time: {execution_time:.6f} seconds")
 
 if __name__ == "__main__":
+    import numpy as np
+
     n = 1000
     threshold = 5
     random_numbers = np.random.randint(1, 21, n)
@@ -80,3 +159,8 @@ if __name__ == "__main__":
     analyzer = DecreaseAndConquerAnalyzer(random_numbers, threshold)
     execution_time = analyzer.process_data()
     analyzer.print_results(execution_time)
+
+    # The same data from a 10% sample, with 95% confidence bounds
+    sampled = DecreaseAndConquerAnalyzer(random_numbers, threshold)
+    execution_time = sampled.process_data_sampled(rate=0.1)
+    sampled.print_results(execution_time)
@@ -0,0 +1,184 @@
+import bisect
+import heapq
+import time
+from collections import Counter
+from itertools import accumulate, repeat
+
+from HeavyHitters import IndexedMinHeap
+
+# Stored weights are rescaled once they have grown by 2^RENORMALIZE_HALF_LIVES,
+# far below the float limit and rare enough to cost nothing amortized
+RENORMALIZE_HALF_LIVES = 64
+
+
+class DecayedAnalyzer:
+    # Exponentially time-decayed counts for "currently hot" keys: an item of
+    # weight w seen at time t counts w * 2^-((now - t) / half_life) at time now.
+    # Decay is lazy (forward decay, Cormode et al.): an update is stored as
+    # w * 2^((t - landmark) / half_life), so every stored value shares the one
+    # factor 2^-((now - landmark) / half_life) and reads apply it on the fly.
+    # Nothing walks the keys as time passes; only when stored values have grown
+    # by 2^renormalize_half_lives does one pass move the landmark to the present,
+    # rescale everything and drop keys that have decayed below min_count.
+    #
+    # Timestamps may arrive out of order. clock gives "now" for queries and
+    # for items without a timestamp; with clock=None every item needs one and
+    # the newest timestamp seen is "now" (event time, e.g. for replays).
+    # Heavy hitters are keys whose decayed count reaches heavy_hitter_threshold,
+    # or heavy_hitter_fraction of the decayed total when that is set.
+    def __init__(self, heavy_hitter_threshold, half_life=60.0, heavy_hitter_fraction=None, min_count=1e-6,
+                 renormalize_half_lives=RENORMALIZE_HALF_LIVES, clock=time.monotonic):
+        if half_life <= 0:
+            raise ValueError("half_life must be positive")
+        self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.heavy_hitter_fraction = heavy_hitter_fraction
+        self.half_life = half_life
+        self.min_count = min_count
+        self.renormalize_half_lives = renormalize_half_lives
+        self.clock = clock
+        self.landmark = None
+        self.latest = None
+        self.counts = {}  # key -> weight in landmark units
+        self.total = 0.0
+        # Keys that crossed the threshold, by stored weight. Stored weights
+        # only grow and the threshold in stored units only rises, so keys that
+        # cooled off are found at the top of the heap.
+        self.hitters = IndexedMinHeap()
+        self.renormalizations = 0
+
+    def _timestamp(self, timestamp):
+        if timestamp is None:
+            if self.clock is None:
+                raise ValueError("a timestamp is required when clock is None")
+            timestamp = self.clock()
+        if self.landmark is None:
+            self.landmark = timestamp
+        if self.latest is None or timestamp > self.latest:
+            self.latest = timestamp
+        return timestamp
+
+    def _growth(self, timestamp):
+        exponent = (timestamp - self.landmark) / self.half_life
+        if exponent > self.renormalize_half_lives:
+            self._renormalize(self.latest)
+            exponent = (timestamp - self.landmark) / self.half_life
+        return 2.0 ** exponent
+
+    def _renormalize(self, landmark):
+        # Moves the landmark forward to landmark: one pass over the keys,
+        # once every renormalize_half_lives half-lives
+        shift = 2.0 ** -((landmark - self.landmark) / self.half_life)
+        min_count = self.min_count
+        self.counts = {key: weight * shift for key, weight in self.counts.items() if weight * shift >= min_count}
+        self.total *= shift
+        kept = sorted(((self.counts[key], key) for key in self.hitters.keys if key in self.counts))
+        self.hitters = IndexedMinHeap.from_heap([key for _, key in kept], [weight for weight, _ in kept])
+        self.landmark = landmark
+        self.renormalizations += 1
+
+    def _stored_threshold(self, now):
+        # The heavy-hitter threshold in stored units at time now
+        if self.heavy_hitter_fraction is not None:
+            return self.heavy_hitter_fraction * self.total
+        return self.heavy_hitter_threshold * 2.0 ** ((now - self.landmark) / self.half_life)
+
+    def _add(self, item, stored, threshold):
+        weight = self.counts.get(item, 0.0) + stored
+        self.counts[item] = weight
+        self.total += stored
+        if item in self.hitters:
+            self.hitters.increase(item, weight)
+        elif weight >= threshold:
+            self.hitters.push(item, weight)
+
+    def process_item(self, item, timestamp=None, weight=1.0):
+        timestamp = self._timestamp(timestamp)
+        stored = weight * self._growth(timestamp)
+        self._add(item, stored, self._stored_threshold(self.latest))
+
+    def process_batch(self, data_batch, timestamp=None, weights=None, timestamps=None):
+        # One timestamp for the whole batch (default: now), or timestamps per
+        # item; weights are per item and default to 1
+        if timestamps is not None:
+            for item, item_time, weight in zip(data_batch, timestamps, repeat(1.0) if weights is None else weights):
+                self.process_item(item, item_time, weight)
+            return
+        growth = self._growth(self._timestamp(timestamp))
+        threshold = self._stored_threshold(self.latest)
+        if weights is None:
+            # Repeats in the batch share one timestamp, so tally them first
+            for item, count in Counter(data_batch).items():
+                self._add(item, count * growth, threshold)
+        else:
+            for item, weight in zip(data_batch, weights):
+                self._add(item, weight * growth, threshold)
+
+    process_sample = process_batch
+
+    def _now(self):
+        # Query time. After a long idle spell the landmark is moved up to it
+        # first, so the threshold in stored units cannot overflow.
+        if self.clock is None:
+            now = self.latest
+        else:
+            now = self.clock()
+            if self.latest is not None and now < self.latest:
+                now = self.latest
+        if self.landmark is not None and (now - self.landmark) / self.half_life > self.renormalize_half_lives:
+            self._renormalize(now)
+        return now
+
+    def _decay(self, now):
+        # Factor from stored units to decayed counts at time now
+        if self.landmark is None:
+            return 1.0
+        return 2.0 ** -((now - self.landmark) / self.half_life)
+
+    def get_total_weight(self):
+        return self.total * self._decay(self._now())
+
+    def get_frequency_counts(self):
+        factor = self._decay(self._now())
+        return {key: weight * factor for key, weight in self.counts.items()}
+
+    def get_frequency_estimate(self, item):
+        return self.counts.get(item, 0.0) * self._decay(self._now()), 0
+
+    def get_heavy_hitters(self):
+        now = self._now()
+        hitters = self.hitters
+        if self.landmark is not None:
+            threshold = self._stored_threshold(now)
+            while hitters and hitters.min()[1] < threshold:
+                hitters.pop()
+        factor = self._decay(now)
+        entries = [(key, weight * factor, 0) for key, weight in hitters.items()]
+        entries.sort(key=lambda entry: entry[1], reverse=True)
+        return entries
+
+    def get_top_k(self, k):
+        factor = self._decay(self._now())
+        largest = heapq.nlargest(k, self.counts.items(), key=lambda entry: entry[1])
+        return [(key, weight * factor, 0) for key, weight in largest]
+
+    def get_quantile_estimate(self, q=0.5):
+        return self.get_quantiles((q,))[q]
+
+    def get_quantiles(self, qs=(0.5, 0.99, 0.999)):
+        # Quantiles of the decay-weighted distribution (first key whose
+        # cumulative weight reaches q of the total); the decay factor is
+        # common to every key, so stored weights give the same answer
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError("Quantiles must be in the range [0, 1]")
+        if not self.counts:
+            return {q: None for q in qs}
+        keys = sorted(self.counts)
+        cumulative = list(accumulate(self.counts[key] for key in keys))
+        total = cumulative[-1]
+        last = len(keys) - 1
+        return {q: keys[min(last, bisect.bisect_left(cumulative, q * total))] for q in qs}
+
+    def get_distinct_count(self):
+        # Keys still carrying weight (those below min_count go at renormalization)
+        return len(self.counts)
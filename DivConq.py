@@ -1,74 +1,210 @@
 import random
 import time
+from collections import Counter
+
+from ExternalSort import DEFAULT_MEMORY_BYTES, ExternalSorter, format_stats
+from HeavyHitters import HeavyHitterTracker
+from ParallelConq import parallel_map_reduce
+from Profiling import phase
+from Selection import label_percentiles, quantile_positions, quantiles_from_counts, quantiles_from_sorted, quantiles_with
+from Sorting import bottom_up_merge_sort, bounded_counts, expand_counts, kway_merge
 
 
 class DivideAndConquerAnalyzer:
-    def __init__(self, numbers, threshold):
+    def __init__(self, numbers, threshold, percentiles=(25, 50, 75), method="linear", profiler=None):
         self.numbers = numbers
         self.threshold = threshold
+        self.percentiles = percentiles
+        self.method = method
         self.frequency_counts = {}
         self.quantile_estimates = {}
         self.heavy_hitters = []
+        self.sorted_runs = []
+        self.tracker = HeavyHitterTracker(threshold)
+        self.profiler = profiler
+        self.distinct_count = None
+        self.external_stats = None
 
     def divide_and_conquer(self, numbers):
-        if len(numbers) <= 1:
-            return numbers
-
-        mid = len(numbers) // 2
-        left_half = self.divide_and_conquer(numbers[:mid])
-        right_half = self.divide_and_conquer(numbers[mid:])
-
-        return self.combine(left_half, right_half)
-
-    def combine(self, left, right):
-        combined = []
-        left_index, right_index = 0, 0
+        # Bottom-up merge sort over a single scratch buffer (no slicing per level)
+        return bottom_up_merge_sort(numbers)
 
-        while left_index < len(left) and right_index < len(right):
-            if left[left_index] < right[right_index]:
-                combined.append(left[left_index])
-                left_index += 1
-            else:
-                combined.append(right[right_index])
-                right_index += 1
+    def process_batch(self, data_batch):
+        # Each batch becomes a presorted run; counts are updated as batches arrive
+        with phase(self.profiler, "count", len(data_batch)):
+            counts = bounded_counts(data_batch)
+            if counts is not None:
+                self.absorb_counts(counts)
+                run = expand_counts(counts)
+        if counts is None:
+            with phase(self.profiler, "sort", len(data_batch)):
+                run = self.divide_and_conquer(data_batch)
+            with phase(self.profiler, "count", len(run)):
+                self.calculate_frequency_counts(run)
+        self.sorted_runs.append(run)
 
-        combined.extend(left[left_index:])
-        combined.extend(right[right_index:])
-        return combined
+    def finish_batches(self):
+        # k-way merge of the presorted runs, then quantiles and heavy hitters
+        with phase(self.profiler, "merge", sum(len(run) for run in self.sorted_runs)):
+            sorted_numbers = kway_merge(self.sorted_runs) if self.sorted_runs else []
+        self.sorted_runs = [sorted_numbers]
+        if sorted_numbers:
+            with phase(self.profiler, "select", len(sorted_numbers)):
+                self.calculate_quantile_estimates(sorted_numbers)
+        with phase(self.profiler, "heavy_hitters"):
+            self.detect_heavy_hitters()
+        return sorted_numbers
 
     def calculate_frequency_counts(self, numbers):
         for num in numbers:
-            self.frequency_counts[num] = self.frequency_counts.get(num, 0) + 1
+            count = self.frequency_counts.get(num, 0) + 1
+            self.frequency_counts[num] = count
+            self.tracker.observe(num, count)
+
+    def absorb_counts(self, counts):
+        # Counting-sort output: one step per distinct value, in ascending order
+        # like calculate_frequency_counts on the sorted numbers
+        for num, increment in counts.items():
+            count = self.frequency_counts.get(num, 0) + increment
+            self.frequency_counts[num] = count
+            self.tracker.observe(num, count, increment)
 
     def calculate_quantile_estimates(self, numbers):
-        n = len(numbers)
-        quantiles = [numbers[i * n // 4] for i in range(1, 4)]
-        self.quantile_estimates = {
-            "Q1": quantiles[0],
-            "Q2": quantiles[1],
-            "Q3": quantiles[2]
-        }
+        # numbers is sorted by now, so every rank is a direct index
+        if not numbers:
+            self.quantile_estimates = {}
+            return
+        values = quantiles_from_sorted(numbers, [p / 100 for p in self.percentiles], self.method)
+        self.quantile_estimates = label_percentiles(self.percentiles, values)
+
+    def quantiles(self, ps, method=None):
+        # Any percentiles of everything counted so far, read off the count table
+        values = quantiles_from_counts(self.frequency_counts, [p / 100 for p in ps], method or self.method)
+        return label_percentiles(ps, values)
 
     def detect_heavy_hitters(self):
-        for num, count in self.frequency_counts.items():
-            if count >= self.threshold:
-                self.heavy_hitters.append(num)
+        # Maintained while counting, so there is no rescan of the counts here
+        self.heavy_hitters = self.tracker.heavy_hitters()
+
+    def process(self):
+        n = len(self.numbers)
+        with phase(self.profiler, "count", n):
+            counts = bounded_counts(self.numbers)
+            if counts is not None:
+                # Bounded integer domain: the counting sort's table is the frequency
+                # table, and quantiles and heavy hitters come from it in O(n + k)
+                self.absorb_counts(counts)
+        if counts is not None:
+            with phase(self.profiler, "select", n):
+                values = quantiles_from_counts(counts, [p / 100 for p in self.percentiles], self.method)
+                self.quantile_estimates = label_percentiles(self.percentiles, values)
+        else:
+            with phase(self.profiler, "sort", n):
+                sorted_numbers = self.divide_and_conquer(self.numbers)
+            with phase(self.profiler, "count", n):
+                self.calculate_frequency_counts(sorted_numbers)
+            with phase(self.profiler, "select", n):
+                self.calculate_quantile_estimates(sorted_numbers)
+        with phase(self.profiler, "heavy_hitters"):
+            self.detect_heavy_hitters()
 
     def analyze(self):
         start_time = time.time()
-        sorted_numbers = self.divide_and_conquer(self.numbers)
-        self.calculate_frequency_counts(sorted_numbers)
-        self.calculate_quantile_estimates(sorted_numbers)
-        self.detect_heavy_hitters()
+        self.process()
+        end_time = time.time()
+        self.print_results(end_time - start_time)
+
+    def process_external(self, chunks, memory_bytes=DEFAULT_MEMORY_BYTES, temp_dir=None, keep_counts=True,
+                         typecode="q"):
+        # Out-of-core mode for inputs larger than memory: chunks (any iterable
+        # of batches, e.g. Ingest.read_binary_chunks) are sorted into runs on
+        # disk and merged back in order. Counts, quantiles and heavy hitters
+        # are taken during that final merge: equal values arrive together, so
+        # each key is counted once, and the quantile ranks are known up front
+        # from the item count. With keep_counts=False the frequency table is
+        # not kept either, and memory stays within memory_bytes throughout.
+        with ExternalSorter(memory_bytes, temp_dir, typecode) as sorter:
+            with phase(self.profiler, "sort"):
+                for chunk in chunks:
+                    sorter.add(chunk)
+            n = sorter.items + len(sorter.buffer)
+            qs = [p / 100 for p in self.percentiles]
+            wanted = sorted({rank for lower, upper, _ in quantile_positions(n, qs, self.method)
+                             for rank in (lower, upper)}) if n else []
+            found = {}
+            next_rank = 0
+            offset = 0
+            distinct = 0
+            current, current_count = None, 0
+            with phase(self.profiler, "merge", n):
+                for block in sorter.sorted_blocks():
+                    end = offset + len(block)
+                    while next_rank < len(wanted) and wanted[next_rank] < end:
+                        found[wanted[next_rank]] = block[wanted[next_rank] - offset]
+                        next_rank += 1
+                    offset = end
+                    # Counter keeps first-seen order, which is ascending here
+                    for num, count in Counter(block).items():
+                        if current_count and num == current:
+                            current_count += count
+                            continue
+                        if current_count:
+                            self._count_sorted_key(current, current_count, keep_counts)
+                            distinct += 1
+                        current, current_count = num, count
+                if current_count:
+                    self._count_sorted_key(current, current_count, keep_counts)
+                    distinct += 1
+            self.distinct_count = distinct
+            if n:
+                with phase(self.profiler, "select", n):
+                    values = quantiles_with(n, qs, lambda ranks: found, self.method)
+                    self.quantile_estimates = label_percentiles(self.percentiles, values)
+            with phase(self.profiler, "heavy_hitters"):
+                self.detect_heavy_hitters()
+        self.external_stats = sorter.stats()
+        return self.external_stats
+
+    def _count_sorted_key(self, num, count, keep_counts):
+        if keep_counts:
+            self.frequency_counts[num] = count
+        self.tracker.observe(num, count, count)
+
+    def analyze_external(self, chunks, memory_bytes=DEFAULT_MEMORY_BYTES, temp_dir=None):
+        start_time = time.time()
+        stats = self.process_external(chunks, memory_bytes, temp_dir)
+        end_time = time.time()
+        self.print_results(end_time - start_time)
+        print(format_stats(stats))
+
+    def analyze_parallel(self, workers=None, shards=None):
+        # Shards are sorted and counted in a process pool over shared memory,
+        # then split by sampled splitters and sorted per range into the output
+        start_time = time.time()
+        n = len(self.numbers)
+        with phase(self.profiler, "merge", n):
+            sorted_numbers, counts, _ = parallel_map_reduce(self.numbers, workers, shards)
+        with phase(self.profiler, "count", n):
+            # Counting the sorted output serially visits keys in ascending order
+            for num in sorted(counts):
+                count = self.frequency_counts.get(num, 0) + counts[num]
+                self.frequency_counts[num] = count
+                self.tracker.observe(num, count, counts[num])
+        with phase(self.profiler, "select", n):
+            self.calculate_quantile_estimates(sorted_numbers)
+        with phase(self.profiler, "heavy_hitters"):
+            self.detect_heavy_hitters()
         end_time = time.time()
+        self.print_results(end_time - start_time)
 
+    def print_results(self, elapsed):
         print("Frequency Counts:")
         print(self.frequency_counts)
         print("Quantile Estimates:")
         print(self.quantile_estimates)
         print("Heavy Hitters:")
         print(self.heavy_hitters)
-        print("Time taken: {:.6f} seconds".format(end_time - start_time))
+        print("Time taken: {:.6f} seconds".format(elapsed))
 
 
 # Example usage:
@@ -1,70 +1,220 @@
 import random
 import time
-from collections import defaultdict
 import heapq
+from collections import Counter
+from Cardinality import DEFAULT_PRECISION, HyperLogLog
+from Counters import AdaptiveCounter
+from HeavyHitters import SpaceSaving, CountMinSketch, HeavyHitterTracker
+from Profiling import phase
+from QuantileSketch import KLLSketch
+from QueryCache import QueryCache, cached_query
+from Summary import KIND_STREAMING, pack_sections, unpack_sections
 
 
-class GreedyAnalyzer:
-    def __init__(self, heavy_hitter_threshold):
-        self.frequency_counts = defaultdict(int)
-        self.quantile_estimators = []
+class StreamingAnalyzer:
+    # Shared state for the streaming analyzers: exact (or Space-Saving bounded)
+    # frequency counts and a KLL sketch for quantiles. Heavy hitters use either
+    # an absolute threshold or, with heavy_hitter_fraction, phi * N.
+    def __init__(self, heavy_hitter_threshold, capacity=None, sketch_width=None, sketch_depth=4, quantile_k=200,
+                 heavy_hitter_fraction=None, top_k=None, on_heavy_hitter=None, profiler=None,
+                 distinct_precision=DEFAULT_PRECISION):
+        self.frequency_counts = AdaptiveCounter()
+        self.quantile_estimators = KLLSketch(quantile_k)
         self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.heavy_hitter_fraction = heavy_hitter_fraction
+        self.tracker = HeavyHitterTracker(heavy_hitter_threshold if heavy_hitter_fraction is None else None,
+                                          heavy_hitter_fraction, top_k, on_heavy_hitter)
+        self.query_cache = QueryCache()
+        # Phase timers cover batches, queries and merges; process_item is too hot
+        # for per-call timers, so use the profiler's sampling hook for it
+        self.profiler = profiler
+        # Bounded-memory mode: a fixed number of Space-Saving counters replaces the
+        # exact dict, optionally backed by a Count-Min sketch for point queries
+        self.summary = SpaceSaving(capacity) if capacity else None
+        self.sketch = CountMinSketch(sketch_width, sketch_depth) if sketch_width else None
+        # Without the exact counts, distinct keys are counted by a HyperLogLog
+        # (8 KB, about 1% error at the default precision; None turns it off)
+        self.distinct = HyperLogLog(distinct_precision) if capacity and distinct_precision else None
 
-    def process_item(self, item):
-        self.frequency_counts[item] += 1
-        heapq.heappush(self.quantile_estimators, item)
-        if self.frequency_counts[item] >= self.heavy_hitter_threshold:
-            pass  # Heavy Hitters Detection (Greedy) - Can be implemented here
+    def _add(self, item):
+        self.query_cache.version += 1
+        if self.summary is not None:
+            self.summary.update(item)
+            if self.sketch is not None:
+                self.sketch.update(item)
+            if self.distinct is not None:
+                self.distinct.update(item)
+        else:
+            self.tracker.observe(item, self.frequency_counts.add(item))
+        self.quantile_estimators.update(item)
+
+    def _add_batch(self, items):
+        self.query_cache.version += 1
+        if self.summary is not None:
+            with phase(self.profiler, "count", len(items)):
+                for item in items:
+                    self.summary.update(item)
+                    if self.sketch is not None:
+                        self.sketch.update(item)
+                if self.distinct is not None:
+                    # Repeats cannot change the sketch, so each key is hashed once
+                    self.distinct.update_batch(set(items))
+            with phase(self.profiler, "sort", len(items)):
+                self.quantile_estimators.update_batch(items)
+            return
+        # Tally the batch once, then touch each distinct key a single time
+        with phase(self.profiler, "count", len(items)):
+            for item, count in Counter(items).items():
+                self.tracker.observe(item, self.frequency_counts.add(item, count), count)
+        with phase(self.profiler, "sort", len(items)):
+            # KLL compaction sorts the batch into the quantile sketch
+            self.quantile_estimators.update_batch(items)
 
+    @cached_query
     def get_frequency_counts(self):
-        return dict(self.frequency_counts)
+        if self.summary is not None:
+            return dict(self.summary.counts)
+        return self.frequency_counts.to_dict()
 
-    def get_quantile_estimate(self):
-        sorted_estimates = sorted(self.quantile_estimators)
-        median_index = len(sorted_estimates) // 2
-        return sorted_estimates[median_index]
+    def get_frequency_estimate(self, item):
+        # Returns (count, maximum overestimate) for any key
+        if self.summary is None:
+            return self.frequency_counts.get(item, 0), 0
+        count, error = self.summary.estimate(item)
+        if self.sketch is not None and item not in self.summary.counts:
+            sketch_count = self.sketch.estimate(item)
+            if sketch_count < count:
+                return sketch_count, min(error, self.sketch.error_bound())
+        return count, error
 
-class DivideAndConquerAnalyzer:
-    def __init__(self, heavy_hitter_threshold):
-        self.frequency_counts = defaultdict(int)
-        self.quantile_estimators = []
-        self.heavy_hitter_threshold = heavy_hitter_threshold
+    @cached_query
+    def get_distinct_count(self):
+        # Exact while exact counts are kept; otherwise the HyperLogLog estimate
+        if self.summary is None:
+            return len(self.frequency_counts)
+        if self.distinct is None:
+            raise ValueError("distinct counting is off (distinct_precision=None) in bounded-memory mode")
+        return self.distinct.estimate()
 
-    def process_batch(self, data_batch):
-        for item in data_batch:
-            self.frequency_counts[item] += 1
-            heapq.heappush(self.quantile_estimators, item)
-            if self.frequency_counts[item] >= self.heavy_hitter_threshold:
-                pass  # Heavy Hitters Detection (Divide and Conquer) - Can be implemented here
+    @cached_query
+    def get_heavy_hitters(self, guaranteed=False):
+        with phase(self.profiler, "heavy_hitters"):
+            return self._heavy_hitters(guaranteed)
 
-    def get_frequency_counts(self):
-        return dict(self.frequency_counts)
+    def _heavy_hitters(self, guaranteed):
+        if self.summary is not None:
+            threshold = self.heavy_hitter_threshold
+            if self.heavy_hitter_fraction is not None:
+                threshold = self.heavy_hitter_fraction * self.summary.total
+            return self.summary.heavy_hitters(threshold, guaranteed)
+        hitters = [(item, count, 0) for item, count in self.tracker.hitters.items()]
+        hitters.sort(key=lambda entry: entry[1], reverse=True)
+        return hitters
 
-    def get_quantile_estimate(self):
-        sorted_estimates = sorted(self.quantile_estimators)
-        median_index = len(sorted_estimates) // 2
-        return sorted_estimates[median_index]
+    @cached_query
+    def get_top_k(self, k):
+        if self.summary is not None:
+            return self.summary.top_k(k)
+        if self.tracker.top is not None and k <= self.tracker.k:
+            return [(item, count, 0) for item, count in self.tracker.top_k(k)]
+        return [(item, count, 0) for item, count in heapq.nlargest(k, self.frequency_counts.items(), key=lambda entry: entry[1])]
 
-class DecreaseAndConquerAnalyzer:
-    def __init__(self, heavy_hitter_threshold):
-        self.frequency_counts = defaultdict(int)
-        self.quantile_estimators = []
-        self.heavy_hitter_threshold = heavy_hitter_threshold
+    @cached_query
+    def get_quantile_estimate(self, q=0.5):
+        with phase(self.profiler, "select"):
+            return self.quantile_estimators.quantile(q)
 
-    def process_sample(self, sample):
-        for item in sample:
-            self.frequency_counts[item] += 1
-            heapq.heappush(self.quantile_estimators, item)
-            if self.frequency_counts[item] >= self.heavy_hitter_threshold:
-                pass  # Heavy Hitters Detection (Decrease and Conquer) - Can be implemented here
+    @cached_query
+    def get_quantiles(self, qs=(0.5, 0.99, 0.999)):
+        with phase(self.profiler, "select"):
+            return {q: estimate for q, estimate in zip(qs, self.quantile_estimators.quantiles(qs))}
 
-    def get_frequency_counts(self):
-        return dict(self.frequency_counts)
+    def cache_stats(self):
+        return self.query_cache.stats()
+
+    def merge(self, other):
+        # Combines summary state only, so cost is proportional to summary size
+        with phase(self.profiler, "merge"):
+            return self._merge(other)
+
+    def _merge(self, other):
+        self.query_cache.invalidate()
+        if (self.summary is None) != (other.summary is None) or (self.sketch is None) != (other.sketch is None) or \
+                (self.distinct is None) != (other.distinct is None):
+            raise ValueError("cannot merge analyzers with different counting modes")
+        if self.summary is not None:
+            self.summary.merge(other.summary)
+            if self.sketch is not None:
+                self.sketch.merge(other.sketch)
+            if self.distinct is not None:
+                self.distinct.merge(other.distinct)
+        else:
+            for item, count in other.frequency_counts.items():
+                self.tracker.observe(item, self.frequency_counts.add(item, count), count)
+        self.quantile_estimators.merge(other.quantile_estimators)
+        return self
+
+    def to_bytes(self):
+        # The fraction is stored in parts per billion to keep every section int64.
+        # Counts go out in key order and the tracker state is kept, so
+        # from_bytes() can serve straight from the buffer (see Checkpoint.py).
+        fraction = self.heavy_hitter_fraction
+        config = [-1 if self.heavy_hitter_threshold is None else self.heavy_hitter_threshold,
+                  int(self.summary is not None), int(self.sketch is not None),
+                  -1 if fraction is None else round(fraction * 1e9), self.tracker.k or 0,
+                  int(self.distinct is not None)]
+        sections = [config]
+        sections.extend(self.frequency_counts.sorted_sections())
+        sections.extend(self.quantile_estimators.to_sections())
+        if self.summary is not None:
+            sections.extend(self.summary.to_sections())
+        if self.sketch is not None:
+            sections.extend(self.sketch.to_sections())
+        sections.extend(self.tracker.to_sections())
+        if self.distinct is not None:
+            sections.extend(self.distinct.to_sections())
+        return pack_sections(KIND_STREAMING, sections)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        sections = unpack_sections(buffer, KIND_STREAMING)
+        threshold, bounded, sketched, fraction, top_k, distinct = sections[0].tolist()
+        analyzer = cls(None if threshold < 0 else threshold,
+                       heavy_hitter_fraction=None if fraction < 0 else fraction / 1e9, top_k=top_k or None,
+                       distinct_precision=None)
+        analyzer.frequency_counts = AdaptiveCounter.from_sorted(sections[1], sections[2])
+        analyzer.quantile_estimators = KLLSketch.from_sections(sections[3:6])
+        position = 6
+        if bounded:
+            analyzer.summary = SpaceSaving.from_sections(sections[position:position + 4])
+            position += 4
+        if sketched:
+            analyzer.sketch = CountMinSketch.from_sections(sections[position:position + 3])
+            position += 3
+        analyzer.tracker.restore_sections(sections[position:position + 5])
+        position += 5
+        if distinct:
+            analyzer.distinct = HyperLogLog.from_sections(sections[position:position + 2])
+        return analyzer
+
+class GreedyAnalyzer(StreamingAnalyzer):
+    def process_item(self, item):
+        self._add(item)
+
+    def process_batch(self, data_batch):
+        # Greedy stays item-at-a-time; this only gives it the common batch entry point
+        for item in data_batch:
+            self._add(item)
+
+class DivideAndConquerAnalyzer(StreamingAnalyzer):
+    def process_batch(self, data_batch):
+        self._add_batch(data_batch)
+
+class DecreaseAndConquerAnalyzer(StreamingAnalyzer):
+    def process_sample(self, sample):
+        self._add_batch(sample)
 
-    def get_quantile_estimate(self):
-        sorted_estimates = sorted(self.quantile_estimators)
-        median_index = len(sorted_estimates) // 2
-        return sorted_estimates[median_index]
+    process_batch = process_sample
 
 # Example usage with input size N and timing information
 if __name__ == "__main__":
@@ -93,9 +243,11 @@ if __name__ == "__main__":
     end_time = time.time()
     greedy_time = end_time - start_time
     print("\nGreedy Algorithm - Time taken: {:.6f} seconds".format(greedy_time))
-    print("Heavy Hitters:", greedy_analyzer.get_frequency_counts())
+    print("Heavy Hitters:", greedy_analyzer.get_heavy_hitters())
     print("Frequency Counts:", greedy_analyzer.get_frequency_counts())
     print("Quantile Estimate (Median):", greedy_analyzer.get_quantile_estimate())
+    print("Quantile Estimates (p50/p99/p999):", greedy_analyzer.get_quantiles())
+    print("Distinct Items:", greedy_analyzer.get_distinct_count())
 
     # Divide and Conquer Algorithm
     start_time = time.time()
@@ -107,9 +259,10 @@ if __name__ == "__main__":
     end_time = time.time()
     divide_and_conquer_time = end_time - start_time
     print("\nDivide and Conquer Algorithm - Time taken: {:.6f} seconds".format(divide_and_conquer_time))
-    print("Heavy Hitters:", divide_and_conquer_analyzer.get_frequency_counts())
+    print("Heavy Hitters:", divide_and_conquer_analyzer.get_heavy_hitters())
     print("Frequency Counts:", divide_and_conquer_analyzer.get_frequency_counts())
     print("Quantile Estimate (Median):", divide_and_conquer_analyzer.get_quantile_estimate())
+    print("Quantile Estimates (p50/p99/p999):", divide_and_conquer_analyzer.get_quantiles())
 
     # Decrease and Conquer Algorithm
     start_time = time.time()
@@ -121,9 +274,10 @@ if __name__ == "__main__":
     end_time = time.time()
     decrease_and_conquer_time = end_time - start_time
     print("\nDecrease and Conquer Algorithm - Time taken: {:.6f} seconds".format(decrease_and_conquer_time))
-    print("Heavy Hitters:", decrease_and_conquer_analyzer.get_frequency_counts())
+    print("Heavy Hitters:", decrease_and_conquer_analyzer.get_heavy_hitters())
     print("Frequency Counts:", decrease_and_conquer_analyzer.get_frequency_counts())
     print("Quantile Estimate (Median):", decrease_and_conquer_analyzer.get_quantile_estimate())
+    print("Quantile Estimates (p50/p99/p999):", decrease_and_conquer_analyzer.get_quantiles())
 
     # Determine the quickest algorithm
     quickest_algorithm = min(greedy_time, divide_and_conquer_time, decrease_and_conquer_time)
@@ -1,14 +1,52 @@
-import random
-import time
-from collections import defaultdict
-import heapq
-import matplotlib.pyplot as plt
-import numpy as np
+from abc import ABC, abstractmethod
+from Selection import label_percentiles, percentiles, quantiles_from_counts, quantiles_from_sorted
+from Sorting import kway_merge, sort_numbers
+from Summary import (KIND_GREEDY, KIND_DIVIDE_AND_CONQUER, KIND_DECREASE_AND_CONQUER, pack_sections,
+                     unpack_sections, counts_to_sections, counts_from_sections, merge_counts_into)
 
 #Testing 123
 
 global_input_sizes = [50, 500, 2500, 5000, 10000, 25000, 50000, 75000, 100000]  # List of input sizes to test
-class GreedyAnalyzer:
+
+class MergeableSummary(ABC):
+    # The count table determines quantiles and heavy hitters exactly, so it (plus
+    # the threshold) is the whole summary that gets merged and serialized
+    summary_kind = None
+
+    def merge(self, other):
+        self.frequency_counts = merge_counts_into(dict(self.frequency_counts or {}), other.frequency_counts or {})
+        self._refresh_from_counts()
+        return self
+
+    def to_bytes(self):
+        sections = [[self.threshold]] + counts_to_sections(self.frequency_counts or {})
+        return pack_sections(self.summary_kind, sections)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        sections = unpack_sections(buffer, cls.summary_kind)
+        analyzer = cls([], sections[0][0])
+        analyzer.frequency_counts = counts_from_sections(sections[1], sections[2])
+        analyzer._refresh_from_counts()
+        return analyzer
+
+    @abstractmethod
+    def _refresh_from_counts(self):
+        # Rebuilds heavy hitters and quantile estimates from frequency_counts
+        pass
+
+    def quantiles(self, ps, method="linear"):
+        # Any percentiles of the summarized data, read off the count table
+        if not self.frequency_counts:
+            return {}
+        return label_percentiles(ps, quantiles_from_counts(self.frequency_counts, [p / 100 for p in ps], method))
+
+    def _quantile_estimates_from_counts(self):
+        return self.quantiles((25, 50, 75))
+
+class GreedyAnalyzer(MergeableSummary):
+    summary_kind = KIND_GREEDY
+
     def __init__(self, data, threshold):
         self.threshold = threshold
         self.frequency_counts = {}
@@ -25,15 +63,16 @@ class GreedyAnalyzer:
 
             if self.frequency_counts[number] >= self.threshold:
                 self.heavy_hitters.add(number)
-        data.sort()
-        data_length = len(data)
+        if not len(data):
+            return
 
-        percentiles = [0.25, 0.50, 0.75]  # 25th, 50th (median), and 75th percentiles
+        # 25th, 50th (median), and 75th percentiles by selection, leaving data unsorted
+        percentile_ranks = [25, 50, 75]
+        self.quantile_estimates = label_percentiles(percentile_ranks, percentiles(data, percentile_ranks))
 
-        threshold_indices = [int(data_length * p) for p in percentiles]
-        self.quantile_estimates = {
-            f'{int(p * 100)}th Percentile': data[idx - 1] for p, idx in zip(percentiles, threshold_indices)
-        }
+    def _refresh_from_counts(self):
+        self.heavy_hitters = {number for number, count in self.frequency_counts.items() if count >= self.threshold}
+        self.quantile_estimates = self._quantile_estimates_from_counts()
 
     def get_frequency_counts(self):
         return self.frequency_counts
@@ -42,52 +81,47 @@ class GreedyAnalyzer:
     def get_heavy_hitters(self):
         return list(set(self.heavy_hitters))
 
-class DivideAndConquerAnalyzer:
+class DivideAndConquerAnalyzer(MergeableSummary):
+    summary_kind = KIND_DIVIDE_AND_CONQUER
+
     def __init__(self, numbers, threshold):
         self.numbers = numbers
         self.threshold = threshold
         self.frequency_counts = {}
         self.quantile_estimates = {}
         self.heavy_hitters = []
+        self.sorted_runs = []
 
     def divide_and_conquer(self, numbers):
-        if len(numbers) <= 1:
-            return numbers
-
-        mid = len(numbers) // 2
-        left_half = self.divide_and_conquer(numbers[:mid])
-        right_half = self.divide_and_conquer(numbers[mid:])
-
-        return self.combine(left_half, right_half)
-
-    def combine(self, left, right):
-        combined = []
-        left_index, right_index = 0, 0
-
-        while left_index < len(left) and right_index < len(right):
-            if left[left_index] < right[right_index]:
-                combined.append(left[left_index])
-                left_index += 1
-            else:
-                combined.append(right[right_index])
-                right_index += 1
-
-        combined.extend(left[left_index:])
-        combined.extend(right[right_index:])
-        return combined
+        # Counting sort for bounded integer domains, else bottom-up merge sort
+        return sort_numbers(numbers)
+
+    def process_batch(self, data_batch):
+        # Each batch becomes a presorted run; counts are updated as batches arrive
+        run = self.divide_and_conquer(data_batch)
+        self.calculate_frequency_counts(run)
+        self.sorted_runs.append(run)
+
+    def finish_batches(self):
+        # k-way merge of the presorted runs, then quantiles and heavy hitters
+        sorted_numbers = kway_merge(self.sorted_runs) if self.sorted_runs else []
+        self.sorted_runs = [sorted_numbers]
+        if sorted_numbers:
+            self.calculate_quantile_estimates(sorted_numbers)
+        self.heavy_hitters = []
+        self.detect_heavy_hitters()
+        return sorted_numbers
 
     def calculate_frequency_counts(self, numbers):
         for num in numbers:
             self.frequency_counts[num] = self.frequency_counts.get(num, 0) + 1
 
     def calculate_quantile_estimates(self, numbers):
-        n = len(numbers)
-        quantiles = [numbers[i * n // 4] for i in range(1, 4)]
-        self.quantile_estimates = {
-            "25th Percentile": quantiles[0],
-            "50th Percentile": quantiles[1],
-            "75th Percentile": quantiles[2]
-        }
+        # numbers is sorted by now, so every rank is a direct index
+        if not numbers:
+            self.quantile_estimates = {}
+            return
+        self.quantile_estimates = label_percentiles((25, 50, 75), quantiles_from_sorted(numbers, (0.25, 0.5, 0.75)))
 
     def detect_heavy_hitters(self):
         for num, count in self.frequency_counts.items():
@@ -100,6 +134,12 @@ class DivideAndConquerAnalyzer:
         self.calculate_quantile_estimates(sorted_numbers)
         self.detect_heavy_hitters()
 
+    def _refresh_from_counts(self):
+        # Counting the sorted input visits keys in ascending order
+        self.frequency_counts = {num: self.frequency_counts[num] for num in sorted(self.frequency_counts)}
+        self.quantile_estimates = self._quantile_estimates_from_counts()
+        self.heavy_hitters = []
+        self.detect_heavy_hitters()
 
     def get_frequency_counts(self):
         return self.frequency_counts
@@ -108,7 +148,9 @@ class DivideAndConquerAnalyzer:
     def get_heavy_hitters(self):
         return self.heavy_hitters
 
-class DecreaseAndConquerAnalyzer:
+class DecreaseAndConquerAnalyzer(MergeableSummary):
+    summary_kind = KIND_DECREASE_AND_CONQUER
+
     def __init__(self, data, threshold):
         self.data = data
         self.threshold = threshold
@@ -149,16 +191,23 @@ class DecreaseAndConquerAnalyzer:
 #testing Again
     
     def calculate_quantile_estimates(self, data):
-        sorted_data = sorted(data)
-        num_values = len(sorted_data)
-        q1 = np.percentile(sorted_data, 25)
-        q2 = np.percentile(sorted_data, 50)
-        q3 = np.percentile(sorted_data, 75)
-        return {"25th Percentile": int(q1), "50th Percentile": int(q2), "75th Percentile": int(q3)}
+        # One multi-rank selection pass instead of sorting for three np.percentile calls
+        if not len(data):
+            return {}
+        percentile_ranks = [25, 50, 75]
+        return label_percentiles(percentile_ranks, percentiles(data, percentile_ranks))
 
     def find_heavy_hitters(self, data):
-        counts = self.calculate_frequency_counts(data)
+        # Reuse the counts from step 1 instead of recounting the whole dataset
+        counts = self.frequency_counts
+        if counts is None:
+            counts = self.calculate_frequency_counts(data)
         return [item for item, count in counts.items() if count >= self.threshold]
+
+    def _refresh_from_counts(self):
+        self.heavy_hitters = [item for item, count in self.frequency_counts.items() if count >= self.threshold]
+        self.quantile_estimates = self._quantile_estimates_from_counts()
+
     def get_frequency_counts(self):
         return self.frequency_counts
 
@@ -168,95 +217,9 @@ class DecreaseAndConquerAnalyzer:
     def get_heavy_hitters(self):
         return self.heavy_hitters
 
-# Example usage with input size N and timing information
+# Benchmark every algorithm over global_input_sizes and export the plot to a file
 if __name__ == "__main__":
-    input_sizes = global_input_sizes  # List of input sizes to test
-    #heavy_hitter_threshold = 3  # Set the threshold for heavy hitters
-
-    # Lists to store time taken by each algorithm for different input sizes
-    greedy_times = []
-    divide_and_conquer_times = []
-    decrease_and_conquer_times = []
-
-    for N in input_sizes:
-        heavy_hitter_threshold = int(0.05 * N)  # Heavy Hitter Threshold is Scaled 5% of Input Size
-        batch_size = int(0.1 * N)  # Batch Size is Scaled with Input Size for Div&Con
-        sample_size = int(0.1 * N)  # Sample Size is Scaled with Input Size for Dec&Con
-
-        data_stream = [random.randint(1, 20) for _ in range(N)]  # Generating a random data stream
-
-        # Creating copies of the data stream for each algorithm
-        greedy_data_stream = data_stream.copy()
-        divide_and_conquer_data_stream = data_stream.copy()
-        decrease_and_conquer_data_stream = data_stream.copy()
-
-        # Greedy Algorithm
-        start_time = time.time()
-        greedy_analyzer = GreedyAnalyzer(greedy_data_stream, heavy_hitter_threshold)
-        end_time = time.time()
-        greedy_time = end_time - start_time
-        print("\nGreedy Algorithm - Time taken: {:.6f} seconds".format(end_time - start_time))
-        print("Heavy Hitters (Threshold: ", heavy_hitter_threshold,"): ", greedy_analyzer.get_heavy_hitters())
-        print("Frequency Counts:", greedy_analyzer.get_frequency_counts())
-        print("Quantile Estimates:", greedy_analyzer.get_quantile_estimates())
-
-        # Divide and Conquer Algorithm
-        start_time = time.time()
-        divide_and_conquer_analyzer = DivideAndConquerAnalyzer(divide_and_conquer_data_stream, heavy_hitter_threshold)
-        divide_and_conquer_analyzer.analyze()
-        # for i in range(0, len(divide_and_conquer_data_stream), batch_size):
-        #     data_batch = divide_and_conquer_data_stream[i:i + batch_size]
-        #     divide_and_conquer_analyzer.process_batch(data_batch)
-        end_time = time.time()
-        divide_and_conquer_time = end_time - start_time
-        print("\nDivide and Conquer Algorithm (Batch Size:", batch_size,") - Time taken: {:.6f} seconds".format(end_time - start_time))
-        print("Heavy Hitters (Threshold: ", heavy_hitter_threshold,"): ", divide_and_conquer_analyzer.get_heavy_hitters())
-        print("Frequency Counts:", divide_and_conquer_analyzer.get_frequency_counts())
-        print("Quantile Estimates:", divide_and_conquer_analyzer.get_quantile_estimates())
-
-        # Decrease and Conquer Algorithm
-        start_time = time.time()
-        decrease_and_conquer_analyzer = DecreaseAndConquerAnalyzer(decrease_and_conquer_data_stream, heavy_hitter_threshold)
-        decrease_and_conquer_analyzer.process_data()
-        # for i in range(0, len(decrease_and_conquer_data_stream), sample_size):
-        #     sample = decrease_and_conquer_data_stream[i:i + sample_size]
-        #     decrease_and_conquer_analyzer.process_sample(sample)
-        end_time = time.time()
-        decrease_and_conquer_time = end_time - start_time
-        print("\nDecrease and Conquer Algorithm (Sample Size:", sample_size,") - Time taken: {:.6f} seconds".format(end_time - start_time))
-        print("Heavy Hitters (Threshold: ", heavy_hitter_threshold,"): ", decrease_and_conquer_analyzer.get_heavy_hitters())
-        print("Frequency Counts:", decrease_and_conquer_analyzer.get_frequency_counts())
-        print("Quantile Estimates:", decrease_and_conquer_analyzer.get_quantile_estimates())
-
-        # Appending times to respective lists
-        greedy_times.append(greedy_time)
-        divide_and_conquer_times.append(divide_and_conquer_time)
-        decrease_and_conquer_times.append(decrease_and_conquer_time)
-
-        # Determine the quickest algorithm for this input size
-        quickest_algorithm = min(greedy_time, divide_and_conquer_time, decrease_and_conquer_time)
-
-        # Print results for this input size
-        print("~~~~~~~~~~")
-        print(f"Input Size: {N}")
-        print(f" - Greedy Algorithm Time: {greedy_time:.6f} seconds")
-        print(f" - Divide and Conquer Algorithm Time: {divide_and_conquer_time:.6f} seconds")
-        print(f" - Decrease and Conquer Algorithm Time: {decrease_and_conquer_time:.6f} seconds")
-        if quickest_algorithm == greedy_time:
-            print("Quickest Algorithm: Greedy Algorithm\n")
-        elif quickest_algorithm == divide_and_conquer_time:
-            print("Quickest Algorithm: Divide and Conquer Algorithm\n")
-        else:
-            print("Quickest Algorithm: Decrease and Conquer Algorithm\n")
-
-    # Plotting the graph
-    plt.figure(figsize=(12, 6))
-    plt.plot(input_sizes, greedy_times, marker='o', label='Greedy Algorithm')
-    plt.plot(input_sizes, divide_and_conquer_times, marker='o', label='Divide and Conquer Algorithm')
-    plt.plot(input_sizes, decrease_and_conquer_times, marker='o', label='Decrease and Conquer Algorithm')
-    plt.xlabel('Input Size (N)')
-    plt.ylabel('Time (seconds)')
-    plt.title('Algorithm Performance vs. Input Size')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+    from Benchmark import main
+    main(["--analyzers", "mpl_greedy,mpl_divide_and_conquer,mpl_decrease_and_conquer",
+          "--distributions", "uniform", "--output", "algorithm_performance.json",
+          "--plot", "algorithm_performance.png"])
@@ -0,0 +1,193 @@
+import bisect
+import os
+import shutil
+import tempfile
+import time
+from array import array
+
+from Sorting import counting_sort
+
+DEFAULT_MEMORY_BYTES = 256 << 20
+# Measured peak cost of one item while a run is sorted: its array('q') slot
+# and the copy being sorted, a list slot and int object, and sort scratch
+BYTES_PER_ITEM = 80
+# Smallest per-run read buffer during a merge; more runs than the budget can
+# give blocks this large are first merged in intermediate passes
+MIN_BLOCK_ITEMS = 1 << 13
+
+
+def _extend(buffer, chunk):
+    if isinstance(chunk, memoryview):
+        buffer.frombytes(chunk.cast("B"))
+    elif hasattr(chunk, "dtype"):
+        buffer.frombytes(chunk.astype(buffer.typecode, copy=False).tobytes())
+    else:
+        buffer.extend(chunk)
+
+
+class _RunReader:
+    # Sequential, buffered reader of one sorted run, a block at a time
+    def __init__(self, path, block_items, typecode):
+        self.typecode = typecode
+        self.block_bytes = block_items * array(typecode).itemsize
+        self.handle = open(path, "rb", buffering=self.block_bytes)
+        self.values = []
+        self.position = 0
+        self.refill()
+
+    def refill(self):
+        block = array(self.typecode)
+        block.frombytes(self.handle.read(self.block_bytes))
+        self.values = block.tolist()
+        self.position = 0
+        if not self.values:
+            self.handle.close()
+        return bool(self.values)
+
+
+def _merge_blocks(readers):
+    # Yields the merged output as sorted lists. Every reader's current block
+    # is cut at the smallest last value among them: everything up to that
+    # cutoff is final, so those prefixes are sorted together (Timsort merges
+    # presorted runs in C) and at least one reader moves to its next block.
+    active = [reader for reader in readers if reader.values]
+    while active:
+        cutoff = min(reader.values[-1] for reader in active)
+        merged = []
+        for reader in active:
+            end = bisect.bisect_right(reader.values, cutoff, reader.position)
+            merged += reader.values[reader.position:end]
+            reader.position = end
+            if end == len(reader.values):
+                reader.refill()
+        merged.sort()
+        yield merged
+        active = [reader for reader in active if reader.values]
+
+
+class ExternalSorter:
+    # Out-of-core sort: add() collects chunks into runs of memory_bytes worth
+    # of items, each sorted in memory and spilled as a raw binary file to a
+    # private temp directory; sorted_blocks() k-way merges the runs with
+    # buffered sequential reads and yields the sorted data in blocks. Memory
+    # stays around memory_bytes whatever the input size. Runs beyond what the
+    # budget can buffer at once are merged in intermediate passes first.
+    def __init__(self, memory_bytes=DEFAULT_MEMORY_BYTES, temp_dir=None, typecode="q"):
+        self.memory_bytes = memory_bytes
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self.run_items = max(MIN_BLOCK_ITEMS, memory_bytes // BYTES_PER_ITEM)
+        self.fan_in = max(2, memory_bytes // (2 * BYTES_PER_ITEM * MIN_BLOCK_ITEMS))
+        self.directory = tempfile.mkdtemp(prefix="external-sort-", dir=temp_dir)
+        self.buffer = array(typecode)
+        self.runs = []
+        self.spilled_runs = 0
+        self.items = 0
+        self.passes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.spill_seconds = 0.0
+        self.merge_seconds = 0.0
+        self._next_run = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _run_path(self):
+        path = os.path.join(self.directory, f"run-{self._next_run:06d}.bin")
+        self._next_run += 1
+        return path
+
+    def add(self, chunk):
+        _extend(self.buffer, chunk)
+        while len(self.buffer) >= self.run_items:
+            self._spill(self.run_items)
+
+    def _spill(self, count):
+        started = time.perf_counter()
+        values = self.buffer[:count].tolist()
+        del self.buffer[:count]
+        # Counting sort for a bounded integer domain, else Timsort in place
+        run = counting_sort(values)
+        if run is None:
+            values.sort()
+            run = values
+        run = array(self.typecode, run)
+        path = self._run_path()
+        with open(path, "wb") as handle:
+            run.tofile(handle)
+        self.runs.append(path)
+        self.spilled_runs += 1
+        self.items += len(run)
+        self.bytes_written += len(run) * self.itemsize
+        self.spill_seconds += time.perf_counter() - started
+
+    def _block_items(self, fan_in):
+        return max(MIN_BLOCK_ITEMS, self.memory_bytes // (2 * BYTES_PER_ITEM * fan_in))
+
+    def _merge_pass(self):
+        # Merges groups of fan_in runs into longer runs on disk
+        merged_runs = []
+        block_items = self._block_items(self.fan_in)
+        for start in range(0, len(self.runs), self.fan_in):
+            group = self.runs[start:start + self.fan_in]
+            path = self._run_path()
+            with open(path, "wb", buffering=block_items * self.itemsize) as handle:
+                for block in _merge_blocks([_RunReader(run, block_items, self.typecode) for run in group]):
+                    array(self.typecode, block).tofile(handle)
+            for run in group:
+                self.bytes_read += os.path.getsize(run)
+                os.unlink(run)
+            self.bytes_written += os.path.getsize(path)
+            merged_runs.append(path)
+        self.runs = merged_runs
+        self.passes += 1
+
+    def sorted_blocks(self):
+        # Spills what is left in memory and yields the whole input in sorted
+        # order, as lists of at most about memory_bytes / BYTES_PER_ITEM items
+        if self.buffer:
+            self._spill(len(self.buffer))
+        started = time.perf_counter()
+        while len(self.runs) > self.fan_in:
+            self._merge_pass()
+        block_items = self._block_items(max(1, len(self.runs)))
+        readers = [_RunReader(run, block_items, self.typecode) for run in self.runs]
+        if readers:
+            self.passes += 1
+        for block in _merge_blocks(readers):
+            self.bytes_read += len(block) * self.itemsize
+            yield block
+        self.merge_seconds += time.perf_counter() - started
+
+    def stats(self):
+        # Input size, runs, merge passes, timings and throughput (MB/s of
+        # input through each phase and overall; the merge figure includes
+        # whatever the caller did with each block)
+        megabytes = self.items * self.itemsize / 1e6
+        total = self.spill_seconds + self.merge_seconds
+        return {
+            "items": self.items,
+            "megabytes": megabytes,
+            "runs": self.spilled_runs,
+            "merge_passes": self.passes,
+            "bytes_written": self.bytes_written,
+            "bytes_read": self.bytes_read,
+            "spill_seconds": self.spill_seconds,
+            "merge_seconds": self.merge_seconds,
+            "spill_mb_per_sec": megabytes / self.spill_seconds if self.spill_seconds else 0.0,
+            "merge_mb_per_sec": megabytes / self.merge_seconds if self.merge_seconds else 0.0,
+            "mb_per_sec": megabytes / total if total else 0.0,
+        }
+
+
+def format_stats(stats):
+    return ("External sort: {runs} runs, {merge_passes} merge passes, {megabytes:.1f} MB at {mb_per_sec:.1f} MB/s "
+            "(spill {spill_mb_per_sec:.1f} MB/s, merge {merge_mb_per_sec:.1f} MB/s)".format(**stats))
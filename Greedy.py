@@ -1,38 +1,41 @@
 import random
 
+from Counters import AdaptiveCounter
+from HeavyHitters import HeavyHitterTracker
+from Profiling import phase
+from Selection import label_percentiles, percentiles, quantiles_from_counts
+
 def generate_random_numbers(n):
     return [random.randint(1, 20) for _ in range(n)]
 
 class GreedyAnalyzer:
-    def __init__(self, data, threshold):
+    def __init__(self, data, threshold, percentiles=(25, 50, 75), method="linear", profiler=None):
         self.threshold = threshold
-        self.frequency_counts = {}
+        self.percentiles = percentiles
+        self.method = method
+        self.frequency_counts = AdaptiveCounter()
         self.quantile_estimates = {}
         self.heavy_hitters = set()
+        self.tracker = HeavyHitterTracker(threshold)
+        self.profiler = profiler
         self._process_data(data)
 
     def _process_data(self, data):
-        data.sort()
-        data_length = len(data)
-
-        percentiles = [0.25, 0.50, 0.75]  # 25th, 50th (median), and 75th percentiles
-
-        threshold_indices = [int(data_length * p) for p in percentiles]
-        self.quantile_estimates = {
-            f'{int(p * 100)}th Percentile': data[idx - 1] for p, idx in zip(percentiles, threshold_indices)
-        }
-
-        for number in data:
-            if number in self.frequency_counts:
-                self.frequency_counts[number] += 1
-            else:
-                self.frequency_counts[number] = 1
-
-            if any(self.frequency_counts[number] >= threshold for threshold in threshold_indices):
-                self.heavy_hitters.add(number)
+        # Multi-rank selection finds every percentile without sorting the caller's list
+        if len(data):
+            with phase(self.profiler, "select", len(data)):
+                self.quantile_estimates = label_percentiles(self.percentiles,
+                                                            percentiles(data, self.percentiles, self.method))
+
+        # Heavy hitters are keys whose count reaches the threshold, tracked as counts grow
+        with phase(self.profiler, "count", len(data)):
+            for number in data:
+                self.tracker.observe(number, self.frequency_counts.add(number))
+        with phase(self.profiler, "heavy_hitters"):
+            self.heavy_hitters = set(self.tracker.heavy_hitters())
 
     def get_frequency_counts(self):
-        return self.frequency_counts
+        return self.frequency_counts.to_dict()
 
     def get_quantile_estimates(self):
         return self.quantile_estimates
@@ -40,6 +43,10 @@ class GreedyAnalyzer:
     def get_heavy_hitters(self):
         return self.heavy_hitters
 
+    def quantiles(self, ps, method=None):
+        values = quantiles_from_counts(self.frequency_counts, [p / 100 for p in ps], method or self.method)
+        return label_percentiles(ps, values)
+
 
 if __name__ == "__main__":
     n = 1000  # Size of the data stream
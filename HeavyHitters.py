@@ -0,0 +1,388 @@
+import heapq
+import math
+import random
+from array import array
+from collections import deque
+
+from Cardinality import hash64
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+class SpaceSaving:
+    # Space-Saving summary (Metwally et al.) over a fixed number of counters.
+    # Every tracked count overestimates the true count by at most its error,
+    # and any untracked key occurred at most min_count times.
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.buckets = {}  # count -> keys currently holding that count
+        self.min_count = 0
+        self.total = 0
+
+    def update(self, item):
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._move(item, count, count + 1)
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self.buckets.setdefault(1, set()).add(item)
+            self.min_count = 1
+            return
+
+        # Evict a key holding the minimum count and let the newcomer inherit it
+        floor = self.min_count
+        bucket = self.buckets[floor]
+        victim = bucket.pop()
+        if not bucket:
+            del self.buckets[floor]
+            self.min_count = floor + 1
+        del self.counts[victim]
+        del self.errors[victim]
+
+        self.counts[item] = floor + 1
+        self.errors[item] = floor
+        self.buckets.setdefault(floor + 1, set()).add(item)
+
+    def _move(self, item, old_count, new_count):
+        bucket = self.buckets[old_count]
+        bucket.discard(item)
+        if not bucket:
+            del self.buckets[old_count]
+            if old_count == self.min_count:
+                self.min_count = new_count
+        self.buckets.setdefault(new_count, set()).add(item)
+        self.counts[item] = new_count
+
+    def estimate(self, item):
+        # Untracked keys can have occurred at most min_count times
+        if item in self.counts:
+            return self.counts[item], self.errors[item]
+        if len(self.counts) < self.capacity:
+            return 0, 0
+        return self.min_count, self.min_count
+
+    def error_bound(self):
+        # Maximum overestimation of any reported count (<= total / capacity)
+        return self.min_count if len(self.counts) >= self.capacity else 0
+
+    def top_k(self, k):
+        ranked = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)
+        return [(item, count, self.errors[item]) for item, count in ranked[:k]]
+
+    def heavy_hitters(self, threshold, guaranteed=False):
+        # guaranteed=True only returns keys whose lower bound clears the threshold
+        hitters = []
+        for item, count in self.counts.items():
+            error = self.errors[item]
+            lower_bound = count - error
+            if (lower_bound if guaranteed else count) >= threshold:
+                hitters.append((item, count, error))
+        hitters.sort(key=lambda entry: entry[1], reverse=True)
+        return hitters
+
+    def merge(self, other):
+        # Keys missing from one side may still have occurred up to that side's
+        # floor, so they inherit it as both count and error (Agarwal et al.)
+        self_floor = self.error_bound()
+        other_floor = other.error_bound()
+        combined = []
+        for item in self.counts.keys() | other.counts.keys():
+            count = self.counts.get(item, self_floor) + other.counts.get(item, other_floor)
+            error = self.errors.get(item, self_floor) + other.errors.get(item, other_floor)
+            combined.append((count, error, item))
+        kept = heapq.nlargest(self.capacity, combined, key=lambda entry: entry[0])
+
+        self.counts = {}
+        self.errors = {}
+        self.buckets = {}
+        for count, error, item in kept:
+            self.counts[item] = count
+            self.errors[item] = error
+            self.buckets.setdefault(count, set()).add(item)
+        self.min_count = min(self.buckets) if self.buckets else 0
+        self.total += other.total
+        return self
+
+    def to_sections(self):
+        header = array("q", [self.capacity, self.min_count, self.total])
+        return [header, array("q", self.counts.keys()), array("q", self.counts.values()),
+                array("q", (self.errors[item] for item in self.counts))]
+
+    @classmethod
+    def from_sections(cls, sections):
+        header, keys, counts, errors = sections
+        capacity, min_count, total = header.tolist()
+        summary = cls(capacity)
+        for item, count, error in zip(keys.tolist(), counts.tolist(), errors.tolist()):
+            summary.counts[item] = count
+            summary.errors[item] = error
+            summary.buckets.setdefault(count, set()).add(item)
+        summary.min_count = min_count
+        summary.total = total
+        return summary
+
+
+class CountMinSketch:
+    # Count-Min sketch with conservative update. Estimates never undercount and
+    # overcount by at most e/width * total with probability 1 - e^-depth.
+    # Items are first mixed by hash64() (the built-in hash() is nearly the
+    # identity on ints, hash(-1) == hash(-2), and salted for str), then each
+    # row applies its own (a * key + b) mod p.
+    def __init__(self, width, depth, seed=0):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        rng = random.Random(seed)
+        self.hash_params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(depth)
+        ]
+        self.table = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _indices(self, item):
+        key = hash64(item)
+        width = self.width
+        return [((a * key + b) % _MERSENNE_PRIME) % width for a, b in self.hash_params]
+
+    def update(self, item, count=1):
+        self.total += count
+        indices = self._indices(item)
+        table = self.table
+        target = min(table[row][col] for row, col in enumerate(indices)) + count
+        for row, col in enumerate(indices):
+            if table[row][col] < target:
+                table[row][col] = target
+
+    def estimate(self, item):
+        return min(self.table[row][col] for row, col in enumerate(self._indices(item)))
+
+    def merge(self, other):
+        if (self.width, self.depth, self.hash_params) != (other.width, other.depth, other.hash_params):
+            raise ValueError("Count-Min sketches must share width, depth and hash functions to merge")
+        for row, other_row in zip(self.table, other.table):
+            for col, value in enumerate(other_row):
+                row[col] += value
+        self.total += other.total
+        return self
+
+    def to_sections(self):
+        header = array("q", [self.width, self.depth, self.total])
+        params = array("q", (value for pair in self.hash_params for value in pair))
+        table = array("q")
+        for row in self.table:
+            table.extend(row)
+        return [header, params, table]
+
+    @classmethod
+    def from_sections(cls, sections):
+        header, params, table = sections
+        width, depth, total = header.tolist()
+        sketch = cls(width, depth)
+        params = params.tolist()
+        sketch.hash_params = [(params[i], params[i + 1]) for i in range(0, len(params), 2)]
+        table = table.tolist()
+        sketch.table = [table[row * width:(row + 1) * width] for row in range(depth)]
+        sketch.total = total
+        return sketch
+
+    def error_bound(self):
+        return math.ceil(math.e * self.total / self.width)
+
+
+class IndexedMinHeap:
+    # Binary min-heap over (count, key) with a key -> slot index, so a key's
+    # count can be raised in O(log n) and the minimum read in O(1)
+    def __init__(self):
+        self.keys = []
+        self.counts = {}
+        self.position = {}
+
+    @classmethod
+    def from_heap(cls, keys, counts):
+        # keys already in heap order (as in .keys) and their counts
+        heap = cls()
+        heap.keys = list(keys)
+        heap.counts = dict(zip(heap.keys, counts))
+        heap.position = {key: index for index, key in enumerate(heap.keys)}
+        return heap
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.position
+
+    def min(self):
+        key = self.keys[0]
+        return key, self.counts[key]
+
+    def push(self, key, count):
+        self.keys.append(key)
+        self.counts[key] = count
+        self.position[key] = len(self.keys) - 1
+        self._sift_up(len(self.keys) - 1)
+
+    def increase(self, key, count):
+        self.counts[key] = count
+        self._sift_down(self.position[key])
+
+    def pop(self):
+        key = self.keys[0]
+        last = self.keys.pop()
+        if self.keys:
+            self.keys[0] = last
+            self.position[last] = 0
+            self._sift_down(0)
+        del self.position[key]
+        return key, self.counts.pop(key)
+
+    def replace_min(self, key, count):
+        evicted = self.keys[0]
+        del self.position[evicted]
+        del self.counts[evicted]
+        self.keys[0] = key
+        self.counts[key] = count
+        self.position[key] = 0
+        self._sift_down(0)
+        return evicted
+
+    def items(self):
+        return [(key, self.counts[key]) for key in self.keys]
+
+    def _sift_up(self, index):
+        keys, counts, position = self.keys, self.counts, self.position
+        key = keys[index]
+        count = counts[key]
+        while index:
+            parent = (index - 1) >> 1
+            parent_key = keys[parent]
+            if counts[parent_key] <= count:
+                break
+            keys[index] = parent_key
+            position[parent_key] = index
+            index = parent
+        keys[index] = key
+        position[key] = index
+
+    def _sift_down(self, index):
+        keys, counts, position = self.keys, self.counts, self.position
+        size = len(keys)
+        key = keys[index]
+        count = counts[key]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and counts[keys[child + 1]] < counts[keys[child]]:
+                child += 1
+            child_key = keys[child]
+            if count <= counts[child_key]:
+                break
+            keys[index] = child_key
+            position[child_key] = index
+            index = child
+        keys[index] = key
+        position[key] = index
+
+
+class HeavyHitterTracker:
+    # Maintains heavy hitters and the top k as counts change, so queries need no
+    # pass over the count table. Callers report each key's new count through
+    # observe(). The threshold is either absolute or phi * N; with phi it rises
+    # as N grows and keys that fall below it are dropped. Crossings are queued
+    # in events and handed to on_cross(kind, key, count, total) when given.
+    def __init__(self, threshold=None, phi=None, k=None, on_cross=None, max_events=10000):
+        if (threshold is None) == (phi is None):
+            raise ValueError("set exactly one of threshold or phi")
+        self.threshold = threshold
+        self.phi = phi
+        self.k = k
+        self.on_cross = on_cross
+        self.total = 0
+        self.hitters = {}  # key -> count, in crossing order
+        self.hitter_heap = IndexedMinHeap() if phi is not None else None
+        self.top = IndexedMinHeap() if k else None
+        self.events = deque(maxlen=max_events)
+
+    def current_threshold(self):
+        return self.threshold if self.phi is None else self.phi * self.total
+
+    def observe(self, key, count, increment=1):
+        self.total += increment
+
+        top = self.top
+        if top is not None:
+            if key in top:
+                top.increase(key, count)
+            elif len(top) < self.k:
+                top.push(key, count)
+            elif count > top.min()[1]:
+                top.replace_min(key, count)
+
+        if key in self.hitters:
+            self.hitters[key] = count
+            if self.hitter_heap is not None:
+                self.hitter_heap.increase(key, count)
+        elif count >= self.current_threshold():
+            self.hitters[key] = count
+            if self.hitter_heap is not None:
+                self.hitter_heap.push(key, count)
+            self._emit("enter", key, count)
+
+        if self.hitter_heap is not None:
+            # The relative threshold only rises, so expired keys sit at the heap top
+            heap = self.hitter_heap
+            limit = self.phi * self.total
+            while heap and heap.min()[1] < limit:
+                expired, expired_count = heap.pop()
+                del self.hitters[expired]
+                self._emit("exit", expired, expired_count)
+
+    def _rebuild_hitter_heap(self):
+        if self.hitter_heap is not None:
+            ordered = sorted(self.hitters.items(), key=lambda entry: entry[1])
+            self.hitter_heap = IndexedMinHeap.from_heap([key for key, _ in ordered], [count for _, count in ordered])
+
+    def to_sections(self):
+        top = self.top.keys if self.top is not None else []
+        return [array("q", [self.total]), array("q", self.hitters.keys()), array("q", self.hitters.values()),
+                array("q", top), array("q", [self.top.counts[key] for key in top])]
+
+    def restore_sections(self, sections):
+        # Counterpart of to_sections() for a tracker built with the same settings
+        total, hitter_keys, hitter_counts, top_keys, top_counts = sections
+        self.total = total[0]
+        self.hitters = dict(zip(hitter_keys.tolist(), hitter_counts.tolist()))
+        self._rebuild_hitter_heap()
+        if self.top is not None:
+            self.top = IndexedMinHeap.from_heap(top_keys.tolist(), top_counts.tolist())
+        return self
+
+    def _emit(self, kind, key, count):
+        self.events.append((kind, key, count, self.total))
+        if self.on_cross is not None:
+            self.on_cross(kind, key, count, self.total)
+
+    def drain_events(self):
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def heavy_hitters(self):
+        return list(self.hitters)
+
+    def top_k(self, k=None):
+        entries = self.top.items() if self.top is not None else []
+        entries.sort(key=lambda entry: entry[1], reverse=True)
+        return entries[:k] if k else entries
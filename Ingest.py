@@ -0,0 +1,166 @@
+import argparse
+import itertools
+import mmap
+import os
+import time
+from array import array
+
+DEFAULT_CHUNK_ITEMS = 1 << 20
+
+
+def read_binary_chunks(path, typecode="q", chunk_items=DEFAULT_CHUNK_ITEMS, as_numpy=False):
+    # Memory-maps a raw native-endian integer file and yields zero-copy chunks
+    # (memoryviews, or NumPy views with as_numpy=True). A chunk is only valid
+    # until the next one is requested; pages already consumed are dropped so
+    # resident memory stays around one chunk.
+    itemsize = array(typecode).itemsize
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size < itemsize:
+            return
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapped, "madvise"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+    usable = len(mapped) - len(mapped) % itemsize
+    view = memoryview(mapped)[:usable].cast(typecode)
+    dropped = 0
+    try:
+        for start in range(0, len(view), chunk_items):
+            end = min(start + chunk_items, len(view))
+            chunk = view[start:end]
+            if as_numpy:
+                import numpy as np
+                yield np.frombuffer(chunk, dtype=typecode)
+            else:
+                yield chunk
+
+            consumed = end * itemsize
+            consumed -= consumed % mmap.PAGESIZE
+            if consumed > dropped and hasattr(mmap, "MADV_DONTNEED"):
+                mapped.madvise(mmap.MADV_DONTNEED, dropped, consumed - dropped)
+                dropped = consumed
+    finally:
+        try:
+            view.release()
+            mapped.close()
+        except BufferError:
+            # A caller still holds the last chunk; the mapping closes with it
+            pass
+
+
+def read_text_chunks(path, chunk_items=DEFAULT_CHUNK_ITEMS, delimiter=None, column=None, skip_header=False):
+    # Streams whitespace- or delimiter-separated integers into fixed-size
+    # array('q') chunks; column selects one CSV field per line
+    chunk = array("q")
+    with open(path, "r") as handle:
+        if skip_header:
+            handle.readline()
+        for line in handle:
+            fields = line.split(delimiter)
+            if column is not None:
+                fields = fields[column:column + 1]
+            for field in fields:
+                field = field.strip()
+                if field:
+                    chunk.append(int(field))
+            if len(chunk) >= chunk_items:
+                yield chunk[:chunk_items]
+                del chunk[:chunk_items]
+    while chunk:
+        yield chunk[:chunk_items]
+        del chunk[:chunk_items]
+
+
+def write_binary(path, values, typecode="q"):
+    with open(path, "wb") as handle:
+        array(typecode, values).tofile(handle)
+
+
+def feed(analyzer, chunks):
+    # Hands each chunk to whichever entry point the analyzer exposes
+    if hasattr(analyzer, "process_batch"):
+        process = analyzer.process_batch
+    elif hasattr(analyzer, "process_sample"):
+        process = analyzer.process_sample
+    else:
+        def process(chunk):
+            for item in chunk:
+                analyzer.process_item(item)
+    for chunk in chunks:
+        process(chunk)
+    return analyzer
+
+
+if __name__ == "__main__":
+    import Analyzers
+    import Selector
+    from Profiling import Profiler, SamplingProfiler, export
+
+    parser = argparse.ArgumentParser(description="Stream an integer file through an analyzer")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["binary", "text"], default="binary")
+    parser.add_argument("--typecode", default="q", help="array typecode of binary files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_ITEMS)
+    parser.add_argument("--delimiter", default=None)
+    parser.add_argument("--column", type=int, default=None)
+    parser.add_argument("--skip-header", action="store_true", help="ignore the first line of a text file")
+    parser.add_argument("--backend", default="divide_and_conquer", choices=["auto"] + Analyzers.available(),
+                        help="auto picks one from the calibration profile (see Selector.py calibrate)")
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--external-sort", action="store_true",
+                        help="sort the whole input out of core (DivConq) instead of streaming it")
+    parser.add_argument("--memory-mb", type=int, default=256, help="memory budget of --external-sort")
+    parser.add_argument("--temp-dir", default=None, help="where --external-sort spills its runs")
+    parser.add_argument("--profile", help="write per-phase metrics to this file")
+    parser.add_argument("--profile-format", choices=["json", "prometheus"], default="json")
+    parser.add_argument("--sample-stacks", action="store_true", help="also run the sampling profiler")
+    args = parser.parse_args()
+
+    if args.format == "binary":
+        chunks = read_binary_chunks(args.path, args.typecode, args.chunk_size)
+    else:
+        chunks = read_text_chunks(args.path, args.chunk_size, args.delimiter, args.column, args.skip_header)
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(sampler=SamplingProfiler() if args.sample_stacks else None).start()
+
+    if args.external_sort:
+        from DivConq import DivideAndConquerAnalyzer
+        from ExternalSort import format_stats
+
+        start_time = time.time()
+        analyzer = DivideAndConquerAnalyzer(None, args.threshold, percentiles=(50, 99, 99.9), profiler=profiler)
+        stats = analyzer.process_external(chunks, args.memory_mb << 20, args.temp_dir, keep_counts=False,
+                                          typecode=args.typecode if args.format == "binary" else "q")
+        end_time = time.time()
+        print("Time taken: {:.6f} seconds".format(end_time - start_time))
+        print("Heavy Hitters:", sorted(analyzer.tracker.hitters.items(), key=lambda entry: entry[1], reverse=True)[:10])
+        print("Quantile Estimates:", analyzer.quantile_estimates)
+        print("Distinct Items:", analyzer.distinct_count)
+        print(format_stats(stats))
+    else:
+        start_time = time.time()
+        options = {"profiler": profiler} if profiler is not None else {}
+        if args.backend == "auto":
+            # Probe the first chunk; binary files also give the total item count up front
+            first = next(chunks, None)
+            if first is not None:
+                chunks = itertools.chain([first], chunks)
+            population = None
+            if args.format == "binary":
+                population = os.path.getsize(args.path) // array(args.typecode).itemsize
+            backend, analyzer = Selector.auto_create(first if first is not None else [], args.threshold,
+                                                     population=population, **options)
+            print("Selected backend:", backend)
+        else:
+            analyzer = Analyzers.create(args.backend, args.threshold, **options)
+        analyzer = feed(analyzer, chunks)
+        end_time = time.time()
+        print("Time taken: {:.6f} seconds".format(end_time - start_time))
+        print("Heavy Hitters:", analyzer.get_top_k(10))
+        print("Quantile Estimates (p50/p99/p999):", analyzer.get_quantiles())
+        print("Distinct Items:", analyzer.get_distinct_count())
+
+    if profiler is not None:
+        export(profiler.stop(), args.profile, args.profile_format)
@@ -0,0 +1,148 @@
+import bisect
+import os
+from array import array
+from collections import Counter
+
+from QuantileSketch import KLLSketch
+
+# Worker-side views of the two shared int64 buffers (shards and sorted output)
+_segments = None
+_buffers = None
+
+
+def _attach(names):
+    global _segments, _buffers
+    from multiprocessing.shared_memory import SharedMemory
+    _segments = [SharedMemory(name=name) for name in names]
+    _buffers = [segment.buf.cast("q") for segment in _segments]
+
+
+def _map_shard(start, end, sketch_k, splitters):
+    # Count in arrival order (so merged keys keep first-occurrence order),
+    # then sort the shard in place and cut it at the splitters
+    view = _buffers[0]
+    run = view[start:end].tolist()
+    counts, sketch = _count_and_sort(run, sketch_k)
+    view[start:end] = array("q", run)
+    cuts = [start] + [start + bisect.bisect_right(run, splitter) for splitter in splitters] + [end]
+    return counts, sketch, cuts
+
+
+def _count_and_sort(run, sketch_k):
+    # Counter tallies in C and keeps first-occurrence order; run is sorted in place
+    counts = dict(Counter(run))
+    run.sort()
+    sketch = None
+    if sketch_k:
+        sketch = KLLSketch(sketch_k)
+        sketch.update_batch(run)
+    return counts, sketch
+
+
+def _sort_partition(pieces, offset):
+    # One splitter range: its sorted piece of every shard, sorted together
+    # (Timsort merges the presorted runs in C) into its own output slice
+    source = _buffers[0]
+    values = []
+    for start, end in pieces:
+        values += source[start:end].tolist()
+    values.sort()
+    _buffers[1][offset:offset + len(values)] = array("q", values)
+
+
+def choose_splitters(values, partitions, oversample=32):
+    # partitions - 1 splitters from an evenly strided sample of the input
+    if partitions < 2:
+        return []
+    step = max(1, len(values) // (partitions * oversample))
+    sample = sorted(values[::step])
+    return [sample[len(sample) * i // partitions] for i in range(1, partitions)]
+
+
+def merge_counts(left_counts, right_counts):
+    merged_counts = left_counts.copy()
+    for item, count in right_counts.items():
+        merged_counts[item] = merged_counts.get(item, 0) + count
+    return merged_counts
+
+
+def tree_reduce(parts, combine):
+    # Pairwise reduction keeps the left-to-right order of the shards
+    while len(parts) > 1:
+        paired = [combine(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            paired.append(parts[-1])
+        parts = paired
+    return parts[0]
+
+
+def shard_bounds(n, shards):
+    shards = max(1, min(shards, n))
+    step, extra = divmod(n, shards)
+    bounds = [0]
+    for shard in range(shards):
+        bounds.append(bounds[-1] + step + (1 if shard < extra else 0))
+    return bounds
+
+
+def parallel_map_reduce(data, workers=None, shards=None, sketch_k=None):
+    # Returns (sorted values, frequency counts, merged KLL sketch or None).
+    # Values must fit in a signed 64-bit integer. The process pool and shared
+    # memory modules are imported here, keeping them out of analyzer imports.
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    if workers == 1:
+        # Nothing to run in parallel: skip the pool and the shared-memory copies
+        run = data.tolist() if isinstance(data, array) else list(data)
+        counts, sketch = _count_and_sort(run, sketch_k)
+        return run, counts, sketch
+
+    values = data if isinstance(data, array) and data.typecode == "q" else array("q", data)
+    n = len(values)
+    if n == 0:
+        return [], {}, KLLSketch(sketch_k) if sketch_k else None
+
+    bounds = shard_bounds(n, shards)
+    splitters = choose_splitters(values, workers)
+    segments = [SharedMemory(create=True, size=n * values.itemsize) for _ in range(2)]
+    views = [segment.buf.cast("q") for segment in segments]
+    try:
+        views[0][:n] = values
+        del values
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=([segment.name for segment in segments],)) as pool:
+            # Map: each shard is sorted in shared memory, counted, and cut at
+            # the splitters sampled from the input
+            futures = [pool.submit(_map_shard, bounds[i], bounds[i + 1], sketch_k, splitters)
+                       for i in range(len(bounds) - 1)]
+            partials = [future.result() for future in futures]
+
+            # Reduce (sample sort): every splitter range is gathered from all
+            # shards and sorted by one worker straight into its disjoint slice
+            # of the output buffer, so there is a single parallel level and no
+            # interpreted merge loop
+            futures = []
+            offset = 0
+            for partition in range(len(splitters) + 1):
+                pieces = [(cuts[partition], cuts[partition + 1]) for _, _, cuts in partials]
+                futures.append(pool.submit(_sort_partition, pieces, offset))
+                offset += sum(end - start for start, end in pieces)
+            for future in futures:
+                future.result()
+
+        sorted_values = views[1][:n].tolist()
+    finally:
+        for view in views:
+            view.release()
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    counts = tree_reduce([counts for counts, _, _ in partials], merge_counts)
+    sketch = None
+    if sketch_k:
+        sketch = tree_reduce([sketch for _, sketch, _ in partials], lambda left, right: left.merge(right))
+    return sorted_values, counts, sketch
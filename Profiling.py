@@ -0,0 +1,269 @@
+import os
+import sys
+import time
+from collections import Counter
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# Returned by phase() when no profiler is attached: one shared no-op context
+NULL_PHASE = _NullPhase()
+
+
+def phase(profiler, name, items=0):
+    # Analyzers wrap whole batches or runs in this, never single items, so a
+    # disabled profiler costs one None check per batch
+    return NULL_PHASE if profiler is None else profiler.phase(name, items)
+
+
+class _PhaseStats:
+    __slots__ = ("calls", "elapsed_ns", "items", "allocated_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.elapsed_ns = 0
+        self.items = 0
+        self.allocated_bytes = 0
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "items", "started", "memory")
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        tracemalloc = self.profiler.tracemalloc
+        if tracemalloc is not None:
+            tracemalloc.reset_peak()
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter_ns() - self.started
+        allocated = 0
+        tracemalloc = self.profiler.tracemalloc
+        if tracemalloc is not None:
+            allocated = max(0, tracemalloc.get_traced_memory()[1] - self.memory)
+        self.profiler.record(self.name, elapsed, self.items, allocated)
+        return False
+
+
+class Profiler:
+    # Per-phase wall time, call and item counts (hence items/sec) and, with
+    # track_allocations, the peak bytes allocated inside each phase. Phases
+    # are free-form names; the analyzers use count, sort, select,
+    # heavy_hitters and merge. Allocation tracking runs tracemalloc, which
+    # costs far more than the timers, so it is off by default.
+    def __init__(self, track_allocations=False, sampler=None):
+        self.track_allocations = track_allocations
+        self.sampler = sampler
+        self.phases = {}
+        self.started_at = None
+        self.stopped_at = None
+        # tracemalloc is imported only when allocations are tracked
+        self.tracemalloc = None
+        self._started_tracing = False
+
+    def start(self):
+        if self.track_allocations:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        if self.sampler is not None:
+            self.sampler.start()
+        self.started_at = time.perf_counter()
+        self.stopped_at = None
+        return self
+
+    def stop(self):
+        self.stopped_at = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self._started_tracing:
+            self.tracemalloc.stop()
+            self._started_tracing = False
+        self.tracemalloc = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def phase(self, name, items=0):
+        if self.started_at is None:
+            self.start()
+        return _Phase(self, name, items)
+
+    def record(self, name, elapsed_ns, items=0, allocated_bytes=0):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = _PhaseStats()
+        stats.calls += 1
+        stats.elapsed_ns += elapsed_ns
+        stats.items += items
+        stats.allocated_bytes += allocated_bytes
+
+    def reset(self):
+        self.phases = {}
+        if self.started_at is not None:
+            self.started_at = time.perf_counter()
+
+    def snapshot(self):
+        phases = {}
+        for name, stats in self.phases.items():
+            seconds = stats.elapsed_ns / 1e9
+            phases[name] = {
+                "calls": stats.calls,
+                "seconds": seconds,
+                "items": stats.items,
+                "items_per_sec": stats.items / seconds if seconds > 0 else 0.0,
+                "allocated_bytes": stats.allocated_bytes if self.track_allocations else None,
+            }
+        wall = None
+        if self.started_at is not None:
+            wall = (self.stopped_at or time.perf_counter()) - self.started_at
+        report = {"wall_seconds": wall, "phases": phases}
+        if self.sampler is not None:
+            report["samples"] = self.sampler.snapshot()
+        return report
+
+
+class SamplingProfiler:
+    # Optional statistical profiler: a daemon thread reads the target
+    # thread's stack every interval seconds and counts the stacks it sees.
+    # It catches per-item code paths that are too hot for the phase timers.
+    # Costs are bounded by the interval (roughly 1% at the default) and
+    # there is nothing to pay while it is stopped.
+    def __init__(self, interval=0.005, thread_id=None, max_depth=64):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = None
+        self._thread = None
+
+    def start(self):
+        import threading
+
+        if self._thread is not None:
+            return self
+        if self._stop is None:
+            self._stop = threading.Event()
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def top_functions(self, n=20):
+        # Leaf functions by share of samples, i.e. where the time is spent
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def collapsed(self):
+        # Folded "frame;frame;frame count" lines, the input format of flamegraph tools
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def snapshot(self, n=20):
+        return {"samples": self.samples, "interval": self.interval,
+                "top_functions": [[name, count] for name, count in self.top_functions(n)]}
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_prometheus(profiler, prefix="analyzer", labels=None):
+    # Prometheus text exposition format (suitable for a textfile collector)
+    base = "".join(f',{key}="{_escape_label(value)}"' for key, value in sorted((labels or {}).items()))
+    report = profiler.snapshot()
+    metrics = [
+        ("phase_seconds_total", "counter", "Wall time spent in each analyzer phase", "seconds"),
+        ("phase_calls_total", "counter", "Number of times each analyzer phase ran", "calls"),
+        ("phase_items_total", "counter", "Items handled by each analyzer phase", "items"),
+        ("phase_items_per_second", "gauge", "Items per second of phase time", "items_per_sec"),
+    ]
+    if profiler.track_allocations:
+        metrics.append(("phase_allocated_bytes_total", "counter", "Peak bytes allocated inside each phase",
+                        "allocated_bytes"))
+
+    lines = []
+    for suffix, kind, help_text, field in metrics:
+        name = f"{prefix}_{suffix}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for phase_name, stats in sorted(report["phases"].items()):
+            lines.append(f'{name}{{phase="{_escape_label(phase_name)}"{base}}} {stats[field]}')
+
+    if "samples" in report:
+        name = f"{prefix}_profile_samples_total"
+        lines.append(f"# HELP {name} Sampling profiler hits per leaf function")
+        lines.append(f"# TYPE {name} counter")
+        for function, count in report["samples"]["top_functions"]:
+            lines.append(f'{name}{{function="{_escape_label(function)}"{base}}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def export(profiler, path, format="json", prefix="analyzer", labels=None):
+    # Writes a snapshot to a local file, atomically, so a scraper or reader
+    # never sees a half-written file. format is "json" or "prometheus".
+    import json
+    import tempfile
+
+    if format == "json":
+        body = json.dumps(profiler.snapshot(), indent=2)
+    elif format == "prometheus":
+        body = to_prometheus(profiler, prefix, labels)
+    else:
+        raise ValueError("format must be json or prometheus")
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".profile-")
+    try:
+        with os.fdopen(descriptor, "w") as handle:
+            handle.write(body)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
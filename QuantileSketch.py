@@ -0,0 +1,159 @@
+import bisect
+from array import array
+import math
+import random
+
+# Smallest compactor; tiny low levels would otherwise compact every few items
+MIN_CAPACITY = 8
+
+
+class KLLSketch:
+    # KLL quantile sketch (Karnin, Lang, Liberty). Keeps O(k log(n/k)) items in a
+    # stack of compactors; the item weight doubles with each level. Normalized
+    # rank error is roughly 3.3 / k with high probability, so k=200 gives ~1.7%.
+    def __init__(self, k=200, seed=None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.c = 2.0 / 3.0
+        self.n = 0
+        self.size = 0
+        self.max_size = 0
+        self.compactors = []
+        self.capacities = []
+        self.rng = random.Random(seed)
+        self._sorted_items = None
+        self._cumulative_weights = None
+        self._grow()
+
+    @staticmethod
+    def k_for_error(rank_error):
+        return max(8, math.ceil(3.3 / rank_error))
+
+    def rank_error(self):
+        return 3.3 / self.k
+
+    def _refresh_capacities(self):
+        height = len(self.compactors)
+        self.capacities = [max(int(math.ceil(self.k * self.c ** (height - level - 1))), MIN_CAPACITY)
+                           for level in range(height)]
+        # A full-width level 0 buffers raw items so the cost of compaction is
+        # paid once per k/2 updates rather than every few items
+        self.capacities[0] = max(self.capacities[0], self.k)
+        self.max_size = sum(self.capacities)
+
+    def _grow(self):
+        self.compactors.append([])
+        self._refresh_capacities()
+
+    def update(self, item):
+        self.compactors[0].append(item)
+        self.n += 1
+        self.size += 1
+        self._sorted_items = None
+        if self.size >= self.max_size:
+            self._compress()
+
+    def update_batch(self, items):
+        # Fill level 0 in slices up to the next compaction instead of item by item
+        if not isinstance(items, list):
+            items = list(items)
+        position = 0
+        while position < len(items):
+            room = max(1, self.max_size - self.size)
+            taken = items[position:position + room]
+            self.compactors[0].extend(taken)
+            position += len(taken)
+            self.n += len(taken)
+            self.size += len(taken)
+            if self.size >= self.max_size:
+                self._compress()
+        self._sorted_items = None
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) >= self.capacities[level]:
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                # Sort, keep every other item (random offset) at double weight
+                compactor.sort()
+                odd = len(compactor) % 2
+                promoted = compactor[odd + self.rng.getrandbits(1)::2]
+                self.compactors[level + 1].extend(promoted)
+                self.size -= len(compactor) - odd - len(promoted)
+                del compactor[odd:]
+                if self.size < self.max_size:
+                    break
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self.size = sum(len(items) for items in self.compactors)
+        self._sorted_items = None
+        while self.size >= self.max_size:
+            self._compress()
+        return self
+
+    def to_sections(self):
+        header = array("q", [self.k, self.n])
+        lengths = array("q", [len(items) for items in self.compactors])
+        items = array("q")
+        for level_items in self.compactors:
+            items.extend(level_items)
+        return [header, lengths, items]
+
+    @classmethod
+    def from_sections(cls, sections):
+        header, lengths, items = sections
+        k, n = header.tolist()
+        sketch = cls(k)
+        items = items.tolist()
+        sketch.compactors = []
+        position = 0
+        for length in lengths.tolist():
+            sketch.compactors.append(items[position:position + length])
+            position += length
+        sketch._refresh_capacities()
+        sketch.n = n
+        sketch.size = len(items)
+        return sketch
+
+    def _sorted_view(self):
+        if self._sorted_items is None:
+            weighted = []
+            for level, items in enumerate(self.compactors):
+                weight = 1 << level
+                weighted.extend((item, weight) for item in items)
+            weighted.sort(key=lambda entry: entry[0])
+            cumulative = []
+            running = 0
+            for _, weight in weighted:
+                running += weight
+                cumulative.append(running)
+            self._sorted_items = [item for item, _ in weighted]
+            self._cumulative_weights = cumulative
+        return self._sorted_items, self._cumulative_weights
+
+    def quantile(self, q):
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        if self.n == 0:
+            return None
+        items, cumulative = self._sorted_view()
+        # First item whose cumulative weight exceeds q * total weight
+        index = bisect.bisect_right(cumulative, q * cumulative[-1])
+        return items[min(index, len(items) - 1)]
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    def rank(self, value):
+        if self.n == 0:
+            return 0.0
+        items, cumulative = self._sorted_view()
+        index = bisect.bisect_right(items, value)
+        return cumulative[index - 1] / cumulative[-1] if index else 0.0
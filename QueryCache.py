@@ -0,0 +1,62 @@
+import functools
+from collections import OrderedDict
+
+
+class QueryCache:
+    # Version-stamped memo table. Writers bump the version (O(1)); a cached
+    # entry is served only while its stamp matches, so stale entries are never
+    # returned and nothing is recomputed between updates. At most max_entries
+    # results are kept, least recently used evicted first; stale entries are
+    # never hit, so they age out the same way. Cached results are shared
+    # between callers and must be treated as read-only.
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self.version += 1
+
+    def get(self, key, compute):
+        entries = self.entries
+        entry = entries.get(key)
+        if entry is not None and entry[0] == self.version:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        entries[key] = (self.version, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "version": self.version,
+        }
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def cached_query(method):
+    # Memoizes an analyzer getter in self.query_cache, keyed on its arguments
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, _freeze(args), _freeze(kwargs))
+        return self.query_cache.get(key, lambda: method(self, *args, **kwargs))
+    return wrapper
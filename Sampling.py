@@ -0,0 +1,152 @@
+import math
+import random
+from collections import Counter
+
+from Selection import quantiles_from_sorted
+
+MODES = ("bernoulli", "reservoir")
+
+
+def sample_size_for_error(epsilon, confidence=0.95):
+    # Dvoretzky-Kiefer-Wolfowitz: this many uniform samples keep every rank
+    # (so every quantile and every item's share of the data) within epsilon
+    # of the truth, simultaneously, with the given confidence
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * epsilon * epsilon))
+
+
+def bernoulli_indices(n, rate, rng):
+    # Keeps each position independently with probability rate. Gaps between
+    # kept positions are geometric, so the cost is O(rate * n), not O(n).
+    if rate >= 1:
+        return list(range(n))
+    if rate <= 0:
+        return []
+    log_skip = math.log1p(-rate)
+    indices = []
+    index = -1
+    while True:
+        index += 1 + int(math.log(1.0 - rng.random()) / log_skip)
+        if index >= n:
+            return indices
+        indices.append(index)
+
+
+def reservoir_indices(n, size, rng):
+    # Uniform fixed-size sample of positions (Li's Algorithm L): skips ahead
+    # geometrically, so only O(size * log(n / size)) random draws are made
+    if size >= n:
+        return list(range(n))
+    if size <= 0:
+        return []
+    reservoir = list(range(size))
+    weight = math.exp(math.log(1.0 - rng.random()) / size)
+    index = size - 1
+    while weight < 1:
+        index += 1 + int(math.log(1.0 - rng.random()) / math.log1p(-weight))
+        if index >= n:
+            break
+        reservoir[rng.randrange(size)] = index
+        weight *= math.exp(math.log(1.0 - rng.random()) / size)
+    reservoir.sort()
+    return reservoir
+
+
+class SampleEstimate:
+    # Estimates for the full data from a uniform sample of it. Given its size,
+    # a Bernoulli sample is a uniform draw without replacement, so both modes
+    # share these estimators. Count intervals are Wilson score intervals with
+    # a finite population correction; quantile intervals come from the DKW
+    # bound, which holds for all quantiles at once.
+    def __init__(self, sample, population, confidence=0.95):
+        self.sample = sorted(sample)
+        self.population = population
+        self.size = len(sample)
+        self.confidence = confidence
+        # Imported here: statistics is slow to import and only needed once sampling runs
+        from statistics import NormalDist
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.counts = Counter(self.sample)
+
+    @property
+    def rate(self):
+        return self.size / self.population if self.population else 0.0
+
+    def count_estimate(self, item):
+        # (estimated count, low, high) for one item
+        size, population = self.size, self.population
+        seen = self.counts.get(item, 0)
+        if not size:
+            return 0.0, 0, population
+        share = seen / size
+        estimate = share * population
+        if size >= population:
+            return estimate, seen, seen
+
+        z2 = self.z * self.z
+        correction = math.sqrt((population - size) / (population - 1))
+        denominator = 1 + z2 / size
+        center = (share + z2 / (2 * size)) / denominator
+        half = self.z / denominator * math.sqrt(share * (1 - share) / size + z2 / (4 * size * size)) * correction
+        # The sample itself bounds the count: seen copies exist, and every
+        # unsampled position could at most be this item
+        low = max(seen, (center - half) * population)
+        high = min(population - (size - seen), (center + half) * population)
+        return estimate, low, high
+
+    def frequency_counts(self):
+        return {item: self.count_estimate(item) for item in self.counts}
+
+    def heavy_hitters(self, threshold, guaranteed=False):
+        # [(item, estimate, low, high)], largest first; guaranteed keeps only
+        # items whose lower bound already reaches the threshold
+        hitters = []
+        for item in self.counts:
+            estimate, low, high = self.count_estimate(item)
+            if (low if guaranteed else estimate) >= threshold:
+                hitters.append((item, estimate, low, high))
+        hitters.sort(key=lambda entry: entry[1], reverse=True)
+        return hitters
+
+    def rank_error(self):
+        # Half-width of the DKW band on the empirical CDF
+        if not self.size:
+            return 1.0
+        return math.sqrt(math.log(2 / (1 - self.confidence)) / (2 * self.size))
+
+    def quantiles(self, qs, method="linear"):
+        # [(estimate, low, high)] for each q in [0, 1]
+        if not self.size:
+            return []
+        epsilon = self.rank_error() if self.size < self.population else 0.0
+        estimates = quantiles_from_sorted(self.sample, qs, method)
+        lows = quantiles_from_sorted(self.sample, [max(0.0, q - epsilon) for q in qs], "lower")
+        highs = quantiles_from_sorted(self.sample, [min(1.0, q + epsilon) for q in qs], "higher")
+        return list(zip(estimates, lows, highs))
+
+
+def draw_sample(data, rate=None, size=None, target_error=None, mode="bernoulli", confidence=0.95, seed=None):
+    # Samples a sequence (list or NumPy array) and returns a SampleEstimate.
+    # Set exactly one of rate, size (expected size in Bernoulli mode) or
+    # target_error (the DKW epsilon at the given confidence).
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+    if sum(option is not None for option in (rate, size, target_error)) != 1:
+        raise ValueError("set exactly one of rate, size or target_error")
+    n = len(data)
+    if target_error is not None:
+        size = sample_size_for_error(target_error, confidence)
+    if rate is None:
+        rate = min(1.0, size / n) if n else 1.0
+    elif size is None:
+        size = math.ceil(rate * n)
+
+    rng = random.Random(seed)
+    if mode == "bernoulli":
+        indices = bernoulli_indices(n, rate, rng)
+    else:
+        indices = reservoir_indices(n, size, rng)
+    if hasattr(data, "dtype"):
+        sample = data[indices].tolist()
+    else:
+        sample = [data[index] for index in indices]
+    return SampleEstimate(sample, n, confidence)
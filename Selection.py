@@ -0,0 +1,172 @@
+import bisect
+import math
+import random
+
+from Summary import values_at_ranks
+
+# Segments this short are finished with the built-in sort
+SMALL_SEGMENT = 32
+
+# Interpolation methods, named and computed as in np.quantile / np.percentile
+DISCRETE_METHODS = ("inverted_cdf", "closest_observation", "lower", "higher", "nearest")
+CONTINUOUS_METHODS = {
+    # method -> (alpha, beta) of Hyndman & Fan's continuous sample quantiles
+    "interpolated_inverted_cdf": (0.0, 1.0),
+    "hazen": (0.5, 0.5),
+    "weibull": (0.0, 0.0),
+    "median_unbiased": (1 / 3.0, 1 / 3.0),
+    "normal_unbiased": (3 / 8.0, 3 / 8.0),
+}
+METHODS = DISCRETE_METHODS + ("averaged_inverted_cdf", "linear", "midpoint") + tuple(CONTINUOUS_METHODS)
+
+_rng = random.Random()
+
+
+def _discrete_index(n, q, method):
+    if method == "lower":
+        return math.floor((n - 1) * q)
+    if method == "higher":
+        return math.ceil((n - 1) * q)
+    if method == "nearest":
+        # round() breaks ties to even, like np.around
+        return round((n - 1) * q)
+    if method == "inverted_cdf":
+        index = n * q - 1
+        previous = math.floor(index)
+        chosen = previous if index == previous else previous + 1
+    else:  # closest_observation: nearest order statistic, even (1-based) on ties
+        index = n * q - 1.5
+        previous = math.floor(index)
+        chosen = previous if index == previous and previous % 2 == 1 else previous + 1
+    return max(chosen, 0)
+
+
+def quantile_positions(n, qs, method="linear"):
+    # For each q, (lower rank, upper rank, weight of the upper value) in the
+    # sorted data; discrete methods give lower == upper and weight None
+    if method not in METHODS:
+        raise ValueError(f"{method!r} is not a valid method. Use one of: {', '.join(METHODS)}")
+    if n < 1:
+        raise ValueError("cannot take quantiles of an empty sequence")
+    positions = []
+    for q in qs:
+        if not 0 <= q <= 1:
+            raise ValueError("Quantiles must be in the range [0, 1]")
+        if method in DISCRETE_METHODS:
+            rank = min(_discrete_index(n, q, method), n - 1)
+            positions.append((rank, rank, None))
+            continue
+
+        if method == "linear":
+            index = (n - 1) * q
+        elif method == "midpoint":
+            index = 0.5 * (math.floor((n - 1) * q) + math.ceil((n - 1) * q))
+        elif method == "averaged_inverted_cdf":
+            index = n * q - 1
+        else:
+            alpha, beta = CONTINUOUS_METHODS[method]
+            index = n * q + (alpha + q * (1 - alpha - beta)) - 1
+
+        lower = math.floor(index)
+        weight = index - lower
+        if method == "averaged_inverted_cdf":
+            weight = 0.5 if weight == 0 else 1.0
+        elif method == "midpoint":
+            weight = 0.0 if index % 1 == 0 else 0.5
+        if index >= n - 1:
+            lower = upper = n - 1
+        elif index < 0:
+            lower = upper = 0
+        else:
+            upper = lower + 1
+        positions.append((lower, upper, weight))
+    return positions
+
+
+def _interpolate(positions, value_at):
+    results = []
+    for lower, upper, weight in positions:
+        low = value_at[lower]
+        if weight is None:
+            results.append(low)
+            continue
+        # Same lerp form as NumPy, so the float results match bit for bit
+        high = value_at[upper]
+        difference = high - low
+        results.append(high - difference * (1 - weight) if weight >= 0.5 else low + difference * weight)
+    return results
+
+
+def _wanted_ranks(positions):
+    return sorted({rank for lower, upper, _ in positions for rank in (lower, upper)})
+
+
+def select_ranks(values, ranks):
+    # Values at the given 0-based sorted positions without a full sort. Each
+    # partition step hands every pending rank to the side of the pivot that
+    # holds it, so one pass of shrinking segments resolves all ranks at once
+    # (expected O(n) for a handful of ranks). NumPy arrays use np.partition.
+    if hasattr(values, "dtype"):
+        import numpy as np
+        partitioned = np.partition(values, sorted(set(ranks)))
+        return dict(zip(ranks, partitioned[list(ranks)].tolist()))
+
+    found = {}
+    pending = [(list(values), 0, sorted(set(ranks)))]
+    while pending:
+        segment, offset, wanted = pending.pop()
+        if len(segment) <= SMALL_SEGMENT:
+            segment.sort()
+            for rank in wanted:
+                found[rank] = segment[rank - offset]
+            continue
+
+        # Median of three random elements keeps bad splits unlikely
+        pivot = sorted(_rng.sample(segment, 3))[1]
+        lower = [value for value in segment if value < pivot]
+        upper = [value for value in segment if pivot < value]
+        lower_end = offset + len(lower)
+        equal_end = offset + len(segment) - len(upper)
+
+        first_equal = bisect.bisect_left(wanted, lower_end)
+        first_upper = bisect.bisect_left(wanted, equal_end)
+        for rank in wanted[first_equal:first_upper]:
+            found[rank] = pivot
+        if first_equal:
+            pending.append((lower, offset, wanted[:first_equal]))
+        if first_upper < len(wanted):
+            pending.append((upper, equal_end, wanted[first_upper:]))
+    return found
+
+
+def quantiles_with(n, qs, select, method="linear"):
+    # Quantiles of n values reachable only through select(ranks), which
+    # returns {rank: value} for a sorted list of 0-based ranks
+    positions = quantile_positions(n, qs, method)
+    return _interpolate(positions, select(_wanted_ranks(positions)))
+
+
+def quantiles(values, qs, method="linear"):
+    # Exact quantiles (q in [0, 1]) of unsorted values, matching np.quantile
+    return quantiles_with(len(values), qs, lambda ranks: select_ranks(values, ranks), method)
+
+
+def percentiles(values, ps, method="linear"):
+    # Same as quantiles() with p in [0, 100], matching np.percentile
+    return quantiles(values, [p / 100 for p in ps], method)
+
+
+def quantiles_from_sorted(sorted_values, qs, method="linear"):
+    # Already sorted input: every rank is a direct index
+    return _interpolate(quantile_positions(len(sorted_values), qs, method), sorted_values)
+
+
+def quantiles_from_counts(counts, qs, method="linear"):
+    # Quantiles of the multiset described by a {value: count} table
+    return quantiles_with(sum(counts.values()), qs,
+                          lambda ranks: dict(zip(ranks, values_at_ranks(counts, ranks))), method)
+
+
+def label_percentiles(ps, values):
+    # The "{p}th Percentile" keys every analyzer reports its estimates under
+    return {f"{p}th Percentile": value for p, value in zip(ps, values)}
@@ -0,0 +1,198 @@
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+
+import Analyzers
+
+PROBE_SIZE = 4096
+# Backends that keep the whole stream at full accuracy, so any of them may
+# stand in for another (sketch and sliding_window trade that away)
+CANDIDATES = ("greedy", "divide_and_conquer", "decrease_and_conquer", "vectorized")
+CALIBRATION_SIZES = (10000, 100000, 500000)
+CALIBRATION_CARDINALITIES = (16, 4096, 1 << 20)
+CALIBRATION_BATCH = 1 << 16
+DEFAULT_PROFILE = os.environ.get("ANALYZER_PROFILE", os.path.join(os.path.expanduser("~"), ".analyzer_calibration.json"))
+PROFILE_VERSION = 1
+
+
+def hardware_fingerprint():
+    # A profile only transfers to the same machine type and interpreter
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "implementation": platform.python_implementation(),
+        "python": platform.python_version(),
+    }
+
+
+def estimate_distinct(probe, population):
+    # Guaranteed-error estimator (Charikar et al.): values seen once in the
+    # probe stand for sqrt(N / r) values each, repeated ones only for themselves
+    if not probe:
+        return 0
+    frequencies = Counter(Counter(probe).values())
+    singletons = frequencies.get(1, 0)
+    repeated = sum(count for times, count in frequencies.items() if times > 1)
+    estimate = math.sqrt(population / len(probe)) * singletons + repeated
+    return int(min(population, max(singletons + repeated, estimate)))
+
+
+def probe(data, probe_size=PROBE_SIZE, population=None, seed=0):
+    # Input size and distinct-count estimate from a small random probe. Pass
+    # population when data is itself only a prefix or sample of the input.
+    n = len(data)
+    if n > probe_size:
+        rng = random.Random(seed)
+        picked = [data[index] for index in rng.sample(range(n), probe_size)]
+    else:
+        picked = list(data)
+    if hasattr(data, "dtype"):
+        picked = [value.item() for value in picked]
+    population = n if population is None else population
+    return {"n": population, "distinct": estimate_distinct(picked, population)}
+
+
+def _calibration_data(n, cardinality, seed):
+    rng = random.Random(seed)
+    return [rng.randrange(cardinality) for _ in range(n)]
+
+
+def _time_backend(name, data, repeat):
+    Analyzers.load(name)  # keep the module import out of the timings
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        analyzer = Analyzers.create(name, max(1, len(data) // 20))
+        for i in range(0, len(data), CALIBRATION_BATCH):
+            analyzer.process_batch(data[i:i + CALIBRATION_BATCH])
+        analyzer.get_heavy_hitters()
+        analyzer.get_quantiles()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(backends=CANDIDATES, sizes=CALIBRATION_SIZES, cardinalities=CALIBRATION_CARDINALITIES, repeat=3,
+              seed=0, log=None):
+    # Times every backend on a grid of input sizes and cardinalities and
+    # returns the profile (seconds per item at each grid point)
+    points = []
+    for n in sizes:
+        for cardinality in cardinalities:
+            cardinality = min(cardinality, n)
+            data = _calibration_data(n, cardinality, seed)
+            distinct = len(set(data))
+            seconds_per_item = {}
+            for name in backends:
+                seconds_per_item[name] = _time_backend(name, data, repeat) / n
+                if log:
+                    log(f"{n:>9} {distinct:>9} {name:>24} {seconds_per_item[name] * 1e9:10.1f} ns/item")
+            points.append({"n": n, "distinct": distinct, "seconds_per_item": seconds_per_item})
+    return {
+        "version": PROFILE_VERSION,
+        "created": time.time(),
+        "hardware": hardware_fingerprint(),
+        "backends": list(backends),
+        "points": points,
+    }
+
+
+def save_profile(profile, path=DEFAULT_PROFILE):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w") as handle:
+        json.dump(profile, handle, indent=2)
+    os.replace(temporary, path)
+
+
+def load_profile(path=DEFAULT_PROFILE, require_same_hardware=True):
+    # The stored profile, or None when it is missing, from an older format,
+    # or was measured on different hardware
+    try:
+        with open(path) as handle:
+            profile = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if profile.get("version") != PROFILE_VERSION:
+        return None
+    if require_same_hardware and profile.get("hardware") != hardware_fingerprint():
+        return None
+    return profile
+
+
+def choose_backend(features, profile=None):
+    # Fastest backend at the calibration point nearest to the input, in
+    # log(n) x log(distinct) space. Without a profile: vectorized when NumPy
+    # is installed (fastest on every grid point measured so far), else the
+    # batch-tallying decrease-and-conquer backend
+    if not profile or not profile.get("points"):
+        return "vectorized" if importlib.util.find_spec("numpy") else "decrease_and_conquer"
+
+    def distance(point):
+        return (math.log10(max(features["n"], 1)) - math.log10(max(point["n"], 1))) ** 2 + \
+               (math.log10(max(features["distinct"], 1)) - math.log10(max(point["distinct"], 1))) ** 2
+
+    nearest = min(profile["points"], key=distance)
+    timings = nearest["seconds_per_item"]
+    return min(timings, key=timings.get)
+
+
+def auto_create(data, heavy_hitter_threshold, profile_path=DEFAULT_PROFILE, recalibrate=False, population=None,
+                **options):
+    # Picks a backend for data (or a prefix of it, with population set) and
+    # returns (backend name, new analyzer). recalibrate=True, or a missing or
+    # foreign-hardware profile with recalibrate="auto", runs calibrate() first.
+    profile = load_profile(profile_path)
+    if recalibrate is True or (recalibrate == "auto" and profile is None):
+        profile = calibrate()
+        save_profile(profile, profile_path)
+    name = choose_backend(probe(data, population=population), profile)
+    return name, Analyzers.create(name, heavy_hitter_threshold, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate and inspect the analyzer backend selector")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrate_parser = commands.add_parser("calibrate", help="time every backend and save the profile")
+    calibrate_parser.add_argument("--output", default=DEFAULT_PROFILE)
+    calibrate_parser.add_argument("--backends", default=",".join(CANDIDATES))
+    calibrate_parser.add_argument("--sizes", default=",".join(map(str, CALIBRATION_SIZES)))
+    calibrate_parser.add_argument("--cardinalities", default=",".join(map(str, CALIBRATION_CARDINALITIES)))
+    calibrate_parser.add_argument("--repeat", type=int, default=3)
+
+    choose_parser = commands.add_parser("choose", help="show the backend picked for a given input shape")
+    choose_parser.add_argument("--profile", default=DEFAULT_PROFILE)
+    choose_parser.add_argument("--n", type=int, required=True)
+    choose_parser.add_argument("--distinct", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        backends = [name for name in args.backends.split(",") if name]
+        unknown = [name for name in backends if name not in Analyzers.BACKENDS]
+        if unknown:
+            parser.error("unknown backends: " + ", ".join(unknown))
+        profile = calibrate(backends, [int(size) for size in args.sizes.split(",")],
+                            [int(cardinality) for cardinality in args.cardinalities.split(",")], args.repeat,
+                            log=print)
+        save_profile(profile, args.output)
+        print("Saved calibration profile to", args.output)
+    else:
+        profile = load_profile(args.profile)
+        if profile is None:
+            print("No calibration profile for this hardware; using the built-in rule", file=sys.stderr)
+        print(choose_backend({"n": args.n, "distinct": args.distinct}, profile))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
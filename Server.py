@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+# Frame: op (uint8) + payload length (uint32), little-endian, then the payload.
+# Ingest payloads are int64 values; query payloads are int64 keys / float64
+# quantiles; every query gets a frame back with the same op and a JSON body.
+FRAME_HEADER = struct.Struct("<BI")
+MAX_FRAME_BYTES = 64 << 20
+
+OP_INGEST = 1
+OP_HEAVY_HITTERS = 2
+OP_QUANTILES = 3
+OP_FREQUENCY = 4
+OP_STATS = 5
+OP_FLUSH = 6
+OP_DISTINCT = 7
+OP_ERROR = 255
+
+# Size of each value in the payload of the ops that carry values
+PAYLOAD_ITEM_BYTES = {OP_INGEST: 8, OP_HEAVY_HITTERS: 8, OP_QUANTILES: 8, OP_FREQUENCY: 8}
+
+
+def _to_int64s(payload):
+    values = array("q")
+    values.frombytes(payload)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _from_int64s(values):
+    values = array("q", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+class AnalyzerServer:
+    # Feeds one analyzer from many producers. Ingest frames go through a bounded
+    # queue (a full queue stops reading from producers' sockets, so TCP pushes
+    # back on them), small frames are coalesced into process_batch calls of up
+    # to coalesce_items, and the loop yields between batches so queries are
+    # answered between them instead of behind the whole backlog.
+    def __init__(self, analyzer, max_pending_batches=64, coalesce_items=1 << 16):
+        self.analyzer = analyzer
+        self.coalesce_items = coalesce_items
+        self.queue = asyncio.Queue(max_pending_batches)
+        self.items_processed = 0
+        self.batches_processed = 0
+        self.started_at = time.perf_counter()
+        self.query_latencies = deque(maxlen=10000)
+        self.failed_batches = 0
+        self.last_error = None
+        self.servers = []
+        self._consumer = None
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._start_consumer()
+        self.servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._start_consumer()
+        self.servers.append(server)
+        return server
+
+    def _start_consumer(self):
+        if self._consumer is None:
+            self.started_at = time.perf_counter()
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        if self._consumer is not None:
+            if self._consumer.done():
+                self._report_dead_consumer()
+            else:
+                self._consumer.cancel()
+                try:
+                    await self._consumer
+                except asyncio.CancelledError:
+                    pass
+
+    def _consumer_error(self):
+        # Why the consumer task stopped, or None while it is running
+        consumer = self._consumer
+        if consumer is None or not consumer.done():
+            return None
+        if consumer.cancelled():
+            return "the ingest consumer was cancelled"
+        return f"the ingest consumer stopped: {consumer.exception()!r}"
+
+    def _report_dead_consumer(self):
+        error = self._consumer_error()
+        if error is not None:
+            print(error, file=sys.stderr)
+
+    async def _drain(self):
+        # Waits until every queued batch is processed; False if the consumer
+        # died first (its queued batches will never be taken)
+        if self._consumer_error() is not None:
+            return False
+        joined = asyncio.ensure_future(self.queue.join())
+        await asyncio.wait((joined, self._consumer), return_when=asyncio.FIRST_COMPLETED)
+        if not joined.done():
+            joined.cancel()
+            return False
+        return True
+
+    async def _consume(self):
+        while True:
+            batch = await self.queue.get()
+            taken = 1
+            # Coalesce whatever else is already waiting, up to coalesce_items
+            while len(batch) < self.coalesce_items and not self.queue.empty():
+                batch.extend(self.queue.get_nowait())
+                taken += 1
+            try:
+                self.analyzer.process_batch(batch)
+                self.items_processed += len(batch)
+                self.batches_processed += 1
+            except Exception as error:
+                # A bad batch is dropped and reported; the consumer keeps going
+                # so FLUSH and the producers behind the queue are not stranded
+                self.failed_batches += 1
+                self.last_error = repr(error)
+                print(f"process_batch failed on {len(batch)} items: {error!r}", file=sys.stderr)
+            finally:
+                for _ in range(taken):
+                    self.queue.task_done()
+            await asyncio.sleep(0)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                op, length = FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    await self._reply(writer, OP_ERROR, {"error": "frame too large"})
+                    break
+                payload = await reader.readexactly(length) if length else b""
+
+                if op == OP_INGEST:
+                    if length % PAYLOAD_ITEM_BYTES[OP_INGEST]:
+                        await self._reply(writer, OP_ERROR, {"error": "ingest payload must be int64 values"})
+                        break
+                    error = self._consumer_error()
+                    if error is not None:
+                        await self._reply(writer, OP_ERROR, {"error": error})
+                        break
+                    await self.queue.put(_to_int64s(payload))
+                    continue
+
+                started = time.perf_counter()
+                if op == OP_FLUSH:
+                    # Earlier ingest frames on this connection are already queued
+                    if await self._drain():
+                        response = {"items_processed": self.items_processed, "failed_batches": self.failed_batches}
+                    else:
+                        op, response = OP_ERROR, {"error": self._consumer_error()}
+                elif op in PAYLOAD_ITEM_BYTES and len(payload) % PAYLOAD_ITEM_BYTES[op]:
+                    op, response = OP_ERROR, {"error": f"payload must be {PAYLOAD_ITEM_BYTES[op]}-byte values"}
+                else:
+                    try:
+                        response = self._answer(op, payload)
+                    except ValueError as error:
+                        op, response = OP_ERROR, {"error": str(error)}
+                    except Exception as error:
+                        # An analyzer that cannot answer (missing method, bug)
+                        # fails this query only, not the connection
+                        print(f"query op {op} failed: {error!r}", file=sys.stderr)
+                        op, response = OP_ERROR, {"error": repr(error)}
+                self.query_latencies.append(time.perf_counter() - started)
+                await self._reply(writer, op, response)
+        finally:
+            writer.close()
+
+    def _answer(self, op, payload):
+        analyzer = self.analyzer
+        if op == OP_HEAVY_HITTERS:
+            k = _to_int64s(payload)[0] if payload else None
+            hitters = analyzer.get_top_k(k) if k else analyzer.get_heavy_hitters()
+            return {"heavy_hitters": [list(entry) for entry in hitters]}
+        if op == OP_QUANTILES:
+            qs = struct.unpack(f"<{len(payload) // 8}d", payload) if payload else (0.5, 0.99, 0.999)
+            return {"quantiles": [[q, value] for q, value in analyzer.get_quantiles(qs).items()]}
+        if op == OP_FREQUENCY:
+            return {"frequencies": [[key, *analyzer.get_frequency_estimate(key)] for key in _to_int64s(payload)]}
+        if op == OP_DISTINCT:
+            return {"distinct": analyzer.get_distinct_count()}
+        if op == OP_STATS:
+            return self.stats()
+        raise ValueError(f"unknown op {op}")
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at
+        latencies = sorted(self.query_latencies)
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else 0.0
+        return {
+            "items_processed": self.items_processed,
+            "batches_processed": self.batches_processed,
+            "items_per_sec": self.items_processed / elapsed if elapsed > 0 else 0.0,
+            "pending_batches": self.queue.qsize(),
+            "failed_batches": self.failed_batches,
+            "last_error": self.last_error,
+            "queries": len(latencies),
+            "query_p99_ms": p99 * 1000,
+        }
+
+    @staticmethod
+    async def _reply(writer, op, response):
+        body = json.dumps(response).encode()
+        writer.write(FRAME_HEADER.pack(op, len(body)) + body)
+        await writer.drain()
+
+
+class AnalyzerClient:
+    # Minimal client for the frame protocol above; one request in flight at a time
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect_tcp(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def send_batch(self, values):
+        payload = _from_int64s(values)
+        self.writer.write(FRAME_HEADER.pack(OP_INGEST, len(payload)) + payload)
+        await self.writer.drain()
+
+    async def _request(self, op, payload=b""):
+        self.writer.write(FRAME_HEADER.pack(op, len(payload)) + payload)
+        await self.writer.drain()
+        reply_op, length = FRAME_HEADER.unpack(await self.reader.readexactly(FRAME_HEADER.size))
+        response = json.loads(await self.reader.readexactly(length))
+        if reply_op == OP_ERROR:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def heavy_hitters(self, k=None):
+        response = await self._request(OP_HEAVY_HITTERS, _from_int64s([k]) if k else b"")
+        return [tuple(entry) for entry in response["heavy_hitters"]]
+
+    async def quantiles(self, qs=(0.5, 0.99, 0.999)):
+        response = await self._request(OP_QUANTILES, struct.pack(f"<{len(qs)}d", *qs))
+        return {q: value for q, value in response["quantiles"]}
+
+    async def frequencies(self, keys):
+        response = await self._request(OP_FREQUENCY, _from_int64s(keys))
+        return {key: (count, error) for key, count, error in response["frequencies"]}
+
+    async def distinct(self):
+        return (await self._request(OP_DISTINCT))["distinct"]
+
+    async def stats(self):
+        return await self._request(OP_STATS)
+
+    async def flush(self):
+        return await self._request(OP_FLUSH)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _serve(args):
+    import Analyzers
+
+    options = {"capacity": args.capacity} if args.capacity else {}
+    if args.checkpoint:
+        # Picks up where the last run stopped; ingest then goes through the delta log
+        from Checkpoint import Checkpointer
+        analyzer = Checkpointer.resume(args.checkpoint, lambda: Analyzers.create(args.backend, args.threshold, **options),
+                                       every_seconds=args.checkpoint_interval)
+        print("Checkpointing to", args.checkpoint)
+    else:
+        analyzer = Analyzers.create(args.backend, args.threshold, **options)
+    server = AnalyzerServer(analyzer, args.max_pending, args.coalesce_items)
+    if args.unix:
+        await server.start_unix(args.unix)
+        print("Listening on", args.unix)
+    else:
+        tcp = await server.start_tcp(args.host, args.port)
+        print("Listening on", tcp.sockets[0].getsockname())
+    try:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            print(server.stats())
+    finally:
+        await server.close()
+        if args.checkpoint:
+            analyzer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ingestion server in front of an analyzer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--backend", default="divide_and_conquer", help="analyzer backend from Analyzers.BACKENDS")
+    parser.add_argument("--threshold", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=None, help="Space-Saving counters (bounded memory)")
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--coalesce-items", type=int, default=1 << 16)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--checkpoint", help="snapshot and delta-log path; state is restored from it on start")
+    parser.add_argument("--checkpoint-interval", type=float, default=300.0, help="seconds between snapshots")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,172 @@
+import heapq
+import math
+import time
+from collections import deque
+
+from QuantileSketch import KLLSketch
+
+
+class _Bucket:
+    __slots__ = ("key", "count", "counts", "sketch")
+
+    def __init__(self, key, quantile_k):
+        self.key = key
+        self.count = 0
+        self.counts = {}
+        self.sketch = KLLSketch(quantile_k)
+
+
+class SlidingWindowAnalyzer:
+    # Heavy hitters and quantiles over the last window_items items or the last
+    # window_seconds seconds. The window is cut into buckets, each holding its
+    # own counts and KLL sketch; whole buckets expire at once and their counts
+    # are subtracted from a running total, so expiry is amortized O(1) per item
+    # and the window edge is accurate to one bucket. Late (out-of-order)
+    # timestamps go into the bucket covering them, so buckets stay in time
+    # order; items already older than the window are dropped and counted in
+    # late_items_dropped.
+    def __init__(self, heavy_hitter_threshold, window_items=None, window_seconds=None, buckets=16,
+                 quantile_k=200, clock=time.monotonic):
+        if (window_items is None) == (window_seconds is None):
+            raise ValueError("set exactly one of window_items or window_seconds")
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.window_items = window_items
+        self.window_seconds = window_seconds
+        self.quantile_k = quantile_k
+        self.clock = clock
+        if window_items is not None:
+            self.bucket_items = max(1, math.ceil(window_items / buckets))
+        else:
+            self.bucket_seconds = window_seconds / buckets
+        self.buckets = deque()
+        self.frequency_counts = {}
+        self.items_in_window = 0
+        self.latest_timestamp = None
+        self.late_items_dropped = 0
+        self._merged_sketch = None
+
+    def _current_bucket(self, timestamp):
+        if self.window_items is not None:
+            if not self.buckets or self.buckets[-1].count >= self.bucket_items:
+                self.buckets.append(_Bucket(None, self.quantile_k))
+                self._expire_items()
+        else:
+            key = math.floor(timestamp / self.bucket_seconds)
+            if self.latest_timestamp is not None and \
+                    (key + 1) * self.bucket_seconds <= self.latest_timestamp - self.window_seconds:
+                # Already out of the window, even when advance() emptied it
+                return None
+            if self.buckets and key < self.buckets[-1].key:
+                return self._late_bucket(key)
+            if self.latest_timestamp is None or timestamp > self.latest_timestamp:
+                self.latest_timestamp = timestamp
+            if not self.buckets or self.buckets[-1].key != key:
+                self.buckets.append(_Bucket(key, self.quantile_k))
+                self._expire_time(timestamp)
+        return self.buckets[-1]
+
+    def _late_bucket(self, key):
+        # The bucket for a timestamp older than the newest bucket but still
+        # inside the window: the one already covering it, or a new one
+        # slotted in by key
+        buckets = self.buckets
+        index = len(buckets) - 1
+        while index >= 0 and buckets[index].key > key:
+            index -= 1
+        if index >= 0 and buckets[index].key == key:
+            return buckets[index]
+        bucket = _Bucket(key, self.quantile_k)
+        buckets.insert(index + 1, bucket)
+        return bucket
+
+    def _drop_oldest(self):
+        bucket = self.buckets.popleft()
+        counts = self.frequency_counts
+        for item, count in bucket.counts.items():
+            remaining = counts[item] - count
+            if remaining:
+                counts[item] = remaining
+            else:
+                del counts[item]
+        self.items_in_window -= bucket.count
+        self._merged_sketch = None
+
+    def _expire_items(self):
+        # Keep at least window_items items: drop the oldest bucket only while
+        # the newer buckets already cover the window on their own
+        while len(self.buckets) > 1 and self.items_in_window - self.buckets[0].count >= self.window_items:
+            self._drop_oldest()
+
+    def _expire_time(self, now):
+        if self.latest_timestamp is None or now > self.latest_timestamp:
+            self.latest_timestamp = now
+        horizon = now - self.window_seconds
+        while self.buckets and (self.buckets[0].key + 1) * self.bucket_seconds <= horizon:
+            self._drop_oldest()
+
+    def process_item(self, item, timestamp=None):
+        if self.window_seconds is not None and timestamp is None:
+            timestamp = self.clock()
+        bucket = self._current_bucket(timestamp)
+        if bucket is None:
+            self.late_items_dropped += 1
+            return
+        bucket.count += 1
+        bucket.counts[item] = bucket.counts.get(item, 0) + 1
+        bucket.sketch.update(item)
+        self.frequency_counts[item] = self.frequency_counts.get(item, 0) + 1
+        self.items_in_window += 1
+        self._merged_sketch = None
+
+    def process_batch(self, data_batch, timestamp=None):
+        if self.window_seconds is not None and timestamp is None:
+            timestamp = self.clock()
+        for item in data_batch:
+            self.process_item(item, timestamp)
+
+    process_sample = process_batch
+
+    def advance(self, now=None):
+        # Expires time-based buckets without new data arriving
+        if self.window_seconds is not None:
+            self._expire_time(self.clock() if now is None else now)
+
+    def get_frequency_counts(self):
+        self.advance()
+        return dict(self.frequency_counts)
+
+    def get_frequency_estimate(self, item):
+        self.advance()
+        return self.frequency_counts.get(item, 0), 0
+
+    def get_distinct_count(self):
+        self.advance()
+        return len(self.frequency_counts)
+
+    def get_heavy_hitters(self):
+        self.advance()
+        hitters = [(item, count, 0) for item, count in self.frequency_counts.items()
+                   if count >= self.heavy_hitter_threshold]
+        hitters.sort(key=lambda entry: entry[1], reverse=True)
+        return hitters
+
+    def get_top_k(self, k):
+        self.advance()
+        return [(item, count, 0) for item, count in heapq.nlargest(k, self.frequency_counts.items(), key=lambda entry: entry[1])]
+
+    def _window_sketch(self):
+        self.advance()
+        if self._merged_sketch is None:
+            merged = KLLSketch(self.quantile_k)
+            for bucket in self.buckets:
+                merged.merge(bucket.sketch)
+            self._merged_sketch = merged
+        return self._merged_sketch
+
+    def get_quantile_estimate(self, q=0.5):
+        return self._window_sketch().quantile(q)
+
+    def get_quantiles(self, qs=(0.5, 0.99, 0.999)):
+        return {q: estimate for q, estimate in zip(qs, self._window_sketch().quantiles(qs))}
@@ -0,0 +1,107 @@
+import heapq
+from collections import Counter
+
+# Runs of this length are sorted with the built-in sort before merging starts
+MIN_RUN = 1024
+
+# Integer inputs whose value span is at most max(COUNTING_MIN_SPAN, n) are
+# sorted by counting in O(n + span) instead of by comparisons
+COUNTING_MIN_SPAN = 1 << 16
+
+
+def bottom_up_merge_sort(values):
+    # Iterative merge sort that ping-pongs between the input copy and one
+    # scratch list, so peak memory is about 2n and there is no recursion
+    source = list(values)
+    n = len(source)
+    for start in range(0, n, MIN_RUN):
+        source[start:start + MIN_RUN] = sorted(source[start:start + MIN_RUN])
+    if n <= MIN_RUN:
+        return source
+
+    target = [None] * n
+    width = MIN_RUN
+    while width < n:
+        for start in range(0, n, 2 * width):
+            mid = min(start + width, n)
+            end = min(start + 2 * width, n)
+            if mid == end or not source[mid] < source[mid - 1]:
+                # Lone or already ordered pair of runs
+                target[start:end] = source[start:end]
+            else:
+                _merge_runs(source, target, start, mid, end)
+        source, target = target, source
+        width *= 2
+    return source
+
+
+def _merge_runs(source, target, start, mid, end):
+    left, right, out = start, mid, start
+    left_value = source[left]
+    right_value = source[right]
+    while True:
+        if right_value < left_value:
+            target[out] = right_value
+            out += 1
+            right += 1
+            if right == end:
+                target[out:end] = source[left:mid]
+                return
+            right_value = source[right]
+        else:
+            target[out] = left_value
+            out += 1
+            left += 1
+            if left == mid:
+                target[out:end] = source[right:end]
+                return
+            left_value = source[left]
+
+
+def kway_merge(runs):
+    # Heap-based merge of presorted runs
+    if len(runs) == 1:
+        return list(runs[0])
+    return list(heapq.merge(*runs))
+
+
+def bounded_counts(values, max_span=None):
+    # {value: count} in ascending value order when values are ints within a
+    # bounded span, else None. min/max reject wide or non-integer inputs
+    # before the tally, which runs in C via Counter.
+    if len(values) == 0:
+        return None
+    low, high = min(values), max(values)
+    if type(low) is not int or type(high) is not int:
+        return None
+    if max_span is None:
+        max_span = max(COUNTING_MIN_SPAN, len(values))
+    if high - low >= max_span:
+        return None
+    tally = Counter(values)
+    if len(tally) > 1 and not all(type(value) is int for value in tally):
+        return None
+    if len(tally) * 8 < high - low:
+        # Few distinct keys in a wide span: sorting the keys beats walking the span
+        return {value: tally[value] for value in sorted(tally)}
+    return {value: tally[value] for value in range(low, high + 1) if value in tally}
+
+
+def expand_counts(counts):
+    # The sorted sequence described by an ascending {value: count} table
+    expanded = []
+    for value, count in counts.items():
+        expanded += [value] * count
+    return expanded
+
+
+def counting_sort(values, max_span=None):
+    # Counting sort for bounded integer domains; None when the domain is not bounded
+    counts = bounded_counts(values, max_span)
+    return None if counts is None else expand_counts(counts)
+
+
+def sort_numbers(values):
+    # Counting sort when the values allow it, otherwise the bottom-up merge sort
+    counts = bounded_counts(values)
+    return bottom_up_merge_sort(values) if counts is None else expand_counts(counts)
@@ -0,0 +1,79 @@
+import struct
+from array import array
+
+# Binary summary layout (8-byte aligned after the header):
+#   header: magic, version, kind, section count, little-endian
+#   int64 section lengths, then each int64 section back to back, in native
+#   byte order so they can be read in place without copying; summaries only
+#   move between machines of the same byte order
+MAGIC = b"ASUM"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHI4x")
+
+KIND_STREAMING = 1
+KIND_GREEDY = 2
+KIND_DIVIDE_AND_CONQUER = 3
+KIND_DECREASE_AND_CONQUER = 4
+
+
+def pack_sections(kind, sections):
+    lengths = array("q", [len(section) for section in sections])
+    parts = [_HEADER.pack(MAGIC, VERSION, kind, len(sections)), lengths.tobytes()]
+    for section in sections:
+        if not isinstance(section, array) or section.typecode != "q":
+            section = array("q", section)
+        parts.append(section.tobytes())
+    return b"".join(parts)
+
+
+def unpack_sections(buffer, kind):
+    # Returns int64 memoryviews into the buffer; nothing is copied here
+    view = memoryview(buffer)
+    if view.nbytes < _HEADER.size:
+        raise ValueError("summary is truncated")
+    magic, version, found_kind, count = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not an analyzer summary (or unsupported version)")
+    if found_kind != kind:
+        raise ValueError(f"summary kind {found_kind} does not match expected kind {kind}")
+
+    words = view[_HEADER.size:].cast("B").cast("q")
+    lengths = words[:count].tolist()
+    if count + sum(lengths) > len(words):
+        raise ValueError("summary is truncated")
+    sections = []
+    position = count
+    for length in lengths:
+        sections.append(words[position:position + length])
+        position += length
+    return sections
+
+
+def counts_to_sections(counts):
+    return [array("q", counts.keys()), array("q", counts.values())]
+
+
+def counts_from_sections(keys, counts):
+    return dict(zip(keys.tolist(), counts.tolist()))
+
+
+def merge_counts_into(target, counts):
+    for item, count in counts.items():
+        target[item] = target.get(item, 0) + count
+    return target
+
+
+def values_at_ranks(counts, ranks):
+    # Order statistics (0-based sorted positions) read straight off a count table
+    wanted = sorted(set(ranks))
+    found = {}
+    seen = 0
+    position = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        while position < len(wanted) and wanted[position] < seen:
+            found[wanted[position]] = value
+            position += 1
+        if position == len(wanted):
+            break
+    return [found[rank] for rank in ranks]
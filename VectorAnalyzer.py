@@ -0,0 +1,190 @@
+import time
+import numpy as np
+
+from Profiling import phase
+from Selection import label_percentiles, percentiles
+
+# Dense bincount is used while the value span stays within this multiple of n
+DENSE_SPAN_FACTOR = 4
+DENSE_SPAN_MIN = 1 << 16
+
+
+def count_values(data):
+    # (sorted distinct keys, their counts) of a NumPy array
+    if data.size == 0:
+        return np.empty(0, dtype=data.dtype), np.empty(0, dtype=np.int64)
+
+    if np.issubdtype(data.dtype, np.integer):
+        low = data.min()
+        span = int(data.max()) - int(low)
+        if span <= max(DENSE_SPAN_MIN, DENSE_SPAN_FACTOR * data.size):
+            # Offsets from the minimum fit in intp without overflow for any int dtype
+            if np.issubdtype(data.dtype, np.unsignedinteger):
+                offsets = (data - low).astype(np.intp, copy=False)
+            else:
+                offsets = data.astype(np.int64, copy=False) - np.int64(low)
+            dense_counts = np.bincount(offsets, minlength=span + 1)
+            present = np.flatnonzero(dense_counts)
+            # Wrapping arithmetic in the input dtype restores the original keys
+            keys = present.astype(data.dtype) + low
+            return keys, dense_counts[present]
+
+    return np.unique(data, return_counts=True)
+
+
+class VectorizedAnalyzer:
+    def __init__(self, data, threshold, percentiles=(25, 50, 75), profiler=None):
+        self.data = np.asarray(data)
+        self.threshold = threshold
+        self.percentiles = percentiles
+        self.keys = None
+        self.counts = None
+        self.frequency_counts = None
+        self.quantile_estimates = None
+        self.heavy_hitters = None
+        self.profiler = profiler
+
+    def process_data(self):
+        start_time = time.perf_counter()
+
+        n = self.data.size
+
+        # Step 1: Frequency Counts
+        with phase(self.profiler, "count", n):
+            self.keys, self.counts = self.calculate_counts(self.data)
+            self.frequency_counts = dict(zip(self.keys.tolist(), self.counts.tolist()))
+
+        # Step 2: Quantile Estimation
+        with phase(self.profiler, "select", n):
+            self.quantile_estimates = self.calculate_quantile_estimates(self.data)
+
+        # Step 3: Heavy Hitters
+        with phase(self.profiler, "heavy_hitters", self.keys.size):
+            self.heavy_hitters = self.find_heavy_hitters()
+
+        return time.perf_counter() - start_time
+
+    def calculate_counts(self, data):
+        return count_values(data)
+
+    def calculate_quantile_estimates(self, data):
+        if data.size == 0:
+            return {}
+        # np.partition on just the ranks the requested percentiles need
+        return label_percentiles(self.percentiles, percentiles(data, self.percentiles))
+
+    def find_heavy_hitters(self):
+        return self.keys[self.counts >= self.threshold].tolist()
+
+    def get_frequency_counts(self):
+        return self.frequency_counts
+
+    def get_quantile_estimates(self):
+        return self.quantile_estimates
+
+    def get_heavy_hitters(self):
+        return self.heavy_hitters
+
+    def print_results(self, execution_time):
+        print("Frequency Counts:")
+        for item, count in self.frequency_counts.items():
+            print(f"{item}: {count}")
+
+        print("\nQuantile Estimates:")
+        for quantile, estimate in self.quantile_estimates.items():
+            print(f"{quantile}: {estimate}")
+
+        print("\nHeavy Hitters:")
+        print(self.heavy_hitters)
+
+        print(f"\nExecution Time: {execution_time:.6f} seconds")
+
+
+class VectorizedStreamingAnalyzer:
+    # Streaming front end for the vectorized counting above. Batches are
+    # buffered and, once compact_items have piled up or a query arrives,
+    # counted in one bincount/unique pass and folded into sorted running
+    # (keys, counts) arrays. Memory follows the number of distinct values,
+    # and quantiles are exact stored values, read off the cumulative counts.
+    def __init__(self, heavy_hitter_threshold, dtype=np.int64, compact_items=1 << 20, profiler=None):
+        self.heavy_hitter_threshold = heavy_hitter_threshold
+        self.profiler = profiler
+        self.dtype = dtype
+        self.compact_items = compact_items
+        self.keys = np.empty(0, dtype=dtype)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.pending = []
+        self.pending_items = 0
+
+    def process_batch(self, data_batch):
+        batch = np.array(data_batch, dtype=self.dtype)
+        self.pending.append(batch)
+        self.pending_items += batch.size
+        if self.pending_items >= self.compact_items:
+            self._compact()
+
+    process_sample = process_batch
+
+    def process_item(self, item):
+        self.process_batch((item,))
+
+    def _compact(self):
+        if not self.pending:
+            return
+        with phase(self.profiler, "count", self.pending_items):
+            keys, counts = count_values(np.concatenate(self.pending))
+        self.pending = []
+        self.pending_items = 0
+        if self.keys.size:
+            with phase(self.profiler, "merge", keys.size + self.keys.size):
+                keys, inverse = np.unique(np.concatenate((self.keys, keys)), return_inverse=True)
+                counts = np.bincount(inverse, weights=np.concatenate((self.counts, counts))).astype(np.int64)
+        self.keys, self.counts = keys, counts
+
+    def get_frequency_counts(self):
+        self._compact()
+        return dict(zip(self.keys.tolist(), self.counts.tolist()))
+
+    def get_frequency_estimate(self, item):
+        self._compact()
+        index = np.searchsorted(self.keys, item)
+        if index < self.keys.size and self.keys[index] == item:
+            return int(self.counts[index]), 0
+        return 0, 0
+
+    def get_distinct_count(self):
+        self._compact()
+        return int(self.keys.size)
+
+    def get_heavy_hitters(self):
+        self._compact()
+        mask = self.counts >= self.heavy_hitter_threshold
+        order = np.argsort(-self.counts[mask], kind="stable")
+        return [(key, count, 0) for key, count in zip(self.keys[mask][order].tolist(), self.counts[mask][order].tolist())]
+
+    def get_top_k(self, k):
+        self._compact()
+        order = np.argsort(-self.counts, kind="stable")[:k]
+        return [(key, count, 0) for key, count in zip(self.keys[order].tolist(), self.counts[order].tolist())]
+
+    def get_quantiles(self, qs=(0.5, 0.99, 0.999)):
+        # Stored values, picked the way the KLL-backed analyzers pick them:
+        # the first key whose cumulative count exceeds q of the total
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError("Quantiles must be in the range [0, 1]")
+        self._compact()
+        if not self.keys.size:
+            return {q: None for q in qs}
+        cumulative = np.cumsum(self.counts)
+        indices = np.searchsorted(cumulative, np.asarray(qs, dtype=float) * cumulative[-1], side="right")
+        return dict(zip(qs, self.keys[np.minimum(indices, self.keys.size - 1)].tolist()))
+
+if __name__ == "__main__":
+    n = 1000
+    threshold = 5
+    random_numbers = np.random.randint(1, 21, n)
+
+    analyzer = VectorizedAnalyzer(random_numbers, threshold)
+    execution_time = analyzer.process_data()
+    analyzer.print_results(execution_time)
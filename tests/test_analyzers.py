@@ -0,0 +1,64 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import Analyzers
+
+# Backends that count exactly, so they must agree on every answer
+EXACT = ("greedy", "divide_and_conquer", "decrease_and_conquer", "vectorized", "sliding_window", "concurrent")
+
+
+@pytest.mark.parametrize("name", Analyzers.available())
+def test_every_backend_implements_the_protocol(name):
+    assert Analyzers.missing_methods(Analyzers.load(name)) == []
+    analyzer = Analyzers.create(name, 5)
+    assert Analyzers.missing_methods(analyzer) == []
+    assert analyzer.get_quantiles((0.5,)) == {0.5: None}
+
+
+def test_exact_backends_agree():
+    rng = random.Random(1)
+    data = [rng.randrange(50) for _ in range(150)]
+    qs = (0.0, 0.1, 0.5, 0.9, 0.99, 1.0)
+    answers = []
+    for name in EXACT:
+        analyzer = Analyzers.create(name, 5)
+        analyzer.process_batch(data)
+        answers.append((analyzer.get_frequency_counts(), analyzer.get_quantiles(qs),
+                        [analyzer.get_frequency_estimate(item) for item in (data[0], -1)],
+                        sorted(analyzer.get_heavy_hitters()), analyzer.get_distinct_count()))
+    assert all(answer == answers[0] for answer in answers[1:])
+    # Quantiles are stored items, never interpolated
+    assert set(answers[0][1].values()) <= set(data)
+
+
+def test_register_and_unknown_backend():
+    class Tiny(Analyzers.load("greedy")):
+        pass
+
+    Analyzers.register("tiny", Tiny)
+    try:
+        assert isinstance(Analyzers.create("tiny", 3), Tiny)
+    finally:
+        del Analyzers.BACKENDS["tiny"]
+        Analyzers._loaded.pop("tiny", None)
+    with pytest.raises(ValueError, match="unknown backend"):
+        Analyzers.load("tiny")
+
+
+def test_registry_import_is_lazy():
+    code = "import sys, Analyzers; print(sorted(m for m in ('EachAlgo', 'numpy') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(Analyzers.__file__)))
+    assert result.stdout.strip() == "[]"
+
+
+def test_measure_import_from_another_directory(tmp_path, monkeypatch):
+    from Benchmark import measure_import
+
+    monkeypatch.chdir(tmp_path)
+    result = measure_import("Analyzers", repeat=1)
+    assert len(result["times_us"]) == 1
@@ -0,0 +1,42 @@
+import json
+
+import Benchmark
+
+
+def test_distributions_are_reproducible():
+    for make in Benchmark.DISTRIBUTIONS.values():
+        assert make(500, 3) == make(500, 3)
+        assert len(make(500, 3)) == 500
+
+
+def test_every_case_runs(capsys):
+    report = Benchmark.run_suite(list(Benchmark.CASES), ["zipf"], [300], warmup=0, repeat=2, trace_memory=False)
+    results = report["results"]
+    assert [result["analyzer"] for result in results] == list(Benchmark.CASES)
+    for result in results:
+        assert len(result["times_ns"]) == 2 and result["peak_bytes"] is None
+        assert result["approximate"] == (result["analyzer"] in Benchmark.APPROXIMATE_CASES)
+    assert report["meta"]["repeat"] == 2
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    def report(*medians):
+        return {"results": [{"analyzer": name, "distribution": "uniform", "n": 10, "median_ns": median}
+                            for name, median in zip(("a", "b", "c"), medians)]}
+
+    regressions = Benchmark.compare(report(125, 105, 50), report(100, 100, 0), 0.10)
+    assert [(regression["analyzer"], regression["ratio"]) for regression in regressions] == [("a", 1.25)]
+
+
+def test_main_writes_and_compares(tmp_path, capsys):
+    output = tmp_path / "report.json"
+    argv = ["--analyzers", "greedy", "--distributions", "uniform", "--sizes", "200", "--repeat", "1",
+            "--no-memory", "--output", str(output)]
+    assert Benchmark.main(argv) == 0
+    baseline = json.loads(output.read_text())
+    assert baseline["results"][0]["analyzer"] == "greedy"
+    for result in baseline["results"]:
+        result["median_ns"] = 1
+    output.write_text(json.dumps(baseline))
+    assert Benchmark.main(argv[:-2] + ["--compare", str(output)]) == 1
+    assert "REGRESSION greedy" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+import pytest
+
+from Cardinality import HyperLogLog, hash64
+from EachAlgo import DivideAndConquerAnalyzer
+
+
+@pytest.mark.parametrize("cardinality", [1, 10, 1000, 100000])
+def test_hyperloglog_relative_error(cardinality):
+    sketch = HyperLogLog(12)
+    sketch.update_batch(range(cardinality))
+    # Four standard errors, plus one for the smallest counts
+    assert abs(sketch.estimate() - cardinality) <= 4 * sketch.relative_error() * cardinality + 1
+
+
+def test_hyperloglog_merge_and_sections():
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update_batch(range(0, 60000))
+    right.update_batch(range(40000, 100000))
+    left.merge(right)
+    assert abs(left.estimate() - 100000) <= 4 * left.relative_error() * 100000
+    restored = HyperLogLog.from_sections(left.to_sections())
+    assert restored.estimate() == left.estimate()
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(10))
+
+
+def test_hash64_treats_integral_types_like_int():
+    np = pytest.importorskip("numpy")
+    for value in (0, 5, -1, 2 ** 40):
+        assert hash64(np.int64(value)) == hash64(value)
+    assert hash64(np.uint8(7)) == hash64(7)
+    assert hash64(True) == hash64(1)
+    assert hash64("5") != hash64(5)
+
+
+def test_distinct_count_mixes_numpy_and_python_ints():
+    np = pytest.importorskip("numpy")
+    analyzer = DivideAndConquerAnalyzer(2, capacity=16)
+    analyzer.process_batch(np.array([1, 2, 3, 3, 3]))
+    analyzer.process_batch([1, 2, 3])
+    assert analyzer.get_distinct_count() == 3
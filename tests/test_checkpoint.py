@@ -0,0 +1,127 @@
+import os
+import random
+
+import pytest
+
+from Checkpoint import Checkpointer, log_generations, read_snapshot, restore
+from EachAlgo import DivideAndConquerAnalyzer, GreedyAnalyzer
+
+
+def _data(n, seed=0, domain=1000):
+    rng = random.Random(seed)
+    return [int(rng.paretovariate(1.1)) % domain for _ in range(n)]
+
+
+def _same_answers(left, right):
+    assert left.get_frequency_counts() == right.get_frequency_counts()
+    assert left.get_heavy_hitters() == right.get_heavy_hitters()
+    assert left.get_quantiles() == right.get_quantiles()
+    assert left.get_distinct_count() == right.get_distinct_count()
+
+
+@pytest.mark.parametrize("options", [{}, {"capacity": 64, "sketch_width": 256}, {"heavy_hitter_fraction": 0.01}])
+def test_streaming_to_bytes_round_trip(options):
+    analyzer = DivideAndConquerAnalyzer(50, **options)
+    analyzer.process_batch(_data(20000))
+    restored = DivideAndConquerAnalyzer.from_bytes(analyzer.to_bytes())
+    _same_answers(analyzer, restored)
+    for key in range(20):
+        assert restored.get_frequency_estimate(key) == analyzer.get_frequency_estimate(key)
+
+
+def test_restored_analyzer_keeps_counting():
+    analyzer = GreedyAnalyzer(50)
+    analyzer.process_batch(_data(5000, seed=1))
+    restored = GreedyAnalyzer.from_bytes(analyzer.to_bytes())
+    more = _data(5000, seed=2)
+    analyzer.process_batch(more)
+    restored.process_batch(more)
+    assert restored.get_frequency_counts() == analyzer.get_frequency_counts()
+    assert restored.get_heavy_hitters() == analyzer.get_heavy_hitters()
+
+
+def _reference(batches):
+    analyzer = DivideAndConquerAnalyzer(50)
+    for batch in batches:
+        analyzer.process_batch(batch)
+    return analyzer
+
+
+@pytest.mark.parametrize("mode", ["thread", "fork"])
+def test_checkpoint_then_restore(tmp_path, mode):
+    if mode == "fork" and not hasattr(os, "fork"):
+        pytest.skip("no fork on this platform")
+    path = str(tmp_path / "state")
+    batches = [_data(2000, seed=seed) for seed in range(6)]
+    with Checkpointer(DivideAndConquerAnalyzer(50), path, mode=mode) as checkpointer:
+        for batch in batches[:3]:
+            checkpointer.process_batch(batch)
+        checkpointer.checkpoint()
+        for batch in batches[3:]:
+            checkpointer.process_batch(batch)
+    generation, snapshot = read_snapshot(path)
+    assert generation == 1
+    assert log_generations(path) == [1]
+    # KLL compaction is randomized, so only the exact answers match a rebuild
+    reference = _reference(batches[:3])
+    assert snapshot.get_frequency_counts() == reference.get_frequency_counts()
+    assert snapshot.get_heavy_hitters() == reference.get_heavy_hitters()
+
+    restored, _ = restore(path)
+    assert restored.get_frequency_counts() == _reference(batches).get_frequency_counts()
+
+
+def test_restore_without_snapshot_uses_factory(tmp_path):
+    path = str(tmp_path / "state")
+    with Checkpointer(DivideAndConquerAnalyzer(50), path) as checkpointer:
+        checkpointer.process_batch([1, 2, 3])
+    with pytest.raises(FileNotFoundError):
+        restore(path)
+    restored, generation = restore(path, lambda: DivideAndConquerAnalyzer(50))
+    assert generation == 0
+    assert restored.get_frequency_counts() == {1: 1, 2: 1, 3: 1}
+
+
+def test_torn_log_tail_is_ignored(tmp_path):
+    path = str(tmp_path / "state")
+    batches = [_data(500, seed=seed) for seed in range(4)]
+    with Checkpointer(DivideAndConquerAnalyzer(50), path, mode="thread") as checkpointer:
+        checkpointer.process_batch(batches[0])
+        checkpointer.checkpoint()
+        for batch in batches[1:]:
+            checkpointer.process_batch(batch)
+    log_path = f"{path}.log.1"
+    size = os.path.getsize(log_path)
+    with open(log_path, "r+b") as handle:
+        # Cut the last record in half, as a crash mid-write would
+        handle.truncate(size - 8 * 250)
+    restored, _ = restore(path)
+    assert restored.get_frequency_counts() == _reference(batches[:3]).get_frequency_counts()
+
+
+def test_corrupt_log_record_stops_replay(tmp_path):
+    path = str(tmp_path / "state")
+    batches = [list(range(100)), list(range(100, 200)), list(range(200, 300))]
+    with Checkpointer(DivideAndConquerAnalyzer(50), path) as checkpointer:
+        for batch in batches:
+            checkpointer.process_batch(batch)
+    record_bytes = 8 + 8 * 100
+    with open(f"{path}.log.0", "r+b") as handle:
+        handle.seek(record_bytes + 8 + 16)
+        handle.write(b"\xff")
+    restored, _ = restore(path, lambda: DivideAndConquerAnalyzer(50))
+    assert restored.get_frequency_counts() == {key: 1 for key in range(100)}
+
+
+def test_resume_continues_in_a_new_log(tmp_path):
+    path = str(tmp_path / "state")
+    factory = lambda: DivideAndConquerAnalyzer(50)
+    with Checkpointer(factory(), path) as checkpointer:
+        checkpointer.process_batch([1, 1, 2])
+        checkpointer.checkpoint()
+        checkpointer.process_batch([3])
+    with Checkpointer.resume(path, factory) as checkpointer:
+        assert checkpointer.generation == 2
+        checkpointer.process_batch([1])
+    restored, _ = restore(path)
+    assert restored.get_frequency_counts() == {1: 3, 2: 1, 3: 1}
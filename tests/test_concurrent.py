@@ -0,0 +1,67 @@
+import random
+import threading
+from collections import Counter
+
+from Concurrent import ConcurrentAnalyzer
+
+
+def test_concurrent_keeps_items_of_finished_threads():
+    analyzer = ConcurrentAnalyzer(10, buffer_items=4096)
+
+    def produce():
+        for item in range(10001):
+            analyzer.process_item(item % 7)
+
+    for _ in range(3):
+        threads = [threading.Thread(target=produce) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert sum(analyzer.get_frequency_counts().values()) == 3 * 4 * 10001
+    # Every finished thread's shard was folded into the retired one
+    assert len(analyzer.shards) == 1
+
+
+def test_concurrent_matches_single_threaded():
+    rng = random.Random(5)
+    batches = [[rng.randrange(100) for _ in range(1000)] for _ in range(8)]
+    analyzer = ConcurrentAnalyzer(50)
+    threads = [threading.Thread(target=analyzer.process_batch, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = Counter(item for batch in batches for item in batch)
+    assert analyzer.get_frequency_counts() == dict(expected)
+
+
+def test_concurrent_snapshots_while_producers_come_and_go():
+    analyzer = ConcurrentAnalyzer(10, buffer_items=64)
+    stop = threading.Event()
+    produced = []
+
+    def produce(count):
+        for item in range(count):
+            analyzer.process_item(item % 11)
+        produced.append(count)
+
+    def query():
+        while not stop.is_set():
+            analyzer.get_frequency_counts()
+
+    queries = [threading.Thread(target=query) for _ in range(3)]
+    for thread in queries:
+        thread.start()
+    for round_ in range(30):
+        producers = [threading.Thread(target=produce, args=(100 + round_,)) for _ in range(3)]
+        for thread in producers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+    stop.set()
+    for thread in queries:
+        thread.join(10)
+        assert not thread.is_alive(), "snapshot() deadlocked"
+    assert sum(analyzer.get_frequency_counts().values()) == sum(produced)
+    assert len(analyzer.shards) == 1
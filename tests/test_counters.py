@@ -0,0 +1,55 @@
+from collections import Counter
+
+import numpy as np
+
+from Counters import AdaptiveCounter
+
+
+def test_dense_until_the_span_gets_sparse():
+    counter = AdaptiveCounter(density=4, min_dense_span=64)
+    counter.add_batch([5, 7, 5, 40, 7, 5])
+    assert counter.is_dense
+    assert counter.to_dict() == {5: 3, 7: 2, 40: 1}
+    counter.add(10**9)
+    assert not counter.is_dense
+    assert counter.to_dict() == {5: 3, 7: 2, 40: 1, 10**9: 1}
+    assert len(counter) == 4
+
+
+def test_non_integer_key_switches_to_hash_mode():
+    counter = AdaptiveCounter()
+    counter.add_batch([1, 2, 2])
+    counter.add("x")
+    assert not counter.is_dense
+    assert counter.to_dict() == {1: 1, 2: 2, "x": 1}
+
+
+def test_numpy_integer_keys_stay_dense():
+    keys = np.random.default_rng(4).integers(-50, 50, 10000)
+    counter = AdaptiveCounter()
+    counter.add_batch(keys)
+    counter.add(np.int32(3), 5)
+    assert counter.is_dense
+    expected = Counter(keys.tolist())
+    expected[3] += 5
+    assert counter.to_dict() == dict(expected)
+    assert counter[np.int64(3)] == counter[3] == expected[3]
+    assert all(type(key) is int for key in counter.keys())
+
+
+def test_numpy_keys_share_entries_in_hash_mode():
+    counter = AdaptiveCounter()
+    counter.add("x")
+    counter.add(np.int64(7))
+    counter.add(7)
+    assert counter.to_dict() == {"x": 1, 7: 2}
+
+
+def test_from_sorted_bisects_sparse_keys():
+    keys = [-(10**12), 3, 10**12]
+    counter = AdaptiveCounter.from_sorted(np.array(keys, dtype=np.int64).data, np.array([2, 1, 4], dtype=np.int64).data)
+    assert not counter.is_dense
+    assert counter[np.int64(10**12)] == 4
+    assert counter.add(3) == 2
+    sections = counter.sorted_sections()
+    assert list(sections[0]) == keys and list(sections[1]) == [2, 2, 4]
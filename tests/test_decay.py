@@ -0,0 +1,59 @@
+import random
+from collections import Counter
+
+import pytest
+
+from Decay import DecayedAnalyzer
+
+
+def test_decay_matches_direct_sum_through_renormalizations():
+    analyzer = DecayedAnalyzer(0.0, half_life=1.0, min_count=0.0, renormalize_half_lives=8, clock=None)
+    rng = random.Random(6)
+    events = []
+    now = 0.0
+    for _ in range(5000):
+        now += rng.random() * 0.02
+        event = (rng.randrange(20), rng.random(), now - rng.random() * 0.5)
+        events.append(event)
+        analyzer.process_item(event[0], event[2], event[1])
+    assert analyzer.renormalizations > 0
+    expected = Counter()
+    for key, weight, timestamp in events:
+        expected[key] += weight * 2.0 ** -(analyzer.latest - timestamp)
+    for key, count in analyzer.get_frequency_counts().items():
+        assert count == pytest.approx(expected[key], rel=1e-9)
+
+
+def test_decay_query_after_long_idle_gap():
+    now = [0.0]
+    analyzer = DecayedAnalyzer(0.5, half_life=1.0, clock=lambda: now[0])
+    analyzer.process_batch([1, 1, 2])
+    assert [key for key, _, _ in analyzer.get_heavy_hitters()] == [1, 2]
+    now[0] = 1100.0
+    assert analyzer.get_heavy_hitters() == []
+    assert analyzer.get_total_weight() == 0.0
+    analyzer.process_item(3, weight=2.0)
+    assert analyzer.get_heavy_hitters() == [(3, 2.0, 0)]
+
+
+def test_decay_heavy_hitters_cool_off():
+    analyzer = DecayedAnalyzer(5.0, half_life=10.0, clock=None)
+    analyzer.process_batch(["z", "z"], weights=[3, 3], timestamp=0.0)
+    assert analyzer.get_heavy_hitters() == [("z", 6.0, 0)]
+    analyzer.process_item("w", 10.0)
+    assert analyzer.get_heavy_hitters() == []
+    assert analyzer.get_frequency_estimate("z")[0] == pytest.approx(3.0)
+
+
+def test_decay_fraction_threshold_and_event_time():
+    analyzer = DecayedAnalyzer(None, half_life=5.0, heavy_hitter_fraction=0.4, clock=None)
+    with pytest.raises(ValueError):
+        analyzer.process_item(1)
+    analyzer.process_batch([1, 1, 1, 2], timestamp=0.0)
+    analyzer.process_batch([2, 2, 3], timestamp=10.0)
+    # Item 1 is worth 3/4 at t=10, item 2 is 1/4 + 2
+    assert [key for key, _, _ in analyzer.get_heavy_hitters()] == [2]
+    assert analyzer.get_frequency_estimate(1)[0] == pytest.approx(0.75)
+    assert analyzer.get_top_k(2)[1][0] == 3
+    assert analyzer.get_quantiles((0.0, 1.0)) == {0.0: 1, 1.0: 3}
+
@@ -0,0 +1,56 @@
+import os
+import random
+
+import numpy as np
+
+from DivConq import DivideAndConquerAnalyzer
+from ExternalSort import ExternalSorter
+
+
+def test_external_sort_matches_in_memory(tmp_path):
+    rng = random.Random(8)
+    data = [rng.randrange(-10**6, 10**6) for _ in range(100000)]
+    with ExternalSorter(memory_bytes=1 << 20, temp_dir=str(tmp_path)) as sorter:
+        for start in range(0, len(data), 7000):
+            sorter.add(data[start:start + 7000])
+        merged = [value for block in sorter.sorted_blocks() for value in block]
+        assert sorter.stats()["runs"] > 1
+    assert merged == sorted(data)
+
+    analyzer = DivideAndConquerAnalyzer(None, 200)
+    analyzer.process_external([data], memory_bytes=1 << 20, temp_dir=str(tmp_path))
+    reference = DivideAndConquerAnalyzer(list(data), 200)
+    reference.process()
+    assert analyzer.frequency_counts == reference.frequency_counts
+    assert analyzer.quantile_estimates == reference.quantile_estimates
+
+
+def test_external_sort_cleans_up_and_merges_in_passes(tmp_path):
+    rng = random.Random(9)
+    data = [rng.randrange(-10**12, 10**12) for _ in range(60000)]
+    with ExternalSorter(memory_bytes=1 << 20, temp_dir=str(tmp_path)) as sorter:
+        sorter.add(data)
+        merged = [value for block in sorter.sorted_blocks() for value in block]
+        stats = sorter.stats()
+    assert merged == sorted(data)
+    assert stats["items"] == len(data) and stats["merge_passes"] > 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_external_mode_without_counts(tmp_path):
+    rng = random.Random(10)
+    data = [rng.randrange(500) for _ in range(50000)]
+    analyzer = DivideAndConquerAnalyzer(None, 200, percentiles=(1, 50, 99.9))
+    analyzer.process_external([data[:20000], data[20000:]], memory_bytes=1 << 20, temp_dir=str(tmp_path),
+                              keep_counts=False)
+    assert analyzer.frequency_counts == {}
+    assert analyzer.distinct_count == len(set(data))
+    assert list(analyzer.quantile_estimates.values()) == np.percentile(data, (1, 50, 99.9)).tolist()
+    expected = {key for key in set(data) if data.count(key) >= 200}
+    assert set(analyzer.tracker.hitters) == expected
+
+
+def test_external_mode_on_empty_input(tmp_path):
+    analyzer = DivideAndConquerAnalyzer(None, 2)
+    stats = analyzer.process_external([], temp_dir=str(tmp_path))
+    assert stats["items"] == 0 and analyzer.distinct_count == 0
@@ -0,0 +1,73 @@
+import random
+from collections import Counter
+
+import pytest
+
+from Cardinality import hash64
+from EachAlgo import DivideAndConquerAnalyzer
+from HeavyHitters import CountMinSketch, SpaceSaving
+
+
+def test_count_min_never_undercounts_and_respects_bound():
+    rng = random.Random(3)
+    items = [int(rng.paretovariate(1.1)) for _ in range(50000)] + [rng.randrange(-10**9, 10**9) for _ in range(50000)]
+    sketch = CountMinSketch(272, 5)
+    for item in items:
+        sketch.update(item)
+    counts = Counter(items)
+    overcounts = [sketch.estimate(key) - count for key, count in counts.items()]
+    assert min(overcounts) >= 0
+    # The bound holds per key with probability 1 - e^-depth
+    within = sum(overcount <= sketch.error_bound() for overcount in overcounts)
+    assert within >= 0.99 * len(overcounts)
+
+
+def test_count_min_separates_keys_builtin_hash_conflates():
+    assert hash(-1) == hash(-2)
+    assert hash64(-1) != hash64(-2)
+    sketch = CountMinSketch(1024, 4)
+    for _ in range(100):
+        sketch.update(-1)
+    assert sketch.estimate(-1) == 100
+    assert sketch.estimate(-2) == 0
+
+
+def test_count_min_sections_round_trip():
+    sketch = CountMinSketch(64, 3, seed=5)
+    for item in range(1000):
+        sketch.update(item % 37)
+    restored = CountMinSketch.from_sections(sketch.to_sections())
+    assert [restored.estimate(key) for key in range(37)] == [sketch.estimate(key) for key in range(37)]
+    restored.merge(sketch)
+    assert restored.total == 2 * sketch.total
+
+
+def test_space_saving_error_bound():
+    rng = random.Random(4)
+    items = [min(int(rng.paretovariate(1.2)), 5000) for _ in range(100000)]
+    summary = SpaceSaving(100)
+    for item in items:
+        summary.update(item)
+    counts = Counter(items)
+    for key, count in summary.counts.items():
+        assert count - summary.errors[key] <= counts[key] <= count
+
+
+def test_count_min_numpy_keys_never_undercount():
+    np = pytest.importorskip("numpy")
+    sketch = CountMinSketch(64, 4)
+    for _ in range(10):
+        sketch.update(np.int64(5))
+    assert sketch.estimate(5) == 10
+    assert sketch.estimate(np.int64(5)) == 10
+
+
+def test_bounded_estimates_cover_evicted_keys():
+    rng = random.Random(9)
+    items = [rng.randrange(2000) for _ in range(20000)]
+    analyzer = DivideAndConquerAnalyzer(50, capacity=32, sketch_width=1024)
+    analyzer.process_batch(items)
+    counts = Counter(items)
+    for key in range(0, 2000, 50):
+        estimate, _ = analyzer.get_frequency_estimate(key)
+        assert estimate >= counts[key]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from EachAlgo import GreedyAnalyzer
+from Ingest import feed, read_binary_chunks, read_text_chunks, write_binary
+
+
+def test_binary_chunks_round_trip(tmp_path):
+    path = tmp_path / "values.bin"
+    values = list(range(-500, 500)) * 3
+    write_binary(path, values)
+    # A chunk is only valid until the next one: copy while iterating
+    chunks = [chunk.tolist() for chunk in read_binary_chunks(path, chunk_items=700)]
+    assert [len(chunk) for chunk in chunks] == [700, 700, 700, 700, 200]
+    assert [value for chunk in chunks for value in chunk] == values
+    arrays = [chunk.copy() for chunk in read_binary_chunks(path, "q", 1000, as_numpy=True)]
+    assert np.concatenate(arrays).tolist() == values
+
+
+def test_binary_chunks_ignore_a_partial_tail(tmp_path):
+    path = tmp_path / "values.bin"
+    write_binary(path, [1, 2, 3])
+    with open(path, "ab") as handle:
+        handle.write(b"\x01\x02")
+    assert [value for chunk in read_binary_chunks(path) for value in chunk.tolist()] == [1, 2, 3]
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert list(read_binary_chunks(empty)) == []
+
+
+def test_text_chunks(tmp_path):
+    path = tmp_path / "values.csv"
+    path.write_text("id,value\n1,10\n2,-20\n\n3,30\n")
+    chunks = list(read_text_chunks(path, chunk_items=2, delimiter=",", column=1, skip_header=True))
+    assert [chunk.tolist() for chunk in chunks] == [[10, -20], [30]]
+    path.write_text("1 2 3\n4  5\n")
+    assert [value for chunk in read_text_chunks(path) for value in chunk] == [1, 2, 3, 4, 5]
+
+
+def test_feed_uses_the_available_entry_point():
+    class ItemOnly:
+        def __init__(self):
+            self.items = []
+
+        def process_item(self, item):
+            self.items.append(item)
+
+    chunks = [[1, 2], [2, 3]]
+    assert feed(ItemOnly(), chunks).items == [1, 2, 2, 3]
+    assert feed(GreedyAnalyzer(2), chunks).get_frequency_counts() == {1: 1, 2: 2, 3: 1}
@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+import pytest
+
+from DecConq import DecreaseAndConquerAnalyzer
+from DivConq import DivideAndConquerAnalyzer
+from ParallelConq import parallel_map_reduce, shard_bounds, tree_reduce
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_map_reduce_sorts_and_counts(workers):
+    rng = random.Random(7)
+    data = [rng.randrange(-10**12, 10**12) for _ in range(20000)] + [rng.randrange(5) for _ in range(20000)]
+    values, counts, _ = parallel_map_reduce(data, workers)
+    assert values == sorted(data)
+    assert counts == Counter(data)
+
+
+def test_parallel_sketch_covers_every_shard():
+    data = list(range(10000))
+    _, _, sketch = parallel_map_reduce(data, 2, shards=4, sketch_k=200)
+    assert sketch.n == len(data)
+    assert abs(sketch.quantile(0.5) - 5000) <= sketch.rank_error() * len(data)
+
+
+def test_shards_and_reduce_keep_order():
+    assert shard_bounds(10, 3) == [0, 4, 7, 10]
+    assert shard_bounds(2, 5) == [0, 1, 2]
+    assert tree_reduce(list("abcde"), lambda left, right: left + right) == "abcde"
+
+
+def test_parallel_analyzers_match_serial(capsys):
+    rng = random.Random(9)
+    data = [rng.randrange(300) for _ in range(20000)]
+    serial = DecreaseAndConquerAnalyzer(list(data), 80)
+    serial.process_data()
+    parallel = DecreaseAndConquerAnalyzer(list(data), 80)
+    parallel.process_data_parallel(workers=2, shards=3)
+    assert parallel.frequency_counts == serial.frequency_counts
+    assert parallel.quantile_estimates == serial.quantile_estimates
+    assert sorted(parallel.heavy_hitters) == sorted(serial.heavy_hitters)
+
+    serial = DivideAndConquerAnalyzer(list(data), 80)
+    serial.analyze()
+    parallel = DivideAndConquerAnalyzer(list(data), 80)
+    parallel.analyze_parallel(workers=2, shards=3)
+    assert list(parallel.frequency_counts.items()) == list(serial.frequency_counts.items())
+    assert parallel.quantile_estimates == serial.quantile_estimates
+    assert parallel.heavy_hitters == serial.heavy_hitters
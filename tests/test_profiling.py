@@ -0,0 +1,65 @@
+import json
+import time
+
+import pytest
+
+from DecConq import DecreaseAndConquerAnalyzer
+from Profiling import NULL_PHASE, Profiler, SamplingProfiler, export, phase, to_prometheus
+
+
+def test_disabled_profiler_is_a_no_op():
+    assert phase(None, "count", 10) is NULL_PHASE
+    with phase(None, "count"):
+        pass
+
+
+def test_phases_accumulate():
+    with Profiler(track_allocations=True) as profiler:
+        for _ in range(3):
+            with profiler.phase("count", 100):
+                [0] * 10000
+        profiler.record("merge", 2 * 10**9, 50)
+    report = profiler.snapshot()
+    count = report["phases"]["count"]
+    assert (count["calls"], count["items"]) == (3, 300)
+    assert count["allocated_bytes"] > 0
+    assert report["phases"]["merge"]["items_per_sec"] == pytest.approx(25.0)
+    assert report["wall_seconds"] > 0
+
+
+def test_analyzer_reports_its_phases():
+    profiler = Profiler()
+    analyzer = DecreaseAndConquerAnalyzer(list(range(1000)) * 2, 2, profiler=profiler)
+    analyzer.process_data()
+    assert {"count", "select", "heavy_hitters"} <= set(profiler.snapshot()["phases"])
+
+
+def test_sampling_profiler_sees_the_busy_function():
+    def busy():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+
+    sampler = SamplingProfiler(interval=0.002).start()
+    try:
+        busy()
+    finally:
+        sampler.stop()
+    assert sampler.samples > 0
+    assert any("busy" in stack for stack in sampler.stacks)
+    assert sampler.collapsed().splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_exports(tmp_path):
+    profiler = Profiler()
+    profiler.record('odd"name', 10**9, 5)
+    text = to_prometheus(profiler, labels={"host": "a\nb"})
+    assert 'analyzer_phase_calls_total{phase="odd\\"name",host="a\\nb"} 1' in text
+    path = tmp_path / "profile.json"
+    export(profiler, str(path))
+    assert json.loads(path.read_text())["phases"]['odd"name']["calls"] == 1
+    export(profiler, str(path), format="prometheus")
+    assert path.read_text() == to_prometheus(profiler)
+    with pytest.raises(ValueError):
+        export(profiler, str(path), format="xml")
+    assert [entry.name for entry in tmp_path.iterdir()] == ["profile.json"]
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from QuantileSketch import KLLSketch
+
+
+def test_kll_rank_error_within_bound():
+    rng = random.Random(1)
+    data = [rng.random() for _ in range(200000)]
+    sketch = KLLSketch(200, seed=7)
+    sketch.update_batch(data)
+    ordered = sorted(data)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        true_rank = ordered.index(sketch.quantile(q)) / len(ordered)
+        assert abs(true_rank - q) <= sketch.rank_error()
+
+
+def test_kll_merge_and_sections_round_trip():
+    left, right = KLLSketch(100, seed=1), KLLSketch(100, seed=2)
+    left.update_batch(range(0, 50000))
+    right.update_batch(range(50000, 100000))
+    left.merge(right)
+    assert left.n == 100000
+    assert abs(left.quantile(0.5) - 50000) <= left.rank_error() * 100000
+    restored = KLLSketch.from_sections(left.to_sections())
+    assert restored.quantiles((0.1, 0.5, 0.9)) == left.quantiles((0.1, 0.5, 0.9))
+
+
+def test_kll_small_stream_is_exact():
+    sketch = KLLSketch(200)
+    assert sketch.quantile(0.5) is None
+    sketch.update_batch([5, 1, 4, 2, 3])
+    assert sketch.quantiles((0.0, 0.5, 1.0)) == [1, 3, 5]
+    assert sketch.rank(3) == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
@@ -0,0 +1,41 @@
+from EachAlgo import GreedyAnalyzer
+from QueryCache import QueryCache
+
+
+def test_cached_answers_follow_updates():
+    analyzer = GreedyAnalyzer(2)
+    analyzer.process_batch([1, 1, 2])
+    first = analyzer.get_heavy_hitters()
+    assert analyzer.get_heavy_hitters() is first
+    analyzer.process_batch([2, 3])
+    assert sorted(analyzer.get_heavy_hitters()) == [(1, 2, 0), (2, 2, 0)]
+    stats = analyzer.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_arguments_are_part_of_the_key():
+    cache = QueryCache()
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get(("q", 1), lambda: compute(1)) == 1
+    assert cache.get(("q", 2), lambda: compute(2)) == 2
+    assert cache.get(("q", 1), lambda: compute(1)) == 1
+    assert calls == [1, 2]
+    cache.invalidate()
+    cache.get(("q", 1), lambda: compute(1))
+    assert calls == [1, 2, 1]
+
+
+def test_query_cache_is_bounded():
+    analyzer = GreedyAnalyzer(2)
+    analyzer.process_batch(list(range(1000)) * 2)
+    for k in range(1, 600):
+        analyzer.get_top_k(k)
+    stats = analyzer.cache_stats()
+    assert stats["entries"] <= analyzer.query_cache.max_entries
+    analyzer.get_top_k(599)
+    assert analyzer.cache_stats()["hits"] == stats["hits"] + 1
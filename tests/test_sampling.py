@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from DecConq import DecreaseAndConquerAnalyzer
+from Sampling import draw_sample, reservoir_indices, sample_size_for_error
+
+
+def _data():
+    rng = random.Random(11)
+    return [min(int(rng.paretovariate(1.2)), 500) for _ in range(50000)]
+
+
+@pytest.mark.parametrize("mode", ["bernoulli", "reservoir"])
+def test_count_intervals_cover_the_truth(mode):
+    data = _data()
+    truth = Counter(data)
+    misses = checked = 0
+    for seed in range(20):
+        estimate = draw_sample(data, rate=0.05, mode=mode, seed=seed)
+        for item in (1, 2, 5, 20):
+            _, low, high = estimate.count_estimate(item)
+            checked += 1
+            misses += not low <= truth[item] <= high
+    # 95% intervals: allow some slack over the expected 5% misses
+    assert misses <= 0.12 * checked
+
+
+def test_quantile_intervals_cover_the_truth():
+    data = _data()
+    qs = [0.1, 0.5, 0.9, 0.99]
+    truth = np.quantile(data, qs)
+    estimate = draw_sample(data, target_error=0.01, mode="reservoir", seed=3)
+    assert estimate.size == sample_size_for_error(0.01)
+    for (_, low, high), exact in zip(estimate.quantiles(qs), truth):
+        assert low <= exact <= high
+
+
+def test_full_sample_is_exact():
+    data = _data()
+    estimate = draw_sample(data, rate=1.0)
+    assert estimate.count_estimate(1) == (data.count(1), data.count(1), data.count(1))
+    assert [value for value, low, high in estimate.quantiles([0.5])] == [np.quantile(data, 0.5)]
+
+
+def test_reservoir_is_uniform_and_sized():
+    rng = random.Random(5)
+    hits = Counter()
+    for _ in range(2000):
+        indices = reservoir_indices(100, 10, rng)
+        assert len(indices) == len(set(indices)) == 10
+        hits.update(indices)
+    assert min(hits.values()) > 120 and max(hits.values()) < 280
+
+
+@pytest.mark.parametrize("options", [{"rate": 0.0}, {"sample_size": 0}])
+@pytest.mark.parametrize("mode", ["bernoulli", "reservoir"])
+def test_empty_sample(mode, options):
+    assert reservoir_indices(10, 0, random.Random()) == []
+    analyzer = DecreaseAndConquerAnalyzer(list(range(100)), 5)
+    analyzer.process_data_sampled(mode=mode, seed=1, **options)
+    assert analyzer.sample_estimate.size == 0
+    assert analyzer.frequency_counts == {}
+    assert analyzer.heavy_hitters == []
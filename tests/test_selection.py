@@ -0,0 +1,44 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from Selection import (METHODS, percentiles, quantiles, quantiles_from_counts, quantiles_from_sorted,
+                       select_ranks)
+
+QS = [0.0, 0.001, 0.1, 0.25, 0.333, 0.5, 0.75, 0.9, 0.999, 1.0]
+
+
+def _values(n, seed):
+    rng = random.Random(seed)
+    return [rng.randrange(-1000, 1000) for _ in range(n)]
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("n", [1, 2, 7, 100, 1001])
+def test_quantiles_match_numpy(method, n):
+    values = _values(n, n)
+    expected = np.quantile(values, QS, method=method).tolist()
+    assert quantiles(values, QS, method) == expected
+    assert quantiles(np.array(values), QS, method) == expected
+    assert quantiles_from_sorted(sorted(values), QS, method) == expected
+    assert quantiles_from_counts(Counter(values), QS, method) == expected
+
+
+def test_percentiles_match_numpy():
+    values = _values(500, 1)
+    assert percentiles(values, [1, 50, 99.9]) == np.percentile(values, [1, 50, 99.9]).tolist()
+
+
+def test_select_ranks_finds_every_rank():
+    values = _values(5000, 2) + [7] * 1000
+    ordered = sorted(values)
+    ranks = [0, 1, 2500, 2501, 5999, 3000]
+    assert select_ranks(values, ranks) == {rank: ordered[rank] for rank in ranks}
+
+
+@pytest.mark.parametrize("values,qs,method", [([1, 2], [1.5], "linear"), ([1, 2], [0.5], "bogus"), ([], [0.5], "linear")])
+def test_bad_requests_raise(values, qs, method):
+    with pytest.raises(ValueError):
+        quantiles(values, qs, method)
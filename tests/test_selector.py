@@ -0,0 +1,63 @@
+import json
+import random
+
+import numpy as np
+
+import Selector
+
+
+def _profile():
+    return {
+        "version": Selector.PROFILE_VERSION,
+        "hardware": Selector.hardware_fingerprint(),
+        "points": [
+            {"n": 1000, "distinct": 10, "seconds_per_item": {"greedy": 1.0, "vectorized": 2.0}},
+            {"n": 10**6, "distinct": 10**5, "seconds_per_item": {"greedy": 3.0, "vectorized": 1.0}},
+        ],
+    }
+
+
+def test_choose_backend_uses_the_nearest_point():
+    profile = _profile()
+    assert Selector.choose_backend({"n": 2000, "distinct": 20}, profile) == "greedy"
+    assert Selector.choose_backend({"n": 5 * 10**5, "distinct": 50000}, profile) == "vectorized"
+    assert Selector.choose_backend({"n": 10, "distinct": 1}, None) == "vectorized"
+
+
+def test_distinct_estimate_is_close():
+    rng = random.Random(1)
+    data = [rng.randrange(20000) for _ in range(200000)]
+    features = Selector.probe(data)
+    assert features["n"] == len(data)
+    assert 0.5 * 20000 <= features["distinct"] <= 2 * 20000
+    assert Selector.probe(np.array([1, 1, 2]))["distinct"] == 2
+    assert Selector.probe(data[:5000], population=10**6)["n"] == 10**6
+
+
+def test_profiles_round_trip_and_reject_foreign_hardware(tmp_path):
+    path = str(tmp_path / "profile.json")
+    assert Selector.load_profile(path) is None
+    Selector.save_profile(_profile(), path)
+    assert Selector.load_profile(path) == _profile()
+    foreign = _profile()
+    foreign["hardware"] = dict(foreign["hardware"], machine="elsewhere")
+    Selector.save_profile(foreign, path)
+    assert Selector.load_profile(path) is None
+    assert Selector.load_profile(path, require_same_hardware=False) == foreign
+    with open(path, "w") as handle:
+        json.dump(dict(_profile(), version=0), handle)
+    assert Selector.load_profile(path) is None
+
+
+def test_calibrate_then_auto_create(tmp_path):
+    profile = Selector.calibrate(backends=("greedy", "decrease_and_conquer"), sizes=(2000,), cardinalities=(16, 1000),
+                                 repeat=1)
+    assert [point["n"] for point in profile["points"]] == [2000, 2000]
+    assert profile["points"][0]["distinct"] == 16
+    assert all(set(point["seconds_per_item"]) == {"greedy", "decrease_and_conquer"} for point in profile["points"])
+    path = str(tmp_path / "profile.json")
+    Selector.save_profile(profile, path)
+    name, analyzer = Selector.auto_create(list(range(100)), 3, profile_path=path)
+    assert name in ("greedy", "decrease_and_conquer")
+    analyzer.process_batch([1, 1, 1])
+    assert analyzer.get_heavy_hitters()[0][:2] == (1, 3)
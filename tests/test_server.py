@@ -0,0 +1,109 @@
+import asyncio
+import struct
+
+import pytest
+
+from EachAlgo import DivideAndConquerAnalyzer
+from Server import FRAME_HEADER, OP_FREQUENCY, OP_HEAVY_HITTERS, OP_QUANTILES, AnalyzerClient, AnalyzerServer
+
+
+class FailingAnalyzer(DivideAndConquerAnalyzer):
+    # Refuses any batch containing 13
+    def process_batch(self, data_batch):
+        if 13 in data_batch:
+            raise RuntimeError("unlucky batch")
+        super().process_batch(data_batch)
+
+
+class FrequencyLessAnalyzer(DivideAndConquerAnalyzer):
+    # A backend without point estimates
+    def __getattribute__(self, name):
+        if name == "get_frequency_estimate":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+def _serve(analyzer, test, **options):
+    async def main():
+        server = AnalyzerServer(analyzer, **options)
+        listener = await server.start_tcp()
+        client = await AnalyzerClient.connect_tcp(*listener.sockets[0].getsockname()[:2])
+        try:
+            return await asyncio.wait_for(test(server, client), 10)
+        finally:
+            await client.close()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_ingest_and_queries():
+    async def test(server, client):
+        await client.send_batch([1, 1, 1, 2, 3])
+        assert (await client.flush())["items_processed"] == 5
+        assert await client.frequencies([1, 4]) == {1: (3, 0), 4: (0, 0)}
+        assert await client.heavy_hitters() == [(1, 3, 0)]
+        assert await client.distinct() == 3
+        assert (await client.quantiles((0.5,)))[0.5] == 1
+    _serve(DivideAndConquerAnalyzer(2), test)
+
+
+@pytest.mark.parametrize("op,payload", [(OP_QUANTILES, b"\0" * 5), (OP_FREQUENCY, b"\0" * 3),
+                                        (OP_HEAVY_HITTERS, b"\0" * 9), (99, b"")])
+def test_malformed_requests_get_error_frames(op, payload):
+    async def test(server, client):
+        with pytest.raises(RuntimeError):
+            await client._request(op, payload)
+        # The connection is still usable afterwards
+        assert (await client.stats())["items_processed"] == 0
+    _serve(DivideAndConquerAnalyzer(2), test)
+
+
+def test_quantile_out_of_range_gets_error_frame():
+    async def test(server, client):
+        with pytest.raises(RuntimeError):
+            await client._request(OP_QUANTILES, struct.pack("<d", 1.5))
+    _serve(DivideAndConquerAnalyzer(2), test)
+
+
+def test_analyzer_error_gets_error_frame():
+    async def test(server, client):
+        await client.send_batch([1, 2])
+        await client.flush()
+        with pytest.raises(RuntimeError, match="get_frequency_estimate"):
+            await client.frequencies([1])
+        assert await client.distinct() == 2
+    _serve(FrequencyLessAnalyzer(2), test)
+
+
+def test_failing_batch_does_not_hang_flush():
+    async def test(server, client):
+        await client.send_batch([13])
+        await client.send_batch([1, 2])
+        await client.flush()
+        # More frames than the queue holds, all failing: producers must not block
+        for _ in range(10):
+            await client.send_batch([13])
+        response = await client.flush()
+        assert response["failed_batches"] >= 2
+        await client.send_batch([5])
+        assert (await client.flush())["items_processed"] >= 1
+        assert (await client.stats())["last_error"]
+    _serve(FailingAnalyzer(2), test, max_pending_batches=2)
+
+
+def test_dead_consumer_is_reported():
+    async def test(server, client):
+        server._consumer.cancel()
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError, match="consumer"):
+            await client.flush()
+    _serve(DivideAndConquerAnalyzer(2), test)
+
+
+def test_oversized_frame_is_refused():
+    async def test(server, client):
+        client.writer.write(FRAME_HEADER.pack(OP_FREQUENCY, 1 << 30))
+        await client.writer.drain()
+        op, length = FRAME_HEADER.unpack(await client.reader.readexactly(FRAME_HEADER.size))
+        assert op == 255
+    _serve(DivideAndConquerAnalyzer(2), test)
@@ -0,0 +1,43 @@
+from SlidingWindow import SlidingWindowAnalyzer
+
+
+def test_sliding_window_late_items():
+    window = SlidingWindowAnalyzer(2, window_seconds=10, buckets=10, clock=lambda: 100.0)
+    for second in range(100):
+        window.process_item(second % 3, timestamp=float(second))
+    window.process_item(9, timestamp=50.0)
+    window.process_item(8, timestamp=95.5)
+    keys = [bucket.key for bucket in window.buckets]
+    assert keys == sorted(keys)
+    assert window.late_items_dropped == 1
+    assert 9 not in window.get_frequency_counts()
+    assert window.get_frequency_counts()[8] == 1
+
+
+def test_sliding_window_late_bucket_expires_in_order():
+    window = SlidingWindowAnalyzer(1, window_seconds=10, buckets=10)
+    for timestamp in (10.0, 20.0, 15.0, 11.0):
+        window.process_item(int(timestamp), timestamp)
+    assert [bucket.key for bucket in window.buckets] == [10, 11, 15, 20]
+    window.advance(26.0)
+    assert window.frequency_counts == {20: 1}
+
+
+def test_sliding_window_drops_old_items_after_the_window_empties():
+    window = SlidingWindowAnalyzer(1, window_seconds=60, buckets=6, clock=lambda: 200.0)
+    window.process_item(1, timestamp=100.0)
+    window.advance(200.0)
+    assert window.get_frequency_counts() == {}
+    window.process_item(2, timestamp=50.0)
+    window.process_item(3, timestamp=190.0)
+    assert window.late_items_dropped == 1
+    assert window.frequency_counts == {3: 1}
+
+
+def test_sliding_window_item_mode_keeps_the_last_items():
+    window = SlidingWindowAnalyzer(3, window_items=100, buckets=4)
+    window.process_batch([7] * 50 + list(range(200)))
+    counts = window.get_frequency_counts()
+    assert 7 not in counts
+    assert all(key in counts for key in range(100, 200))
+    assert window.get_frequency_estimate(150) == (1, 0)
@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+
+import pytest
+
+from Sorting import (MIN_RUN, bottom_up_merge_sort, bounded_counts, counting_sort, expand_counts, kway_merge,
+                     sort_numbers)
+
+
+class _Keyed:
+    # Orders by key only, so stability is observable through tag
+    def __init__(self, key, tag):
+        self.key = key
+        self.tag = tag
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, MIN_RUN, MIN_RUN + 1, 5 * MIN_RUN + 17])
+def test_merge_sort_matches_sorted(n):
+    rng = random.Random(n)
+    values = [rng.randrange(-10**6, 10**6) for _ in range(n)]
+    assert bottom_up_merge_sort(values) == sorted(values)
+    assert bottom_up_merge_sort(sorted(values, reverse=True)) == sorted(values)
+
+
+def test_merge_sort_is_stable_and_leaves_input_alone():
+    rng = random.Random(2)
+    values = [_Keyed(rng.randrange(10), index) for index in range(3 * MIN_RUN)]
+    original = list(values)
+    ordered = bottom_up_merge_sort(values)
+    assert values == original
+    assert [(item.key, item.tag) for item in ordered] == sorted((item.key, item.tag) for item in values)
+
+
+def test_kway_merge():
+    rng = random.Random(3)
+    runs = [sorted(rng.randrange(100) for _ in range(rng.randrange(50))) for _ in range(6)]
+    assert kway_merge(runs) == sorted(value for run in runs for value in run)
+    assert kway_merge([[1, 2]]) == [1, 2]
+
+
+def test_bounded_counts_are_ascending_and_exact():
+    rng = random.Random(4)
+    values = [rng.randrange(-50, 50) for _ in range(5000)]
+    counts = bounded_counts(values)
+    assert list(counts) == sorted(set(values))
+    assert counts == Counter(values)
+    # Few keys spread over a wide span take the sorted-keys path
+    sparse = [0, 60000, 30000, 0]
+    assert list(bounded_counts(sparse).items()) == [(0, 2), (30000, 1), (60000, 1)]
+
+
+@pytest.mark.parametrize("values", [[], [0, 10**9], [1.5, 2], [1, 2.0, 3], ["a", "b"]])
+def test_bounded_counts_rejects_unbounded_or_non_integer_input(values):
+    assert bounded_counts(values) is None
+
+
+def test_sort_numbers_takes_either_path():
+    rng = random.Random(5)
+    narrow = [rng.randrange(100) for _ in range(3000)]
+    wide = [rng.randrange(-10**12, 10**12) for _ in range(3000)]
+    assert sort_numbers(narrow) == sorted(narrow)
+    assert sort_numbers(wide) == sorted(wide)
+    assert counting_sort(narrow, max_span=10) is None
+    assert expand_counts(bounded_counts(narrow)) == sorted(narrow)
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import EachAlgoWithMPL
+from Summary import KIND_GREEDY, KIND_STREAMING, pack_sections, unpack_sections, values_at_ranks
+
+
+def _data(n, seed=0, domain=1000):
+    rng = random.Random(seed)
+    return [int(rng.paretovariate(1.1)) % domain for _ in range(n)]
+
+
+def test_sections_are_read_in_place():
+    payload = bytearray(pack_sections(KIND_STREAMING, [[1, -2, 3], [], [2**63 - 1]]))
+    sections = unpack_sections(payload, KIND_STREAMING)
+    assert [section.tolist() for section in sections] == [[1, -2, 3], [], [2**63 - 1]]
+    sections[0][0] = 7
+    assert unpack_sections(payload, KIND_STREAMING)[0][0] == 7
+
+
+def test_damaged_summaries_are_refused():
+    payload = pack_sections(KIND_GREEDY, [[1, 2, 3]])
+    with pytest.raises(ValueError, match="truncated"):
+        unpack_sections(payload[:-8], KIND_GREEDY)
+    with pytest.raises(ValueError, match="version"):
+        unpack_sections(payload[:4] + b"\x09\x00" + payload[6:], KIND_GREEDY)
+
+
+def test_values_at_ranks():
+    counts = {5: 2, 1: 1, 9: 3}
+    assert values_at_ranks(counts, [0, 1, 2, 3, 5, 2]) == [1, 5, 5, 9, 9, 5]
+
+
+@pytest.mark.parametrize("cls", [EachAlgoWithMPL.GreedyAnalyzer, EachAlgoWithMPL.DivideAndConquerAnalyzer,
+                                 EachAlgoWithMPL.DecreaseAndConquerAnalyzer])
+def test_mergeable_summary_round_trip_and_merge(cls):
+    left = cls(_data(3000, seed=3), 30)
+    right = cls(_data(3000, seed=4), 30)
+    for analyzer in (left, right):
+        if hasattr(analyzer, "process_data"):
+            analyzer.process_data()
+        elif hasattr(analyzer, "process_batch"):
+            analyzer.process_batch(analyzer.numbers)
+    restored = cls.from_bytes(left.to_bytes())
+    assert restored.frequency_counts == left.frequency_counts
+    restored.merge(right)
+    expected = dict(left.frequency_counts)
+    for key, count in right.frequency_counts.items():
+        expected[key] = expected.get(key, 0) + count
+    assert restored.frequency_counts == expected
+    assert sorted(restored.get_heavy_hitters()) == sorted(key for key, count in expected.items() if count >= 30)
+
+
+def test_summary_rejects_other_kinds():
+    payload = EachAlgoWithMPL.GreedyAnalyzer([1, 2, 2], 2).to_bytes()
+    with pytest.raises(ValueError):
+        EachAlgoWithMPL.DecreaseAndConquerAnalyzer.from_bytes(payload)
+    with pytest.raises(ValueError):
+        EachAlgoWithMPL.GreedyAnalyzer.from_bytes(payload[:10])
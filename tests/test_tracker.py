@@ -0,0 +1,85 @@
+import random
+from collections import Counter
+
+import pytest
+
+from HeavyHitters import HeavyHitterTracker, IndexedMinHeap
+
+
+def _stream(n=20000, seed=1):
+    rng = random.Random(seed)
+    return [min(int(rng.paretovariate(1.0)), 300) for _ in range(n)]
+
+
+def _observe_all(tracker, items):
+    counts = Counter()
+    for item in items:
+        counts[item] += 1
+        tracker.observe(item, counts[item])
+    return counts
+
+
+def test_indexed_heap_orders_by_count():
+    rng = random.Random(2)
+    heap = IndexedMinHeap()
+    counts = {}
+    for key in range(200):
+        counts[key] = rng.randrange(1000)
+        heap.push(key, counts[key])
+    for key in rng.sample(range(200), 50):
+        counts[key] += rng.randrange(1000)
+        heap.increase(key, counts[key])
+    popped = [heap.pop()[1] for _ in range(len(heap))]
+    assert popped == sorted(counts.values())
+
+
+def test_top_k_matches_the_largest_counts():
+    tracker = HeavyHitterTracker(threshold=10**9, k=10)
+    counts = _observe_all(tracker, _stream())
+    assert [count for _, count in tracker.top_k()] == sorted(counts.values(), reverse=True)[:10]
+    assert len(tracker.top_k(3)) == 3
+    assert all(counts[key] == count for key, count in tracker.top_k())
+
+
+def test_absolute_threshold_enters_once():
+    seen = []
+    tracker = HeavyHitterTracker(threshold=500, on_cross=lambda *event: seen.append(event))
+    counts = _observe_all(tracker, _stream())
+    expected = {key for key, count in counts.items() if count >= 500}
+    assert set(tracker.heavy_hitters()) == expected
+    events = tracker.drain_events()
+    assert [event[:2] for event in events] == [("enter", key) for key in tracker.heavy_hitters()]
+    assert seen == events and tracker.drain_events() == []
+
+
+def test_phi_threshold_drops_keys_that_fall_behind():
+    tracker = HeavyHitterTracker(phi=0.2)
+    items = [1] * 50 + [2] * 400
+    counts = _observe_all(tracker, items)
+    assert tracker.heavy_hitters() == [2]
+    assert {key for key, count in counts.items() if count >= 0.2 * len(items)} == {2}
+    kinds = [(kind, key) for kind, key, _, _ in tracker.drain_events()]
+    assert kinds == [("enter", 1), ("enter", 2), ("exit", 1)]
+
+
+def test_phi_matches_brute_force_at_every_step():
+    tracker = HeavyHitterTracker(phi=0.05)
+    counts = Counter()
+    for step, item in enumerate(_stream(5000, seed=3), 1):
+        counts[item] += 1
+        tracker.observe(item, counts[item])
+        if step % 250 == 0:
+            assert set(tracker.heavy_hitters()) == {key for key, count in counts.items() if count >= 0.05 * step}
+
+
+def test_event_queue_is_bounded():
+    tracker = HeavyHitterTracker(threshold=1, max_events=5)
+    _observe_all(tracker, range(100))
+    assert [key for _, key, _, _ in tracker.drain_events()] == list(range(95, 100))
+
+
+def test_threshold_or_phi_required():
+    with pytest.raises(ValueError):
+        HeavyHitterTracker()
+    with pytest.raises(ValueError):
+        HeavyHitterTracker(threshold=3, phi=0.1)
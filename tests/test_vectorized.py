@@ -0,0 +1,46 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from VectorAnalyzer import VectorizedAnalyzer, VectorizedStreamingAnalyzer, count_values
+
+
+@pytest.mark.parametrize("data", [
+    np.random.default_rng(1).integers(-1000, 1000, 20000),
+    np.random.default_rng(2).integers(0, 200, 5000).astype(np.uint8),
+    np.array([-2**63, 2**63 - 1, 5, 5], dtype=np.int64),
+    np.random.default_rng(3).random(1000).round(2),
+])
+def test_count_values_matches_counter(data):
+    keys, counts = count_values(data)
+    assert list(keys) == sorted(keys.tolist())
+    assert dict(zip(keys.tolist(), counts.tolist())) == Counter(data.tolist())
+
+
+def test_count_values_empty():
+    keys, counts = count_values(np.empty(0, dtype=np.int32))
+    assert keys.size == counts.size == 0
+
+
+def test_batch_analyzer_matches_numpy():
+    data = np.random.default_rng(4).integers(0, 50, 10000)
+    analyzer = VectorizedAnalyzer(data, 220)
+    analyzer.process_data()
+    counts = Counter(data.tolist())
+    assert analyzer.get_frequency_counts() == counts
+    assert analyzer.get_heavy_hitters() == sorted(key for key, count in counts.items() if count >= 220)
+    assert list(analyzer.get_quantile_estimates().values()) == list(np.percentile(data, (25, 50, 75)))
+
+
+def test_streaming_analyzer_compacts_batches():
+    rng = np.random.default_rng(5)
+    batches = [rng.integers(-100, 100, 3000) for _ in range(10)]
+    analyzer = VectorizedStreamingAnalyzer(100, compact_items=5000)
+    for batch in batches:
+        analyzer.process_batch(batch)
+    counts = Counter(np.concatenate(batches).tolist())
+    assert analyzer.get_frequency_counts() == counts
+    assert analyzer.get_frequency_estimate(7) == (counts[7], 0)
+    assert analyzer.get_top_k(3) == [(key, count, 0) for key, count in counts.most_common(3)]
+    assert analyzer.get_distinct_count() == len(counts)